@@ -0,0 +1,139 @@
+"""
+Async versions of read-heavy API views, for the ASGI deployment.
+
+Under gunicorn's sync workers a request holds a thread for its whole run,
+including every wait on the database. The views here await the async ORM
+instead, so a uvicorn worker serves other requests meanwhile. With
+ASYNC_VIEWS on (scripts/prod.sh sets it in its ASGI mode) they replace the
+DRF views at the same URLs and answer GET and HEAD with the same responses.
+
+Each view stands in for one DRF view, `sync_view`, and borrows an instance
+of it for everything that runs no query of its own: authentication,
+permissions and throttles (run together on a thread, since they may read
+the session and the cache), content negotiation, pagination settings and
+links, error handling and rendering. Other methods are handed to the DRF
+view unchanged.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Paginator
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from .conditional import conditional_on
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+class CountedPaginator(Paginator):
+    """Paginator over a count fetched beforehand, so looking up a page runs no query"""
+
+    def __init__(self, object_list, per_page, count):
+        super().__init__(object_list, per_page)
+        self.count = count
+
+
+class AsyncAPIView(View):
+    sync_view = None    # the DRF view function (SomeView.as_view()) this view replaces
+    namespaces = ()     # answer conditional GETs from these content versions, like the DRF view
+    view_is_async = True
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Like DRF views; session authentication enforces CSRF itself
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Read from the class: through the instance, the function would be bound
+        sync_view = type(self).sync_view
+        if request.method not in READ_METHODS:
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        view = self.borrow_view(sync_view, request, *args, **kwargs)
+        try:
+            await sync_to_async(view.initial)(view.request, *args, **kwargs)
+            handler = self.respond
+            if self.namespaces:
+                handler = conditional_on(*self.namespaces)(handler)
+            response = await handler(view.request, view)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        view.response = view.finalize_response(view.request, response, *args, **kwargs)
+        return view.response
+
+    def borrow_view(self, sync_view, request, *args, **kwargs):
+        """An instance of the DRF view, set up the way its dispatch() does"""
+        view = sync_view.cls(**sync_view.initkwargs)
+        actions = getattr(sync_view, 'actions', None)
+        if actions:
+            # What ViewSetMixin.as_view() does per request
+            actions = {'head': actions['get'], **actions} if 'get' in actions else actions
+            view.action_map = actions
+            for method, action in actions.items():
+                setattr(view, method, getattr(view, action))
+        view.setup(request, *args, **kwargs)
+        view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        return view
+
+    async def respond(self, request, view):
+        """The response to a GET; `request` is the DRF request of `view`"""
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncAPIView):
+    """
+    A DRF list view: get_queryset() runs on a thread, as filter backends may
+    query (model choice filters look their values up); the count, the page
+    and project() then use the async ORM.
+    """
+
+    def get_queryset(self, view):
+        """The rows to paginate, or an error Response"""
+        return view.filter_queryset(view.get_queryset())
+
+    async def project(self, rows, request):
+        """The serialized rows"""
+        raise NotImplementedError
+
+    def get_paginated_response(self, view, data):
+        return view.get_paginated_response(data)
+
+    async def respond(self, request, view):
+        queryset = await sync_to_async(self.get_queryset)(view)
+        if isinstance(queryset, Response):
+            return queryset
+
+        rows = await self.paginate(view, queryset)
+        if rows is None:
+            return Response(await self.project([row async for row in queryset], request))
+        return self.get_paginated_response(view, await self.project(rows, request))
+
+    async def paginate(self, view, queryset):
+        """
+        The view's PageNumberPagination.paginate_queryset(), with the count
+        and the page fetched through the async ORM. None when not paginated.
+        """
+        pagination = view.paginator
+        if pagination is None:
+            return None
+        request = view.request
+        pagination.request = request
+        page_size = pagination.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = CountedPaginator(queryset, page_size, await queryset.acount())
+        page_number = pagination.get_page_number(request, paginator)
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(pagination.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        page.object_list = [row async for row in page.object_list]
+        pagination.page = page
+        if paginator.num_pages > 1 and pagination.template is not None:
+            pagination.display_page_controls = True
+        return page.object_list
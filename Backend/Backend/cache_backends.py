@@ -0,0 +1,54 @@
+"""
+Cache backends that count hits and misses per namespace for /metrics.
+"""
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+def count_lookups(namespace, hits, misses):
+    if hits:
+        CACHE_REQUESTS.inc(hits, namespace=namespace, result='hit')
+    if misses:
+        CACHE_REQUESTS.inc(misses, namespace=namespace, result='miss')
+
+
+class HitCountingLocMemCache(LocMemCache):
+    """LocMemCache; its get_many() goes through get(), so only get() counts"""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        # Local-memory caches are named by their LOCATION, the namespace
+        self.namespace = name
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            count_lookups(self.namespace, 0, 1)
+            return default
+        count_lookups(self.namespace, 1, 0)
+        return value
+
+
+class HitCountingRedisCache(RedisCache):
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self.namespace = self.key_prefix
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            count_lookups(self.namespace, 0, 1)
+            return default
+        count_lookups(self.namespace, 1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        count_lookups(self.namespace, len(values), len(keys) - len(values))
+        return values
@@ -0,0 +1,128 @@
+"""
+Namespaced caches.
+
+Each subsystem gets its own cache alias so it can be sized, inspected and
+flushed independently. With CACHE_URL set (redis://...) every namespace
+shares the Redis server under its own key prefix; otherwise each one is a
+per-process local-memory cache.
+"""
+import math
+import random
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+# Namespace -> default timeout in seconds
+CACHE_NAMESPACES = {
+    'default': 300,
+    'catalog': 15 * 60,
+    'blog': 15 * 60,
+    'coupons': 5 * 60,
+    'sessions': 14 * 24 * 60 * 60,
+    'ratelimit': 60 * 60,
+}
+
+# Django's Redis and local-memory backends, counting hits and misses for /metrics
+REDIS_BACKEND = 'Backend.cache_backends.HitCountingRedisCache'
+LOCMEM_BACKEND = 'Backend.cache_backends.HitCountingLocMemCache'
+
+
+def cache_settings(cache_url=''):
+    """CACHES setting for every namespace"""
+    caches_setting = {}
+    for namespace, timeout in CACHE_NAMESPACES.items():
+        if cache_url:
+            caches_setting[namespace] = {
+                'BACKEND': REDIS_BACKEND,
+                'LOCATION': cache_url,
+                'KEY_PREFIX': namespace,
+                'TIMEOUT': timeout,
+            }
+        else:
+            caches_setting[namespace] = {
+                'BACKEND': LOCMEM_BACKEND,
+                'LOCATION': namespace,
+                'TIMEOUT': timeout,
+                'OPTIONS': {'MAX_ENTRIES': 5000},
+            }
+    return caches_setting
+
+
+def session_engine(cache_url=''):
+    """
+    Sessions are read through the cache only when it is shared: with a
+    per-process cache, a session flushed (logout) in one worker would stay
+    valid in the others until it expired.
+    """
+    if cache_url:
+        return 'django.contrib.sessions.backends.cached_db'
+    return 'django.contrib.sessions.backends.db'
+
+
+def get_cache(namespace):
+    """The namespace's cache, or the default cache for unknown namespaces"""
+    return caches[namespace if namespace in CACHE_NAMESPACES else 'default']
+
+
+def is_shared(namespace):
+    """Whether every process sees the namespace's entries, rather than its own copy"""
+    return not isinstance(get_cache(namespace), LocMemCache)
+
+
+def get_or_refresh(cache, key, compute, timeout, beta=1.0):
+    """
+    cache.get_or_set() with stampede protection by probabilistic early
+    recomputation ("XFetch"). Each entry remembers how long it took to
+    compute; as expiry approaches, a growing share of readers refresh it
+    early, so a hot key is normally rebuilt by a single request before it
+    expires instead of by every request at once after.
+    """
+    entry = cache.get(key)
+    now = time.time()
+    if entry is not None:
+        value, compute_seconds, expires_at = entry
+        # -log(random()) is exponentially distributed with mean 1
+        if now - compute_seconds * beta * math.log(1.0 - random.random()) < expires_at:
+            return value
+
+    start = time.time()
+    value = compute()
+    compute_seconds = time.time() - start
+    cache.set(key, (value, compute_seconds, start + timeout), timeout)
+    return value
+
+
+def namespace_keys(namespace):
+    """Keys currently stored in a namespace (without the prefix)"""
+    cache = caches[namespace]
+    if hasattr(cache, '_cache') and isinstance(cache._cache, dict):
+        # LocMemCache keys look like ':1:key'
+        return sorted(key.split(':', 2)[-1] for key in cache._cache)
+
+    client = cache._cache.get_client(write=False)
+    prefix = cache.make_key('')
+    return sorted(
+        key.decode()[len(prefix):]
+        for key in client.scan_iter(match=f'{prefix}*', count=1000)
+    )
+
+
+def flush_namespace(namespace):
+    """Remove every key of one namespace, leaving other namespaces untouched"""
+    cache = caches[namespace]
+    if hasattr(cache, '_cache') and isinstance(cache._cache, dict):
+        cache.clear()
+        return
+
+    # RedisCache.clear() would flush the whole Redis database
+    client = cache._cache.get_client(write=True)
+    prefix = cache.make_key('')
+    batch = []
+    for key in client.scan_iter(match=f'{prefix}*', count=1000):
+        batch.append(key)
+        if len(batch) >= 1000:
+            client.delete(*batch)
+            batch = []
+    if batch:
+        client.delete(*batch)
@@ -0,0 +1,77 @@
+"""
+Conditional GET for read-only API views.
+
+Validators are derived from the cheap content versions in Backend.versioning
+rather than from the response body, so a matching If-None-Match or
+If-Modified-Since is answered with 304 before serialization and before any
+query but the version lookup (none with a shared cache).
+"""
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .versioning import get_versions
+
+
+def request_versions(request, namespaces):
+    """Versions of the namespaces, looked up once per request"""
+    versions = request.__dict__.setdefault('_content_versions', {})
+    missing = [namespace for namespace in namespaces if namespace not in versions]
+    if missing:
+        versions.update(get_versions(*missing))
+    return [versions[namespace] for namespace in namespaces]
+
+
+def versioned_etag(*namespaces):
+    """ETag from the namespace versions, the full URL and the negotiated format"""
+    def etag_func(request, *args, **kwargs):
+        versions = '.'.join(str(version) for version in request_versions(request, namespaces))
+        key = '|'.join([versions, request.get_full_path(), request.META.get('HTTP_ACCEPT', '')])
+        return hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+    return etag_func
+
+
+def versioned_last_modified(*namespaces):
+    """Last-Modified is the time of the latest change in any namespace"""
+    def last_modified_func(request, *args, **kwargs):
+        latest = max(request_versions(request, namespaces))
+        return datetime.datetime.fromtimestamp(latest / 1000, tz=datetime.timezone.utc)
+    return last_modified_func
+
+
+def conditional_on(*namespaces):
+    """
+    View decorator answering conditional GETs from namespace versions.
+    Use with method_decorator on DRF handlers such as `list` so that
+    authentication and permissions still run first. Coroutine functions
+    are supported; their versions are looked up on a thread first.
+    """
+    def decorator(view_func):
+        conditional_view = condition(
+            etag_func=versioned_etag(*namespaces),
+            last_modified_func=versioned_last_modified(*namespaces),
+        )(view_func)
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def inner(request, *args, **kwargs):
+                await sync_to_async(request_versions)(request, namespaces)
+                return revalidate(request, await conditional_view(request, *args, **kwargs))
+            return inner
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            return revalidate(request, conditional_view(request, *args, **kwargs))
+        return inner
+    return decorator
+
+
+def revalidate(request, response):
+    if request.method in ('GET', 'HEAD'):
+        # Clients may keep the response but must revalidate it
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -1,4 +1,19 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import DEFAULT_DB_ALIAS
 from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .caching import get_cache, is_shared
+
+# Cached users are dropped as soon as the row is saved (UserAuth signals);
+# the timeout bounds changes made with QuerySet.update(), which sends none
+USER_CACHE_TIMEOUT = 60
+
+# Never cached; read from the database if a view asks for it
+UNCACHED_USER_FIELDS = {'password'}
 
 
 class CsrfExemptSessionAuthentication(SessionAuthentication):
@@ -8,3 +23,84 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
     def enforce_csrf(self, request):
         # Skip CSRF enforcement for API endpoints
         return
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_cached_user(user_id):
+    get_cache('sessions').delete(user_cache_key(user_id))
+
+
+def user_fields(user):
+    """The cacheable column values of a user"""
+    return {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields if field.attname not in UNCACHED_USER_FIELDS
+    }
+
+
+def user_from_fields(fields):
+    """A User built from user_fields(), the uncached columns deferred"""
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, list(fields), list(fields.values()))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication for endpoints that need the full User model.
+
+    With a shared sessions cache (CACHE_URL), the row is read from there
+    instead of the database on every request. Every process then sees the
+    entry dropped when the user is saved, so deactivation and demotion
+    apply at once. A per-process cache could only drop the entry of the
+    process that saved the user, so without CACHE_URL the row is read from
+    the database each time.
+
+    Endpoints that only need the user id use the default
+    JWTStatelessUserAuthentication, which builds a TokenUser from the
+    verified claims without any query.
+    """
+    def get_user(self, validated_token):
+        if not is_shared('sessions'):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        cache = get_cache('sessions')
+        key = user_cache_key(user_id)
+        fields = cache.get(key)
+        if fields is None:
+            # Raises for unknown and inactive users, which are never cached
+            user = super().get_user(validated_token)
+            cache.set(key, user_fields(user), USER_CACHE_TIMEOUT)
+            return user
+        return user_from_fields(fields)
+
+
+class GuestUser(AnonymousUser):
+    """
+    A visitor identified only by the signed guest id in their token. Not
+    authenticated, so views behind IsAuthenticated stay closed to guests.
+    """
+    is_guest = True
+
+    def __init__(self, guest_id):
+        self.guest_id = guest_id
+
+    def __str__(self):
+        return f'Guest {self.guest_id}'
+
+
+class GuestJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWTStatelessUserAuthentication that also accepts guest tokens (see
+    UserAuth.guests), resolving them to a GuestUser without any query.
+    """
+    def get_user(self, validated_token):
+        if validated_token.get('is_guest') and validated_token.get('guest_id'):
+            return GuestUser(validated_token['guest_id'])
+        return super().get_user(validated_token)
@@ -0,0 +1,121 @@
+"""
+Streaming CSV and JSON Lines exports.
+
+An export is a tuple of column names and an iterable of row batches. The
+rows come from querysets read with .iterator(chunk_size=EXPORT_CHUNK_SIZE);
+each batch is encoded and sent before the next one is fetched, so memory
+stays flat however many rows there are. The same renderers back the export
+API views (format picked with ?format=csv|jsonl or the Accept header) and
+`manage.py export`.
+"""
+import csv
+import datetime
+import json
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+EXPORT_CHUNK_SIZE = 2000
+
+_drf_encoder = encoders.JSONEncoder()
+
+
+def batched(iterable, size):
+    """Lists of `size` items; itertools.batched() needs Python 3.12"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def export_value(value):
+    """Decimals as exact strings like the API; dates in ISO 8601"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return _drf_encoder.default(value)
+    return value
+
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+class ExportRenderer(BaseRenderer):
+    charset = 'utf-8'
+
+    def encode_header(self, columns):
+        return ''
+
+    def encode_row(self, columns, row):
+        raise NotImplementedError
+
+    def encode(self, columns, batches):
+        """Bytes per batch, the header first"""
+        header = self.encode_header(columns)
+        if header:
+            yield header.encode(self.charset)
+        for batch in batches:
+            yield ''.join(self.encode_row(columns, row) for row in batch).encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Error responses: a dict is one row
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        columns = tuple(rows[0]) if rows else ()
+        return b''.join(self.encode(columns, [[tuple(row.get(column) for column in columns) for row in rows]]))
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def __init__(self):
+        self.writer = csv.writer(_Echo())
+
+    def encode_header(self, columns):
+        return self.writer.writerow(columns)
+
+    def encode_row(self, columns, row):
+        return self.writer.writerow([
+            ' '.join(value) if isinstance(value, list) else export_value(value) for value in row
+        ])
+
+
+class JSONLinesRenderer(ExportRenderer):
+    media_type = 'application/jsonl'
+    format = 'jsonl'
+
+    def encode_row(self, columns, row):
+        values = {column: export_value(value) for column, value in zip(columns, row)}
+        return json.dumps(values, ensure_ascii=False, separators=(',', ':'), default=_drf_encoder.default) + '\n'
+
+
+EXPORT_RENDERERS = [CSVRenderer, JSONLinesRenderer]
+
+
+async def _aiterate(iterator):
+    # Each batch is read on the request's sync thread, like the view itself
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
+
+
+def export_response(request, columns, batches, name):
+    """Stream `batches` in the format DRF negotiated for `request`"""
+    renderer = request.accepted_renderer
+    chunks = renderer.encode(columns, batches)
+    if isinstance(request._request, ASGIRequest):
+        # Django would read a synchronous iterator into memory first
+        chunks = _aiterate(chunks)
+    response = StreamingHttpResponse(chunks, content_type=f'{renderer.media_type}; charset={renderer.charset}')
+    response['Content-Disposition'] = f'attachment; filename="{name}.{renderer.format}"'
+    return response
@@ -0,0 +1,136 @@
+"""
+Responsive image derivatives.
+
+Every uploaded image gets resized WebP and JPEG copies stored next to the
+original under a `derivatives/` directory. The model keeps a manifest of
+them in a `variants` JSONField:
+
+    {"source": "products/images/a.jpg", "width": 1600, "height": 1200,
+     "sizes": [{"width": 320, "height": 240, "webp": "...", "jpeg": "..."}, ...]}
+
+The manifest is only trusted while `source` matches the current file, so a
+replaced image never serves the old derivatives. Derivative names carry a
+hash of their content (`a_320w.3f2c9b1d0e4a.webp`), so a name never
+changes content and the media server caches them as immutable.
+"""
+import hashlib
+import posixpath
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+# Skip decoding absurdly large uploads instead of exhausting worker memory
+MAX_SOURCE_PIXELS = 40_000_000
+
+
+# Matches the names derivative_name() gives
+DERIVATIVE_NAME_RE = re.compile(r'/derivatives/[^/]+_\d+w\.[0-9a-f]{12}\.(?:webp|jpeg)$')
+
+
+def derivative_name(name, width, extension, content):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    digest = hashlib.md5(content, usedforsecurity=False).hexdigest()[:12]
+    return posixpath.join(directory, 'derivatives', f'{stem}_{width}w.{digest}.{extension}')
+
+
+def target_widths(source_width):
+    """Standard widths below the source, topped with the source width itself"""
+    largest = min(source_width, DERIVATIVE_WIDTHS[-1])
+    return [width for width in DERIVATIVE_WIDTHS if width < largest] + [largest]
+
+
+def _encode(image, extension):
+    if extension == 'jpeg':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode.endswith('A') else 'RGB')
+    buffer = BytesIO()
+    image.save(buffer, **DERIVATIVE_FORMATS[extension])
+    return buffer.getvalue()
+
+
+def render_derivatives(name, storage=None):
+    """
+    Write every derivative of the stored image `name` and return its
+    manifest. Returns an empty dict when the file is missing or unreadable.
+    """
+    storage = storage or default_storage
+    try:
+        with storage.open(name, 'rb') as source:
+            image = Image.open(source)
+            if image.width * image.height > MAX_SOURCE_PIXELS:
+                return {}
+            image = ImageOps.exif_transpose(image)
+            image.load()
+    except (FileNotFoundError, OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return {}
+
+    source_width, source_height = image.size
+    sizes = []
+    # Largest first so every smaller size is resampled from the previous one
+    for width in reversed(target_widths(source_width)):
+        height = max(1, round(source_height * width / source_width))
+        if (width, height) != image.size:
+            image = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+        size = {'width': width, 'height': height}
+        for extension in DERIVATIVE_FORMATS:
+            content = _encode(image, extension)
+            target = derivative_name(name, width, extension, content)
+            # Same name, same bytes: a re-render keeps what is there
+            if not storage.exists(target):
+                target = storage.save(target, ContentFile(content))
+            size[extension] = target
+        sizes.append(size)
+
+    return {
+        'source': name,
+        'width': source_width,
+        'height': source_height,
+        'sizes': sorted(sizes, key=lambda size: size['width']),
+    }
+
+
+def build_srcset(variants, name, url):
+    """
+    {'webp': srcset, 'jpeg': srcset} for a manifest, or None while the
+    derivatives are missing or belong to a previous upload.
+    """
+    if not name or not variants or variants.get('source') != name:
+        return None
+    return {
+        extension: ', '.join(f"{url(size[extension])} {size['width']}w" for size in variants['sizes'])
+        for extension in DERIVATIVE_FORMATS
+    }
+
+
+class ResponsiveImageMixin:
+    """For models with an `image` file field and a `variants` JSONField"""
+
+    @property
+    def has_current_variants(self):
+        return bool(self.image) and self.variants.get('source') == self.image.name
+
+    def get_srcset(self, url=None):
+        if not self.image:
+            return None
+        return build_srcset(self.variants, self.image.name, url or self.image.storage.url)
+
+    def refresh_variants(self, force=False):
+        """Generate missing derivatives and store the manifest without re-saving the row"""
+        if not self.image or (self.has_current_variants and not force):
+            return False
+        self.variants = render_derivatives(self.image.name, self.image.storage)
+        type(self).objects.filter(pk=self.pk).update(variants=self.variants)
+        return True
@@ -0,0 +1,169 @@
+"""
+Per-request timing and SQL accounting.
+
+RequestInstrumentationMiddleware measures every request:
+
+- total: wall time inside Django
+- db: number and duration of SQL queries, on every database alias
+- render: time spent rendering DRF and TemplateResponse responses
+- app: the rest, i.e. view code including serializers' to_representation
+
+and reports it as a Server-Timing header (when REQUEST_SERVER_TIMING is
+on), as one JSON log line on the `Backend.requests` logger and to the
+/metrics histograms, labelled by URL name. Requests
+running more queries than their budget are logged as warnings; views can
+set a `query_budget` attribute to override REQUEST_QUERY_BUDGET.
+
+Under ASGI the middleware runs in async mode. Queries then run on the
+request's thread-sensitive thread (sync views and the async ORM alike),
+so that is where the SQL hooks are installed.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+from types import MethodType
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from .metrics import DB_QUERY_SECONDS, REQUEST_DURATION, REQUEST_QUERIES
+
+logger = logging.getLogger('Backend.requests')
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'queries', 'query_seconds', 'render_started', 'render_seconds', 'query_budget')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.render_started = None
+        self.render_seconds = 0.0
+        self.query_budget = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - start
+
+
+def async_hook(method):
+    """Coroutine version of a hook without I/O, which Django would otherwise run on a thread"""
+    async def hook(self, *args):
+        return method(*args)
+    # Bound, as Django names the middleware from the hook's __self__
+    return MethodType(hook, method.__self__)
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+class RequestInstrumentationMiddleware:
+    """Outermost middleware, so the timings and size cover the full response"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'REQUEST_SERVER_TIMING', False)
+        self.query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', 50)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self.process_view = async_hook(self.process_view)
+            self.process_template_response = async_hook(self.process_template_response)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        request._metrics = metrics
+        with ExitStack() as stack:
+            self.wrap_connections(stack, metrics)
+            response = self.get_response(request)
+
+        self.report(request, response, metrics)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        request._metrics = metrics
+        stack = ExitStack()
+        await sync_to_async(self.wrap_connections)(stack, metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+
+        self.report(request, response, metrics)
+        return response
+
+    def wrap_connections(self, stack, metrics):
+        # Connections are per thread, so this must run where the queries will
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = request._metrics
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        metrics.query_budget = getattr(view_class, 'query_budget', None)
+
+    def process_template_response(self, request, response):
+        # DRF responses are template responses too; rendering follows this hook
+        metrics = request._metrics
+        metrics.render_started = time.perf_counter()
+        response.add_post_render_callback(lambda response: self.rendered(metrics))
+        return response
+
+    def rendered(self, metrics):
+        metrics.render_seconds = time.perf_counter() - metrics.render_started
+
+    def report(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        match = request.resolver_match
+        budget = metrics.query_budget if metrics.query_budget is not None else self.query_budget
+        over_budget = metrics.queries > budget
+
+        view = match.view_name if match else 'unmatched'
+        REQUEST_DURATION.observe(total, view=view, method=request.method, status=response.status_code)
+        REQUEST_QUERIES.observe(metrics.queries, view=view)
+        DB_QUERY_SECONDS.inc(metrics.query_seconds, view=view)
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.query_seconds * 1000:.1f};desc="{metrics.queries} queries"',
+                f'render;dur={metrics.render_seconds * 1000:.1f}',
+                f'app;dur={max(0.0, total - metrics.query_seconds - metrics.render_seconds) * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+
+        level = logging.WARNING if over_budget else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': match.route if match else None,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'db_queries': metrics.queries,
+            'db_ms': round(metrics.query_seconds * 1000, 1),
+            'render_ms': round(metrics.render_seconds * 1000, 1),
+            'response_bytes': response_size(response),
+        }
+        if over_budget:
+            record['query_budget'] = budget
+        logger.log(level, json.dumps(record), extra={'request_metrics': record})
@@ -0,0 +1,100 @@
+import logging
+import multiprocessing
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from Backend.instrumentation import RequestInstrumentationMiddleware
+from Backend.metrics import CACHE_REQUESTS, DB_QUERY_SECONDS, REQUEST_DURATION, REQUEST_QUERIES, collect, generate_latest
+
+VIEWS = ['product-list', 'cart-summary', 'apply-coupon', 'blogpost-detail']
+
+
+def record_request(i):
+    """The samples RequestInstrumentationMiddleware and the caches record for one request"""
+    view = VIEWS[i % len(VIEWS)]
+    REQUEST_DURATION.observe(0.001 * (i % 300), view=view, method='GET', status=200)
+    REQUEST_QUERIES.observe(i % 12, view=view)
+    DB_QUERY_SECONDS.inc(0.0004, view=view)
+    CACHE_REQUESTS.inc(namespace='catalog', result='hit')
+    CACHE_REQUESTS.inc(namespace='sessions', result='miss')
+
+
+def write_samples(requests):
+    for i in range(requests):
+        record_request(i)
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of recording metrics and the cost of a /metrics scrape'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Requests recorded per measurement (default: 20000)')
+        parser.add_argument('--processes', type=int, default=4, help='Worker processes writing metrics (default: 4)')
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        # A scratch directory keeps the benchmark out of the server's metrics
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            self.bench_recording(requests)
+            self.bench_middleware(requests)
+            self.bench_scrape(requests, options['processes'], directory)
+
+    def bench_recording(self, requests):
+        record_request(0)
+        start = time.perf_counter()
+        write_samples(requests)
+        per_request = (time.perf_counter() - start) / requests
+        self.stdout.write(f'recording: {per_request * 1e6:.1f} us per request (5 samples)')
+
+    def bench_middleware(self, requests):
+        request_factory = RequestFactory()
+
+        def view(request):
+            return HttpResponse(b'ok')
+
+        def per_request(handler):
+            handler(request_factory.get('/'))
+            start = time.perf_counter()
+            for _ in range(requests):
+                handler(request_factory.get('/'))
+            return (time.perf_counter() - start) / requests
+
+        middleware = RequestInstrumentationMiddleware(view)
+        bare = per_request(view)
+        request_logger = logging.getLogger('Backend.requests')
+        request_logger.disabled = True
+        try:
+            without_log = per_request(middleware)
+        finally:
+            request_logger.disabled = False
+        self.stdout.write(
+            f'middleware: {(without_log - bare) * 1e6:.1f} us per request over a bare view, '
+            'plus the cost of the request log line'
+        )
+
+    def bench_scrape(self, requests, processes, directory):
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=write_samples, args=(requests,)) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        # This process recorded requests + 1 more in bench_recording
+        expected = (processes + 1) * requests + 1
+        samples = collect(directory)
+        total = sum(samples[f'["http_request_db_queries_count",["{view}"]]'] for view in VIEWS)
+        if total != expected:
+            raise CommandError(f'Expected {expected} requests across processes, found {total:g}')
+
+        start = time.perf_counter()
+        body = generate_latest(directory)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'scrape: {elapsed * 1000:.1f} ms for {processes + 1} process files, '
+            f'{len(body.splitlines())} lines; counts add up across processes'
+        )
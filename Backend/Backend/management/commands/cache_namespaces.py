@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend.caching import CACHE_NAMESPACES, LOCMEM_BACKEND, flush_namespace, namespace_keys
+
+
+class Command(BaseCommand):
+    help = (
+        'Inspect or flush cache namespaces. Local-memory caches live inside each '
+        'server process, so this only reaches them when CACHE_URL points at Redis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['inspect', 'flush'])
+        parser.add_argument('namespaces', nargs='*', help='Namespaces to act on (default: all)')
+        parser.add_argument('--keys', action='store_true', help='List the keys of each namespace when inspecting')
+
+    def handle(self, *args, **options):
+        namespaces = options['namespaces'] or list(CACHE_NAMESPACES)
+        unknown = [namespace for namespace in namespaces if namespace not in CACHE_NAMESPACES]
+        if unknown:
+            raise CommandError(f"Unknown namespaces: {', '.join(unknown)}. Choose from {', '.join(CACHE_NAMESPACES)}")
+
+        if settings.CACHES['default']['BACKEND'] == LOCMEM_BACKEND:
+            self.stdout.write(self.style.WARNING('Local-memory caches: only this process is affected'))
+
+        for namespace in namespaces:
+            if options['action'] == 'flush':
+                flush_namespace(namespace)
+                self.stdout.write(self.style.SUCCESS(f'{namespace}: flushed'))
+                continue
+
+            config = settings.CACHES[namespace]
+            keys = namespace_keys(namespace)
+            self.stdout.write(
+                f"{namespace}: {len(keys)} keys, timeout {config['TIMEOUT']}s, "
+                f"{config['BACKEND'].rsplit('.', 1)[-1]} at {config['LOCATION']}"
+            )
+            if options['keys']:
+                for key in keys:
+                    self.stdout.write(f'  {key}')
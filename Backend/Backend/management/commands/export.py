@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend.exports import EXPORT_CHUNK_SIZE, EXPORT_RENDERERS
+from Order.exports import ORDER_COLUMNS, order_batches
+from Product.exports import PRODUCT_COLUMNS, product_batches
+from Product.models import ProductImage
+
+RENDERERS = {renderer.format: renderer for renderer in EXPORT_RENDERERS}
+
+
+class Command(BaseCommand):
+    help = 'Stream products or order lines as CSV or JSON Lines (the data of /product/export/ and /order/export/)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=['products', 'orders'])
+        parser.add_argument('--format', choices=RENDERERS, default='csv', help='Output format (default: csv)')
+        parser.add_argument('--output', '-o', help='File to write (default: standard output)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help=f'Rows fetched per query (default: {EXPORT_CHUNK_SIZE})')
+        parser.add_argument('--base-url', default='', help='Prefix for image URLs, e.g. https://shop.example.com')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        if options['dataset'] == 'products':
+            storage = ProductImage._meta.get_field('image').storage
+            base_url = options['base_url'].rstrip('/')
+            columns = PRODUCT_COLUMNS
+            batches = product_batches(options['chunk_size'], url=lambda name: base_url + storage.url(name))
+        else:
+            columns = ORDER_COLUMNS
+            batches = order_batches(options['chunk_size'])
+
+        chunks = RENDERERS[options['format']]().encode(columns, batches)
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                self.write(chunks, output)
+            self.stderr.write(f'Exported {options["dataset"]} to {options["output"]}')
+        else:
+            self.write(chunks, sys.stdout.buffer)
+
+    def write(self, chunks, output):
+        # Each batch goes out as soon as it is encoded
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
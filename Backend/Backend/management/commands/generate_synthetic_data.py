@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend.synthetic import DEFAULT_COUNTS, SYNTHETIC_PASSWORD, USERNAME_PREFIX, SyntheticDataError, flush, generate
+
+HELP = {
+    'categories': 'Product categories',
+    'products': 'Products',
+    'images': 'Images per product',
+    'users': 'Users, each with a profile; every other one has a cart',
+    'cart_lines': 'Lines per cart',
+    'coupons': 'Coupons, usable any number of times',
+    'orders': 'Average orders per user',
+    'reviews': 'Product reviews',
+    'posts': 'Blog posts',
+    'comments': 'Average comments per blog post',
+}
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create a deterministic synthetic dataset for load testing (see scripts/loadtest.py); needs DEBUG on'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed builds the same data (default: 1)')
+        for name, default in DEFAULT_COUNTS.items():
+            parser.add_argument(f'--{name.replace("_", "-")}', type=int, default=default, help=f'{HELP[name]} (default: {default})')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT (default: 1000)')
+        parser.add_argument('--flush', action='store_true', help='Delete previously generated synthetic data first')
+        parser.add_argument('--flush-only', action='store_true', help='Delete previously generated synthetic data and stop')
+
+    def handle(self, *args, **options):
+        counts = {name: options[name] for name in DEFAULT_COUNTS}
+        if any(count < 0 for count in counts.values()):
+            raise CommandError('Counts cannot be negative')
+        if counts['products'] and not counts['categories']:
+            raise CommandError('Products need at least one category')
+
+        if not (options['flush_only'] or settings.DEBUG):
+            raise CommandError(f'Synthetic users all log in with "{SYNTHETIC_PASSWORD}"; run this only with DEBUG on')
+
+        try:
+            if options['flush'] or options['flush_only']:
+                self.stdout.write(f'Deleted {flush()} synthetic rows')
+                if options['flush_only']:
+                    return
+            elif User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+                raise CommandError('Synthetic data already exists; pass --flush to replace it')
+
+            start = time.perf_counter()
+            created = generate(
+                seed=options['seed'], batch_size=options['batch_size'],
+                log=lambda line: self.stdout.write(f'  {line}'), **counts,
+            )
+        except SyntheticDataError as error:
+            raise CommandError(str(error)) from error
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(created.values())} rows in {time.perf_counter() - start:.1f}s. '
+            f'Users {USERNAME_PREFIX}00000 and up log in with password "{SYNTHETIC_PASSWORD}".'
+        ))
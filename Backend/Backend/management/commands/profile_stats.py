@@ -0,0 +1,69 @@
+import glob
+import io
+import os
+import pstats
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend.profiling import PROFILE_HEADER, profile_token, view_directory
+
+SORT_KEYS = ['cumulative', 'tottime', 'calls']
+
+
+class Command(BaseCommand):
+    help = 'Add up stored request profiles (see Backend/profiling.py) and print the top functions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', action='append', default=[], help='Only profiles of this URL name (repeatable)')
+        parser.add_argument('--hours', type=float, help='Only profiles from the last N hours')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='cumulative', help='Order of the functions (default: cumulative)')
+        parser.add_argument('--limit', type=int, default=30, help='Functions to print (default: 30)')
+        parser.add_argument('--clear', action='store_true', help='Delete the selected profiles instead of printing them')
+        parser.add_argument('--token', action='store_true', help=f'Print a value for the {PROFILE_HEADER} request header and exit')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            max_age = getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 3600)
+            self.stdout.write(f'{PROFILE_HEADER}: {profile_token()}')
+            self.stdout.write(f'Valid for {max_age}s')
+            return
+
+        directory = getattr(settings, 'PROFILE_DIR', '')
+        if not directory:
+            raise CommandError('PROFILE_DIR is not set')
+
+        views = [view_directory(view) for view in options['view']] or ['*']
+        paths = sorted(path for view in views for path in glob.glob(os.path.join(directory, view, '*.prof')))
+        if options['hours'] is not None:
+            cutoff = time.time() - options['hours'] * 3600
+            paths = [path for path in paths if os.path.getmtime(path) >= cutoff]
+        if not paths:
+            raise CommandError(f'No profiles found in {directory}')
+
+        if options['clear']:
+            for path in paths:
+                os.remove(path)
+            self.stdout.write(f'Deleted {len(paths)} profiles')
+            return
+
+        self.summarize(paths)
+        # pstats writes piecemeal, which self.stdout would break into lines
+        output = io.StringIO()
+        stats = pstats.Stats(*paths, stream=output)
+        # One header line per file; summarize() already counted them
+        stats.files = []
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(output.getvalue())
+
+    def summarize(self, paths):
+        """Profile count and median duration per view; durations are in the file names"""
+        durations = {}
+        for path in paths:
+            view = os.path.basename(os.path.dirname(path))
+            durations.setdefault(view, []).append(float(os.path.basename(path).split('-')[1].rstrip('ms')))
+        self.stdout.write(f'{len(paths)} profiles')
+        for view, values in sorted(durations.items()):
+            values.sort()
+            self.stdout.write(f'  {view}: {len(values)}, median {values[len(values) // 2]:.0f}ms')
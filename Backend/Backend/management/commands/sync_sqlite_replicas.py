@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend.routers import replica_aliases
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database onto the SQLite replica stand-ins'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep copying every N seconds, simulating replication lag (default: copy once)',
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        replicas = [alias for alias in replica_aliases() if settings.DATABASES[alias]['ENGINE'] == SQLITE_ENGINE]
+        if primary['ENGINE'] != SQLITE_ENGINE:
+            raise CommandError('The primary database is not SQLite; real replicas are fed by the database server')
+        if not replicas:
+            raise CommandError('No SQLite replica configured in DATABASE_REPLICA_URLS')
+
+        while True:
+            self.copy(primary['NAME'], replicas)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def copy(self, primary_path, replicas):
+        # The backup API takes a consistent snapshot while the primary stays writable
+        source = sqlite3.connect(primary_path)
+        try:
+            for alias in replicas:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias} synced from {primary_path}')
+        finally:
+            source.close()
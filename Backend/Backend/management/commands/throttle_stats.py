@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Backend.caching import LOCMEM_BACKEND, get_cache
+from Backend.throttling import RATELIMIT_NAMESPACE, rejection_counts
+from rest_framework.settings import api_settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Show how many requests each throttle scope has rejected. The counters '
+        'are shared between server processes only when CACHE_URL points at Redis.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after showing them')
+
+    def handle(self, *args, **options):
+        if settings.CACHES[RATELIMIT_NAMESPACE]['BACKEND'] == LOCMEM_BACKEND:
+            self.stdout.write(self.style.WARNING('Local-memory cache: only this process is visible'))
+
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        for scope, rejected in rejection_counts().items():
+            self.stdout.write(f'{scope} ({rates[scope]}): {rejected} rejected')
+
+        if options['reset']:
+            get_cache(RATELIMIT_NAMESPACE).delete_many([f'rejected:{scope}' for scope in rates])
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
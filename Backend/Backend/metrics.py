@@ -0,0 +1,241 @@
+"""
+Multiprocess metrics in the Prometheus text format.
+
+Every process writes its samples to its own memory-mapped file in
+METRICS_DIR, so recording a sample is a dictionary lookup and an in-place
+float update with no locking between processes. /metrics reads and sums the
+files of all processes, past and present, which keeps counters monotonic
+when gunicorn recycles a worker. The directory must be emptied when the
+server starts (scripts/prod.sh does).
+
+File layout: an 8-byte header holding the used length, then entries of
+
+    int32 key length | key (utf-8, padded to 8-byte alignment) | float64 value
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+INITIAL_FILE_SIZE = 64 * 1024
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def metrics_dir():
+    path = getattr(settings, 'METRICS_DIR', '') or os.path.join(tempfile.gettempdir(), 'sistomatic-metrics')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _padded_length(key_length):
+    # key length field + key, rounded so the value that follows is 8-byte aligned
+    return key_length + (8 - (key_length + 4) % 8)
+
+
+def _entries(data):
+    """(key, offset of its value) for every entry of a metrics file"""
+    used = struct.unpack_from('i', data, 0)[0] if len(data) >= 8 else 0
+    pos = 8
+    while pos < used:
+        key_length = struct.unpack_from('i', data, pos)[0]
+        key = bytes(data[pos + 4:pos + 4 + key_length]).decode()
+        pos += 4 + _padded_length(key_length)
+        yield key, pos
+        pos += 8
+
+
+def read_samples(data):
+    """(key, value) pairs of one metrics file's contents"""
+    for key, position in _entries(data):
+        yield key, struct.unpack_from('d', data, position)[0]
+
+
+class MmapedValues:
+    """Float values by key in one process's metrics file"""
+
+    def __init__(self, path):
+        self._file = open(path, 'a+b')
+        self._capacity = max(os.fstat(self._file.fileno()).st_size, INITIAL_FILE_SIZE)
+        self._file.truncate(self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = struct.unpack_from('i', self._map, 0)[0] or 8
+        self._positions = dict(_entries(self._map))
+
+    def _add_key(self, key):
+        encoded = key.encode()
+        entry = struct.pack(f'i{_padded_length(len(encoded))}sd', len(encoded), encoded, 0.0)
+        while self._used + len(entry) > self._capacity:
+            self._capacity *= 2
+            self._file.truncate(self._capacity)
+            self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._map[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        # Publish the entry only once it is fully written
+        struct.pack_into('i', self._map, 0, self._used)
+        position = self._used - 8
+        self._positions[key] = position
+        return position
+
+    def inc(self, key, amount):
+        position = self._positions.get(key)
+        if position is None:
+            position = self._add_key(key)
+        struct.pack_into('d', self._map, position, struct.unpack_from('d', self._map, position)[0] + amount)
+
+
+class _ProcessStore:
+    """The current process's file, opened on first use and again after a fork"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        os.register_at_fork(after_in_child=self._forked)
+
+    def _forked(self):
+        self._lock = threading.Lock()
+        self._values = None
+
+    def inc(self, key, amount):
+        with self._lock:
+            if self._values is None:
+                self._values = MmapedValues(os.path.join(metrics_dir(), f'metrics_{os.getpid()}.db'))
+            self._values.inc(key, amount)
+
+
+_store = _ProcessStore()
+
+REGISTRY = {}
+
+
+def _sample_key(name, labels):
+    return json.dumps([name, labels], separators=(',', ':'))
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Sample keys are built once per label combination
+        self._keys = {}
+        REGISTRY[name] = self
+
+    def _label_values(self, labels):
+        return tuple([str(labels[name]) for name in self.labelnames])
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        label_values = self._label_values(labels)
+        key = self._keys.get(label_values)
+        if key is None:
+            key = self._keys[label_values] = _sample_key(f'{self.name}_total', list(label_values))
+        _store.inc(key, amount)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        label_values = self._label_values(labels)
+        keys = self._keys.get(label_values)
+        if keys is None:
+            keys = self._keys[label_values] = (
+                [_sample_key(f'{self.name}_bucket', [*label_values, bound]) for bound in self.buckets],
+                _sample_key(f'{self.name}_sum', list(label_values)),
+                _sample_key(f'{self.name}_count', list(label_values)),
+            )
+        bucket_keys, sum_key, count_key = keys
+        # Only the bucket the value falls in is stored; exposition makes them cumulative
+        _store.inc(bucket_keys[bisect_left(self.buckets, value)], 1)
+        _store.inc(sum_key, value)
+        _store.inc(count_key, 1)
+
+
+def collect(directory=None):
+    """{sample key: value} summed over every process's file"""
+    directory = directory or metrics_dir()
+    totals = defaultdict(float)
+    for filename in os.listdir(directory):
+        if not filename.endswith('.db'):
+            continue
+        with open(os.path.join(directory, filename), 'rb') as metrics_file:
+            for key, value in read_samples(metrics_file.read()):
+                totals[key] += value
+    return totals
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    escaped = (
+        str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+        for value in values
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+def generate_latest(directory=None):
+    """Text exposition format (version 0.0.4) of every registered metric"""
+    samples = defaultdict(dict)
+    for key, value in collect(directory).items():
+        name, labels = json.loads(key)
+        samples[name][tuple(labels)] = value
+
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        if metric.type == 'counter':
+            for labels, value in sorted(samples[f'{metric.name}_total'].items()):
+                lines.append(f'{metric.name}_total{_format_labels(metric.labelnames, labels)} {_format_value(value)}')
+            continue
+
+        buckets = samples[f'{metric.name}_bucket']
+        for labels, count in sorted(samples[f'{metric.name}_count'].items()):
+            cumulative = 0
+            for bound in metric.buckets:
+                cumulative += buckets.get(labels + (bound,), 0)
+                bucket_labels = _format_labels(metric.labelnames + ('le',), labels + (_format_value(bound),))
+                lines.append(f'{metric.name}_bucket{bucket_labels} {_format_value(cumulative)}')
+            label_text = _format_labels(metric.labelnames, labels)
+            lines.append(f'{metric.name}_sum{label_text} {_format_value(samples[f"{metric.name}_sum"].get(labels, 0))}')
+            lines.append(f'{metric.name}_count{label_text} {_format_value(count)}')
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time spent handling requests, by URL name',
+    ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries run per request, by URL name',
+    ['view'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_QUERY_SECONDS = Counter('db_query_seconds', 'Time spent in SQL queries, by URL name', ['view'])
+CACHE_REQUESTS = Counter('cache_requests', 'Cache lookups by namespace and result (hit or miss)', ['namespace', 'result'])
+THROTTLED_REQUESTS = Counter('throttled_requests', 'Requests rejected by a throttle scope', ['scope'])
@@ -0,0 +1,169 @@
+import hashlib
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .caching import get_cache, is_shared
+from .imaging import DERIVATIVE_NAME_RE
+from .routers import replica_reads
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+PIN_COOKIE = 'primary_pin'
+PIN_COOKIE_SALT = 'Backend.middleware.ReplicaPinningMiddleware'
+
+
+class ReplicaPinningMiddleware:
+    """
+    Let safe requests read from replicas, except for clients that wrote
+    within the last REPLICA_PIN_SECONDS: they read their own writes from the
+    primary. Browsers are pinned with a short-lived signed cookie, token
+    clients through the cache keyed on their Authorization header. Only a
+    shared cache (CACHE_URL) can pin them for every worker; without one,
+    token clients always read from the primary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        writes = request.method not in SAFE_METHODS
+        with replica_reads(not writes and not self.is_pinned(request)):
+            response = self.get_response(request)
+
+        if writes:
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        # The context variable is copied into the threads sync code runs on
+        writes = request.method not in SAFE_METHODS
+        with replica_reads(not writes and not await self.ais_pinned(request)):
+            response = await self.get_response(request)
+
+        if writes:
+            await self.apin(request, response)
+        return response
+
+    def client_key(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if authorization:
+            return 'replica-pin:' + hashlib.sha256(authorization.encode()).hexdigest()
+        return None
+
+    def has_pin_cookie(self, request):
+        return request.get_signed_cookie(PIN_COOKIE, None, salt=PIN_COOKIE_SALT, max_age=self.pin_seconds) is not None
+
+    def is_pinned(self, request):
+        if self.has_pin_cookie(request):
+            return True
+        key = self.client_key(request)
+        if key is None:
+            return False
+        return not is_shared('default') or get_cache('default').get(key) is not None
+
+    async def ais_pinned(self, request):
+        if self.has_pin_cookie(request):
+            return True
+        key = self.client_key(request)
+        if key is None:
+            return False
+        return not is_shared('default') or await get_cache('default').aget(key) is not None
+
+    def pin(self, request, response):
+        self.pin_cookie(response)
+        key = self.client_key(request)
+        if key is not None and is_shared('default'):
+            get_cache('default').set(key, 1, self.pin_seconds)
+
+    async def apin(self, request, response):
+        self.pin_cookie(response)
+        key = self.client_key(request)
+        if key is not None and is_shared('default'):
+            await get_cache('default').aset(key, 1, self.pin_seconds)
+
+    def pin_cookie(self, response):
+        response.set_signed_cookie(
+            PIN_COOKIE, '1', salt=PIN_COOKIE_SALT, max_age=self.pin_seconds, httponly=True, samesite='Lax',
+        )
+
+
+async def file_chunks(file, block_size=64 * 1024):
+    while chunk := await sync_to_async(file.read)(block_size):
+        yield chunk
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, able to run in async mode so that it does not turn the ASGI
+    deployment's middleware stack synchronous. Files are looked up in its
+    in-memory index; opening and reading them happens on a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is None:
+            return await self.get_response(request)
+
+        response = await sync_to_async(self.serve)(static_file, request)
+        if response.file_to_stream is not None:
+            # Django would read a synchronous iterator into memory first
+            response.streaming_content = file_chunks(response.file_to_stream)
+        return response
+
+
+class MediaFilesMiddleware(StaticFilesMiddleware):
+    """
+    Serves MEDIA_ROOT at MEDIA_URL unless SERVE_MEDIA is off (when a CDN or
+    web server in front does it). Uploads appear at any time, so every
+    request is looked up on disk rather than in an index built at startup.
+
+    Responses carry Last-Modified and ETag and answer conditional and Range
+    requests. Under WSGI the file goes out through the server's
+    wsgi.file_wrapper (sendfile with gunicorn). Content-hashed derivative
+    images are cached as immutable, other uploads for MEDIA_MAX_AGE seconds.
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        if not getattr(settings, 'SERVE_MEDIA', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response, SimpleNamespace(
+            DEBUG=settings.DEBUG,
+            FORCE_SCRIPT_NAME=settings.FORCE_SCRIPT_NAME,
+            STATIC_URL=settings.MEDIA_URL,
+            STATIC_ROOT=settings.MEDIA_ROOT,
+            WHITENOISE_AUTOREFRESH=True,
+            WHITENOISE_USE_FINDERS=False,
+            WHITENOISE_MAX_AGE=getattr(settings, 'MEDIA_MAX_AGE', 86400),
+        ))
+
+    def immutable_file_test(self, path, url):
+        return bool(DERIVATIVE_NAME_RE.search(url))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:43
+
+import time
+
+from django.db import migrations, models
+
+# The namespaces of Product/signals.py and Blog/signals.py, seeded so
+# reading a version never has to insert it
+NAMESPACES = ['catalog', 'blog']
+
+
+def seed_versions(apps, schema_editor):
+    ContentVersion = apps.get_model('Backend', 'ContentVersion')
+    version = int(time.time() * 1000)
+    ContentVersion.objects.bulk_create(
+        [ContentVersion(namespace=namespace, version=version) for namespace in NAMESPACES],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(help_text="Millisecond timestamp of the namespace's last change")),
+            ],
+        ),
+        migrations.RunPython(seed_versions, migrations.RunPython.noop),
+    ]
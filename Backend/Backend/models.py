@@ -0,0 +1,10 @@
+from django.db import models
+
+
+class ContentVersion(models.Model):
+    """The version of a content namespace, when no shared cache holds it (see Backend/versioning.py)"""
+    namespace = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(help_text="Millisecond timestamp of the namespace's last change")
+
+    def __str__(self):
+        return f"{self.namespace}: {self.version}"
@@ -0,0 +1,110 @@
+"""
+On-demand cProfile profiles of individual requests.
+
+ProfilingMiddleware is off unless PROFILE_DIR is set. It then profiles:
+
+- a random PROFILE_SAMPLE_RATE fraction of requests, optionally only
+  those to the URL names in PROFILE_VIEWS, and
+- any request with an `X-Profile` header holding a token from
+  `manage.py profile_stats --token` (signed with SECRET_KEY, valid for
+  PROFILE_TOKEN_MAX_AGE seconds). The response then names the profile in
+  its own `X-Profile` header.
+
+The profile covers the view and response rendering, and is written to
+PROFILE_DIR/<url name>/<timestamp>-<duration>ms-<pid>-<n>.prof.
+`manage.py profile_stats` adds up stored profiles and prints the top
+functions.
+
+One request per process is profiled at a time: Python allows a single
+active profiler, so requests on other threads are not profiled meanwhile.
+A profile only sees the thread it started on, so profile the WSGI
+deployment: under ASGI the async views (Backend/async_views.py) run
+mostly on the event loop.
+"""
+import cProfile
+import itertools
+import os
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+PROFILE_HEADER = 'X-Profile'
+TOKEN_SALT = 'Backend.profiling'
+
+_profiling = threading.Lock()
+_sequence = itertools.count()
+
+
+def profile_token():
+    """A value for the X-Profile request header"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def valid_token(value):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(value, max_age=getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 3600))
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def view_directory(view_name):
+    """Directory-safe form of a URL name ('admin:index' -> 'admin_index')"""
+    return re.sub(r'[^\w.-]', '_', view_name or 'unmatched')
+
+
+class ProfilingMiddleware:
+    """Right inside RequestInstrumentationMiddleware, so profiles see what its timings see"""
+
+    def __init__(self, get_response):
+        self.directory = getattr(settings, 'PROFILE_DIR', '')
+        if not self.directory:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+        self.views = set(getattr(settings, 'PROFILE_VIEWS', ()))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        profiler = getattr(request, '_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _profiling.release()
+            name = self.save(profiler, request)
+            if request.headers.get(PROFILE_HEADER):
+                response[PROFILE_HEADER] = name
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        token = request.headers.get(PROFILE_HEADER)
+        if token:
+            if not valid_token(token):
+                return None
+        elif not self.sampled(request):
+            return None
+
+        if not _profiling.acquire(blocking=False):
+            return None
+        request._profile_started = time.perf_counter()
+        request._profiler = cProfile.Profile()
+        request._profiler.enable()
+        return None
+
+    def sampled(self, request):
+        if self.views and request.resolver_match.view_name not in self.views:
+            return False
+        return random.random() < self.sample_rate
+
+    def save(self, profiler, request):
+        duration_ms = (time.perf_counter() - request._profile_started) * 1000
+        directory = os.path.join(self.directory, view_directory(request.resolver_match.view_name))
+        os.makedirs(directory, exist_ok=True)
+        name = f'{time.strftime("%Y%m%dT%H%M%S")}-{duration_ms:.0f}ms-{os.getpid()}-{next(_sequence)}.prof'
+        profiler.dump_stats(os.path.join(directory, name))
+        return f'{view_directory(request.resolver_match.view_name)}/{name}'
@@ -0,0 +1,54 @@
+"""
+Faster JSON rendering for DRF.
+
+Uses orjson when it is installed and produces the same bytes as DRF's
+JSONRenderer: Decimal, datetime and other non-native values go through
+DRF's own encoder so their representation does not change. Anything orjson
+cannot handle falls back to the stdlib renderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None
+
+_drf_encoder = encoders.JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        # Let DRF's encoder format datetimes ('Z' suffix instead of +00:00)
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that serializes with orjson for compact, unicode output,
+    which is the default REST_FRAMEWORK configuration.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_drf_encoder.default, option=ORJSON_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict javascript subset guarantee as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,73 @@
+"""
+Read-replica routing.
+
+Reads of catalog, blog and review models go to a replica only while the
+current request allows it (see ReplicaPinningMiddleware). The replica is
+picked once per request, so its reads never mix two replicas that lag by
+different amounts. Everything else uses the primary: writes, the other
+apps, management commands and background tasks, which must not act on
+lagging data.
+
+A request whose replica is behind the content versions it looks up moves
+to the primary (see Backend/versioning.py).
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+
+REPLICA_APP_LABELS = {'Product', 'Blog', 'Review'}
+
+# The replica picked for the current request; None reads from the primary
+_replica = ContextVar('replica', default=None)
+
+
+@lru_cache(maxsize=None)
+def replica_aliases():
+    return tuple(alias for alias in settings.DATABASES if alias.startswith('replica'))
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Read from one replica, picked at random, for the duration of the block (or forbid it)"""
+    replicas = replica_aliases() if enabled else ()
+    token = _replica.set(random.choice(replicas) if replicas else None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def current_replica():
+    """Alias of the replica the current request reads from, or None"""
+    return _replica.get()
+
+
+def read_from_primary():
+    """Send the rest of the current request's reads to the primary"""
+    _replica.set(None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Related objects are read from wherever their parent came from
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        if model._meta.app_label in REPLICA_APP_LABELS:
+            return _replica.get() or 'default'
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema from the primary
+        return db == 'default'
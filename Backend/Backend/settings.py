@@ -12,7 +12,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
+
+from .caching import cache_settings, session_engine
+from .database import database_config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +41,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # runserver leaves static files to StaticFilesMiddleware too
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'django.contrib.sites',
     
@@ -52,6 +58,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt.token_blacklist',
     
     # Local apps
+    'Backend',
     'FEcore',
     'Order',
     'UserAuth',
@@ -60,11 +67,19 @@ INSTALLED_APPS = [
     'Product',
     'Review',
     'Coupon',
+    'TaskQueue',
 ]
 
 MIDDLEWARE = [
+    'Backend.instrumentation.RequestInstrumentationMiddleware',
+    'Backend.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'Backend.middleware.StaticFilesMiddleware',
+    'Backend.middleware.MediaFilesMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'Backend.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -76,6 +91,46 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'Backend.urls'
 
+# Request instrumentation (Backend/instrumentation.py). Server-Timing
+# reveals query counts, so production only sends it when asked to.
+REQUEST_SERVER_TIMING = config('REQUEST_SERVER_TIMING', default=DEBUG, cast=bool)
+REQUEST_QUERY_BUDGET = config('REQUEST_QUERY_BUDGET', default=50, cast=int)
+
+# Multiprocess metrics served at /metrics (Backend/metrics.py). Every
+# server process writes a file to METRICS_DIR, which must be emptied
+# before the server starts. Scrapers send METRICS_TOKEN as a bearer token;
+# without one, /metrics is only served while DEBUG is on.
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Tests record metrics in a temporary METRICS_DIR
+TEST_RUNNER = 'Backend.testing.TestRunner'
+
+# On-demand cProfile profiles (Backend/profiling.py); off unless PROFILE_DIR
+# is set. PROFILE_VIEWS limits sampling to some URL names, e.g.
+# PROFILE_VIEWS=cart_summary,product-list
+PROFILE_DIR = config('PROFILE_DIR', default='')
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+PROFILE_VIEWS = config('PROFILE_VIEWS', default='', cast=Csv())
+PROFILE_TOKEN_MAX_AGE = config('PROFILE_TOKEN_MAX_AGE', default=3600, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Requests over their query budget; REQUEST_LOG_LEVEL=INFO logs a
+        # JSON line for every request
+        'Backend.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -96,17 +151,57 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Backend.wsgi.application'
 
+# Async versions of the read-heavy list views and the cart summary
+# (Backend/async_views.py), for the ASGI deployment: SERVER_MODE=asgi in
+# scripts/prod.sh turns this on
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DATABASE_URL selects PostgreSQL in production; SQLite (tuned for
+# concurrent gunicorn threads) is used when it is unset
+
+DATABASE_OPTIONS = {
+    'default_sqlite_path': BASE_DIR / 'db.sqlite3',
+    'conn_max_age': config('DB_CONN_MAX_AGE', default=600, cast=int),
+    'pool': config('DB_POOL', default=False, cast=bool),
+    'pool_min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+    'pool_max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+    'pool_timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+}
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(config('DATABASE_URL', default=''), **DATABASE_OPTIONS),
 }
 
+# Read replicas as comma-separated database URLs, exposed as replica1,
+# replica2, ... For a local stand-in point one at a second SQLite file,
+# e.g. sqlite:///db.replica.sqlite3, and refresh it with sync_sqlite_replicas
+for index, replica_url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica{index}'] = {
+        **database_config(replica_url, **DATABASE_OPTIONS),
+        # Tests read replica aliases through the test primary
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['Backend.routers.ReplicaRouter']
+
+# Seconds a client reads from the primary after writing
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=10, cast=int)
+
+
+# Caches
+# One cache per subsystem (see Backend/caching.py). Set CACHE_URL to a
+# redis:// URL to share them between processes; local memory otherwise
+
+CACHE_URL = config('CACHE_URL', default='')
+CACHES = cache_settings(CACHE_URL)
+
+SESSION_ENGINE = session_engine(CACHE_URL)
+SESSION_CACHE_ALIAS = 'sessions'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -158,9 +253,26 @@ STATICFILES_DIRS = [
 # 👇 where files will be collected when you run collectstatic (for production)
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# collectstatic writes content-hashed copies ({% static %} links to them,
+# so they are cached for a year as immutable) plus .gz and .br versions.
+# StaticFilesMiddleware (WhiteNoise) serves them from the app process,
+# choosing the compressed copy the client accepts.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'Backend.storage.StaticFilesStorage',
+    },
+}
+
 # Media files (user uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Served by MediaFilesMiddleware; turn off when something in front serves them
+SERVE_MEDIA = config('SERVE_MEDIA', default=True, cast=bool)
+# Cache lifetime of uploads; content-hashed image derivatives are immutable
+MEDIA_MAX_AGE = config('MEDIA_MAX_AGE', default=86400, cast=int)
 
 # Django Allauth Configuration
 SITE_ID = config('SITE_ID', default=1, cast=int)
@@ -210,8 +322,10 @@ os.environ['GOOGLE_OAUTH2_CLIENT_SECRET'] = GOOGLE_OAUTH2_CLIENT_SECRET
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
+    # Token users (and guests) are built from the verified claims without a
+    # query; views that need the full User model opt in to CachedJWTAuthentication
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'Backend.custom_auth.GuestJWTAuthentication',
         'Backend.custom_auth.CsrfExemptSessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -224,10 +338,32 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # orjson-backed when installed, identical output to DRF's JSONRenderer
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'Backend.renderers.FastJSONRenderer',
+    ] + ([
         'rest_framework.renderers.BrowsableAPIRenderer',
+    ] if DEBUG else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'Backend.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
+    # Views opt in with `throttle_scope`; see Backend/throttling.py
+    'DEFAULT_THROTTLE_CLASSES': [
+        'Backend.throttling.ScopedIPThrottle',
+        'Backend.throttling.ScopedUserThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'search.ip': '60/min',
+        'guest_tokens.ip': '10/min',
+        'cart.ip': '240/min',
+        'cart.user': '120/min',
+        'coupon_apply.user': '10/min',
+    },
+    # Proxies in front of the app; 0 trusts REMOTE_ADDR only, so clients
+    # cannot pick their own throttle identity through X-Forwarded-For
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # CSRF Configuration for API endpoints
@@ -246,7 +382,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -299,4 +435,18 @@ CORS_ALLOW_METHODS = [
     'PATCH',
     'POST',
     'PUT',
-]
\ No newline at end of file
+]
+# Background task queue (TaskQueue app, run with `manage.py run_task_worker`)
+# Eager mode runs tasks inline at enqueue time, e.g. when no worker is running
+TASK_QUEUE_EAGER = config('TASK_QUEUE_EAGER', default=False, cast=bool)
+
+TASK_QUEUE_SCHEDULE = {
+    'update-best-sellers': {'task': 'Product.tasks.update_best_sellers', 'interval': 60 * 60},
+    'build-related-products': {'task': 'Product.tasks.build_related_products', 'interval': 24 * 60 * 60},
+    'purge-old-tasks': {'task': 'TaskQueue.tasks.purge_old_tasks', 'interval': 24 * 60 * 60},
+}
+
+# Product.rating and total_reviews are set in the admin. When on, each review
+# change recomputes them from the reviews instead, overwriting the admin
+# values; run `manage.py recompute_product_ratings` once to backfill the rest
+PRODUCT_RATINGS_FROM_REVIEWS = config('PRODUCT_RATINGS_FROM_REVIEWS', default=False, cast=bool)
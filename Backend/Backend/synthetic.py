@@ -0,0 +1,244 @@
+"""
+Synthetic data at production volumes, for load tests.
+
+generate() bulk-creates categories, products with images, users with
+profiles, carts, coupons, orders, reviews, blog posts and comments. Every
+choice comes from one random.Random(seed), so the same seed and counts
+always build the same dataset. Generated rows are marked (usernames start
+with `synthetic-`, coupon codes with `SYNTH`, ...) so flush() removes them
+without touching real data; it refuses while real orders, carts or reviews
+still reference synthetic products.
+
+All users share SYNTHETIC_PASSWORD (hashed once), which is what
+scripts/loadtest.py logs in with, so generate() only runs with DEBUG on.
+"""
+import random
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from Blog.models import BlogComment, BlogImage, BlogPost
+from Blog.signals import BLOG_NAMESPACE
+from Cart.models import Cart, CartItem
+from Coupon.models import Coupon
+from Order.models import Order, OrderItem
+from Product.models import Category, Product, ProductImage
+from Product.signals import CATALOG_NAMESPACE
+from Review.models import Review
+from UserAuth.models import UserProfile
+
+from .versioning import bump_version
+
+SYNTHETIC_PASSWORD = 'synthetic-password'
+USERNAME_PREFIX = 'synthetic-'
+COUPON_PREFIX = 'SYNTH'
+SLUG_PREFIX = 'synthetic-'
+CATEGORY_MARKER = '[synthetic]'
+
+DEFAULT_COUNTS = {
+    'categories': 20,
+    'products': 5000,
+    'images': 3,
+    'users': 500,
+    'cart_lines': 8,
+    'coupons': 50,
+    'orders': 4,
+    'reviews': 20000,
+    'posts': 200,
+    'comments': 25,
+}
+
+ADJECTIVES = ['Hydrating', 'Brightening', 'Gentle', 'Soothing', 'Renewing', 'Nourishing', 'Clarifying', 'Firming', 'Daily', 'Overnight']
+INGREDIENTS = ['Vitamin C', 'Hyaluronic', 'Retinol', 'Niacinamide', 'Green Tea', 'Rose', 'Aloe', 'Ceramide', 'Peptide', 'Charcoal']
+PRODUCT_TYPES = ['Serum', 'Cleanser', 'Toner', 'Moisturizer', 'Face Mask', 'Eye Cream', 'Sunscreen', 'Lip Balm', 'Body Lotion', 'Exfoliator']
+BLOG_CATEGORIES = ['Tips', 'Routines', 'Reviews', 'Ingredients', 'News']
+TAGS = ['skin', 'glow', 'acne', 'dry', 'oily', 'spf', 'natural', 'vegan', 'anti-aging', 'sensitive']
+WORDS = (
+    'skin care routine product texture scent result week morning evening layer apply gentle bright '
+    'hydrate glow barrier sensitive daily favourite recommend bottle results noticed'
+).split()
+
+
+class SyntheticDataError(Exception):
+    pass
+
+
+def sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def paragraph(rng, sentences=5):
+    return ' '.join(sentence(rng, rng.randint(8, 16)) for _ in range(sentences))
+
+
+def real_references():
+    """{description: count} of rows outside the synthetic data that reference synthetic products"""
+    synthetic = {'product__category__description__startswith': CATEGORY_MARKER}
+    references = {
+        'order lines': OrderItem.objects.filter(**synthetic).exclude(order__user__username__startswith=USERNAME_PREFIX),
+        # Guest carts have no user and are real
+        'cart lines': CartItem.objects.filter(**synthetic).exclude(cart__user__username__startswith=USERNAME_PREFIX),
+        'reviews': Review.objects.filter(**synthetic).exclude(user__username__startswith=USERNAME_PREFIX),
+    }
+    counts = {name: queryset.count() for name, queryset in references.items()}
+    return {name: count for name, count in counts.items() if count}
+
+
+def flush():
+    """
+    Delete everything generate() created; returns the number of rows deleted.
+    Raises SyntheticDataError, deleting nothing, if real orders, carts or
+    reviews include synthetic products, as those would be deleted with them.
+    """
+    # Users own their carts, orders, reviews, coupon usages, posts and comments
+    deleted = 0
+    with transaction.atomic():
+        references = real_references()
+        if references:
+            found = ', '.join(f'{count} {name}' for name, count in references.items())
+            raise SyntheticDataError(f'Real data references synthetic products ({found}); delete or reassign it first')
+        for queryset in [
+            User.objects.filter(username__startswith=USERNAME_PREFIX),
+            BlogPost.objects.filter(slug__startswith=SLUG_PREFIX),
+            Coupon.objects.filter(code__startswith=COUPON_PREFIX),
+            # Products, their images and everything that references them
+            Category.objects.filter(description__startswith=CATEGORY_MARKER),
+        ]:
+            deleted += queryset.delete()[0]
+    bump_version(CATALOG_NAMESPACE)
+    bump_version(BLOG_NAMESPACE)
+    return deleted
+
+
+def generate(seed=1, batch_size=1000, log=None, **counts):
+    """
+    Build a dataset; `counts` override DEFAULT_COUNTS. Returns {model name: rows created}.
+    `images` is per product, `cart_lines` per cart, and `orders` and
+    `comments` are averages per user and per post; the rest are totals.
+    """
+    if not settings.DEBUG:
+        raise SyntheticDataError(f'Synthetic users all log in with "{SYNTHETIC_PASSWORD}"; generate them only with DEBUG on')
+
+    counts = {**DEFAULT_COUNTS, **counts}
+    rng = random.Random(seed)
+    created = {}
+
+    def bulk(model, rows):
+        rows = model.objects.bulk_create(rows, batch_size=batch_size)
+        created[model.__name__] = created.get(model.__name__, 0) + len(rows)
+        if log:
+            log(f'{model.__name__}: {len(rows)}')
+        return rows
+
+    with transaction.atomic():
+        categories = bulk(Category, [
+            Category(name=f'{rng.choice(ADJECTIVES)} {PRODUCT_TYPES[index % len(PRODUCT_TYPES)]}s',
+                     description=f'{CATEGORY_MARKER} {sentence(rng)}')
+            for index in range(counts['categories'])
+        ])
+        products = bulk(Product, [generate_product(rng, categories) for _ in range(counts['products'])])
+        bulk(ProductImage, [
+            ProductImage(product=product, image=f'products/images/synthetic/{product.pk}_{order}.jpg',
+                         alt_text=product.name, order=order)
+            for product in products
+            for order in range(counts['images'])
+        ])
+
+        password = make_password(SYNTHETIC_PASSWORD)
+        users = bulk(User, [
+            User(username=f'{USERNAME_PREFIX}{index:05d}', email=f'{USERNAME_PREFIX}{index:05d}@example.com',
+                 first_name=rng.choice(['Ayesha', 'Bilal', 'Sara', 'Omar', 'Hina', 'Ali', 'Zara', 'Usman']),
+                 password=password)
+            for index in range(counts['users'])
+        ])
+        bulk(UserProfile, [
+            UserProfile(user=user, phone=f'0300 {rng.randint(1000000, 9999999)}', address=f'{rng.randint(1, 999)} Synthetic Street')
+            for user in users
+        ])
+
+        # Half the users have a cart in progress
+        carts = bulk(Cart, [Cart(user=user) for user in users[::2]])
+        bulk(CartItem, [
+            CartItem(cart=cart, product=product, quantity=rng.randint(1, 3))
+            for cart in carts
+            for product in rng.sample(products, min(counts['cart_lines'], len(products)))
+        ])
+
+        # Unlimited uses, so load tests can apply and remove them over and over
+        bulk(Coupon, [
+            Coupon(code=f'{COUPON_PREFIX}{index:04d}', description=sentence(rng, 6),
+                   discount_type='percentage' if index % 4 else 'fixed',
+                   discount_value=Decimal(rng.choice([5, 10, 15, 20])), total_count=10 ** 9)
+            for index in range(counts['coupons'])
+        ])
+
+        # Lines are drawn first so each order is created with its total
+        baskets = [
+            (user, rng.choice(['pending', 'shipped', 'delivered']),
+             [(product, rng.randint(1, 3)) for product in rng.sample(products, min(rng.randint(1, 5), len(products)))])
+            for user in users
+            for _ in range(rng.randint(0, 2 * counts['orders']))
+        ]
+        orders = bulk(Order, [
+            Order(user=user, status=status, total_amount=sum((product.price * quantity for product, quantity in lines), Decimal('0')))
+            for user, status, lines in baskets
+        ])
+        bulk(OrderItem, [
+            OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+            for order, (_, _, lines) in zip(orders, baskets)
+            for product, quantity in lines
+        ])
+
+        if users and products:
+            bulk(Review, [
+                Review(user=rng.choice(users), product=rng.choice(products), rating=rng.randint(1, 5), comment=sentence(rng))
+                for _ in range(counts['reviews'])
+            ])
+
+        posts = bulk(BlogPost, [
+            BlogPost(title=f'{rng.choice(ADJECTIVES)} {rng.choice(INGREDIENTS)} {rng.choice(["Guide", "Routine", "Review", "Tips"])}',
+                     slug=f'{SLUG_PREFIX}{index:05d}', content=paragraph(rng, 8), author=rng.choice(users),
+                     category=rng.choice(BLOG_CATEGORIES), tags=','.join(rng.sample(TAGS, 3)),
+                     is_new=index % 10 == 0, number_of_views=rng.randint(0, 5000), number_of_likes=rng.randint(0, 500),
+                     number_of_comments=rng.randint(0, 2 * counts['comments']))
+            for index in range(counts['posts'] if users else 0)
+        ])
+        bulk(BlogImage, [
+            BlogImage(blog=post, image=f'blog_images/synthetic/{post.pk}_{order}.jpg', alt_text=post.title, order=order)
+            for post in posts
+            for order in range(2)
+        ])
+        # Every other comment is left anonymously
+        bulk(BlogComment, [
+            BlogComment(blog=post, user=rng.choice(users), comment=sentence(rng))
+            if index % 2 else
+            BlogComment(blog=post, author_name='Synthetic Reader', author_email='reader@example.com', comment=sentence(rng))
+            for post in posts
+            for index in range(post.number_of_comments)
+        ])
+
+    # bulk_create() skips the signals that invalidate cached catalog and blog data
+    bump_version(CATALOG_NAMESPACE)
+    bump_version(BLOG_NAMESPACE)
+    return created
+
+
+def generate_product(rng, categories):
+    price = Decimal(rng.randint(500, 15000)) / 100
+    on_sale = rng.random() < 0.2
+    return Product(
+        name=f'{rng.choice(ADJECTIVES)} {rng.choice(INGREDIENTS)} {rng.choice(PRODUCT_TYPES)}',
+        description=paragraph(rng),
+        price=price,
+        quantity=rng.randint(0, 500),
+        category=rng.choice(categories),
+        is_featured=rng.random() < 0.1,
+        is_on_sale=on_sale,
+        percentage_discount=Decimal(rng.choice([10, 15, 20, 25, 30])) if on_sale else Decimal('0'),
+        is_new=rng.random() < 0.15,
+        rating=Decimal(rng.randint(250, 500)) / 100,
+        total_reviews=rng.randint(0, 400),
+    )
@@ -0,0 +1,233 @@
+"""
+Fixtures and assertions for the per-app query budget tests.
+
+The seed_* helpers bulk-create realistic volumes (thousands of products,
+carts and posts with many lines) so that any per-row query shows up as a
+blown budget. PerformanceTestCase.assertBudget() runs one request and
+fails when it needs more SQL queries, or more time, than allowed;
+assertStreamBudget() does the same for streamed responses.
+assertAsyncMatches() checks an async view (Backend/async_views.py) against
+the DRF view it replaces.
+Time budgets are scaled by the PERF_TIME_SCALE environment variable for
+slow CI machines.
+
+TestRunner (settings.TEST_RUNNER) gives each run a METRICS_DIR of its own.
+"""
+import os
+import shutil
+import tempfile
+import time
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from Blog.models import BlogComment, BlogImage, BlogPost
+from Cart.models import Cart, CartItem
+from Coupon.models import Coupon, CouponUsage
+from Order.models import Order, OrderItem
+from Product.models import Category, Product, ProductImage
+from Review.models import Review
+from UserAuth.guests import guest_tokens
+from UserAuth.models import UserProfile
+
+TIME_SCALE = float(os.environ.get('PERF_TIME_SCALE', '1'))
+
+PASSWORD = 'perf-test-password'
+
+
+class TestRunner(DiscoverRunner):
+    """Records the metrics of test requests in a temporary directory, not in a server's"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.metrics_dir = tempfile.mkdtemp(prefix='metrics-')
+        settings.METRICS_DIR = self.metrics_dir
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+
+
+def create_user(username='shopper', **fields):
+    user = User.objects.create_user(username=username, email=f'{username}@example.com', password=PASSWORD, **fields)
+    UserProfile.objects.create(user=user, phone='0300 0000000', address='1 Test Street')
+    return user
+
+
+def bearer(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+def guest_bearer(guest_id):
+    _, access_token = guest_tokens(guest_id)
+    return {'HTTP_AUTHORIZATION': f'Bearer {access_token}'}
+
+
+def seed_catalog(products=2000, categories=12, images_per_product=3):
+    category_rows = Category.objects.bulk_create([
+        Category(name=f'Category {index}', description=f'Everything in category {index}')
+        for index in range(categories)
+    ])
+    product_rows = Product.objects.bulk_create([
+        Product(
+            name=f'Product {index}',
+            description='A realistic product description. ' * 5,
+            price=Decimal('10.00') + index % 90,
+            quantity=100,
+            category=category_rows[index % categories],
+            is_featured=index % 7 == 0,
+            is_on_sale=index % 5 == 0,
+            percentage_discount=Decimal('15') if index % 5 == 0 else 0,
+            is_new=index % 3 == 0,
+            rating=Decimal('4.20'),
+        )
+        for index in range(products)
+    ], batch_size=500)
+    ProductImage.objects.bulk_create([
+        ProductImage(product=product, image=f'products/images/{product.pk}_{order}.jpg', alt_text=product.name, order=order)
+        for product in product_rows
+        for order in range(1, images_per_product + 1)
+    ], batch_size=1000)
+    return product_rows
+
+
+def seed_cart(products, lines=50, user=None, guest_id=None):
+    cart = Cart.objects.create(user=user, guest_id=guest_id)
+    CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=2) for product in products[:lines]])
+    return cart
+
+
+def seed_orders(user, products, orders=20, items_per_order=5):
+    order_rows = Order.objects.bulk_create([
+        Order(user=user, total_amount=Decimal('100.00'), status='delivered') for _ in range(orders)
+    ])
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=products[(index * items_per_order + offset) % len(products)], quantity=1, price=Decimal('20.00'))
+        for index, order in enumerate(order_rows)
+        for offset in range(items_per_order)
+    ])
+    return order_rows
+
+
+def seed_reviews(user, products, count=40):
+    return Review.objects.bulk_create([
+        Review(user=user, product=product, rating=4, comment='Works well') for product in products[:count]
+    ])
+
+
+def seed_coupons(count=20, user=None, used=5):
+    coupons = Coupon.objects.bulk_create([
+        Coupon(code=f'SAVE{index}', discount_type='percentage', discount_value=Decimal('10'), total_count=1000)
+        for index in range(count)
+    ])
+    if user is not None:
+        CouponUsage.objects.bulk_create([CouponUsage(user=user, coupon=coupon) for coupon in coupons[:used]])
+    return coupons
+
+
+def seed_blog(author, posts=40, comments_per_post=50, images_per_post=2):
+    post_rows = BlogPost.objects.bulk_create([
+        BlogPost(
+            title=f'Post {index}', slug=f'post-{index}', content='Skincare advice. ' * 40, author=author,
+            category=['Tips', 'Routines', 'Reviews'][index % 3], tags='skin,glow',
+        )
+        for index in range(posts)
+    ])
+    BlogImage.objects.bulk_create([
+        BlogImage(blog=post, image=f'blog_images/{post.pk}_{order}.jpg', order=order)
+        for post in post_rows
+        for order in range(images_per_post)
+    ])
+    commenters = [create_user(f'reader{index}') for index in range(5)]
+    BlogComment.objects.bulk_create([
+        BlogComment(blog=post, user=commenters[index % len(commenters)], comment=f'Comment {index}')
+        if index % 2 else
+        BlogComment(blog=post, author_name='Anonymous Reader', author_email='reader@example.com', comment=f'Comment {index}')
+        for post in post_rows
+        for index in range(comments_per_post)
+    ], batch_size=1000)
+    return post_rows
+
+
+# Tests do not run collectstatic, so there is no manifest of hashed names
+@override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class PerformanceTestCase(TestCase):
+    """Query and time budgets for requests against seeded data"""
+
+    default_time_budget_ms = 500
+
+    def setUp(self):
+        # Every request starts cold: no cached facets, versions, users or throttle counts
+        for alias in caches:
+            caches[alias].clear()
+        self.api = APIClient()
+
+    def assertBudget(self, method, path, queries, data=None, status=200, ms=None, **extra):
+        """Issue one request and check its status, query count and duration"""
+        ms = (ms or self.default_time_budget_ms) * TIME_SCALE
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = getattr(self.api, method)(path, data, format='json', **extra)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.assertEqual(response.status_code, status, f'{method.upper()} {path}: {getattr(response, "content", b"")[:500]}')
+        self.assertLessEqual(
+            len(captured), queries,
+            f'{method.upper()} {path} ran {len(captured)} queries, budget {queries}:\n'
+            + '\n'.join(query['sql'] for query in captured.captured_queries),
+        )
+        self.assertLessEqual(elapsed_ms, ms, f'{method.upper()} {path} took {elapsed_ms:.0f}ms, budget {ms:.0f}ms')
+        return response
+
+    def assertStreamBudget(self, path, queries, ms=None, **extra):
+        """assertBudget() for a streamed GET, counting the queries made while its content is read"""
+        ms = (ms or self.default_time_budget_ms) * TIME_SCALE
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = self.api.get(path, **extra)
+            self.assertEqual(response.status_code, 200, f'GET {path}: {getattr(response, "content", b"")[:500]}')
+            content = b''.join(response.streaming_content)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.assertLessEqual(
+            len(captured), queries,
+            f'GET {path} ran {len(captured)} queries, budget {queries}:\n'
+            + '\n'.join(query['sql'] for query in captured.captured_queries),
+        )
+        self.assertLessEqual(elapsed_ms, ms, f'GET {path} took {elapsed_ms:.0f}ms, budget {ms:.0f}ms')
+        return response, content
+
+    def assertAsyncMatches(self, view_class, path, status=200, **extra):
+        """
+        GET `path` from the DRF view and from `view_class`, and check both
+        give the same status and body, the async view in no more queries
+        """
+        with CaptureQueriesContext(connection) as sync_queries:
+            expected = self.api.get(path, **extra)
+
+        # Called directly: the URLconf only routes async views with ASYNC_VIEWS on
+        request = RequestFactory().get(path, **extra)
+        kwargs = resolve(urlsplit(path).path).kwargs
+        with CaptureQueriesContext(connection) as async_queries:
+            response = async_to_sync(view_class.as_view())(request, **kwargs)
+            response.render()
+
+        self.assertEqual(expected.status_code, status, f'GET {path}: {expected.content[:500]}')
+        self.assertEqual(response.status_code, status, f'async GET {path}: {response.content[:500]}')
+        self.assertEqual(response.content, expected.content)
+        self.assertLessEqual(len(async_queries), len(sync_queries), f'async GET {path}')
+        return response
@@ -0,0 +1,505 @@
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from Cart.models import Cart, CartItem
+from Order.models import Order, OrderItem
+from Product.models import Category, Product
+from Review.models import Review
+from Product.signals import CATALOG_NAMESPACE
+from Product.views import ProductFacetsView
+from .caching import session_engine
+from .custom_auth import GuestUser
+from .metrics import Counter, Histogram, MmapedValues, collect, generate_latest
+from .middleware import PIN_COOKIE, ReplicaPinningMiddleware
+from .models import ContentVersion
+from .routers import ReplicaRouter, current_replica, replica_reads
+from .synthetic import SyntheticDataError, flush, generate
+from .throttling import ScopedIPThrottle, ScopedUserThrottle, rejection_counts
+from .testing import create_user, seed_catalog
+from .versioning import bump_version, get_version
+
+
+class SessionTests(TestCase):
+
+    def setUp(self):
+        caches['sessions'].clear()
+
+    def test_cache_backed_only_with_a_shared_cache(self):
+        self.assertEqual(session_engine(''), 'django.contrib.sessions.backends.db')
+        self.assertEqual(session_engine('redis://cache:6379/0'), 'django.contrib.sessions.backends.cached_db')
+
+    def assertFlushed(self, engine):
+        store_class = import_module(engine).SessionStore
+        session = store_class()
+        session['user'] = 1
+        session.save()
+        key = session.session_key
+
+        session.flush()
+        self.assertFalse(store_class().exists(key))
+        self.assertEqual(store_class(key).load(), {})
+        return key
+
+    def test_flushed_session_is_gone(self):
+        self.assertFlushed(settings.SESSION_ENGINE)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_flushed_cached_session_is_gone(self):
+        key = self.assertFlushed(settings.SESSION_ENGINE)
+        self.assertIsNone(caches['sessions'].get(import_module(settings.SESSION_ENGINE).KEY_PREFIX + key))
+
+
+class ContentVersionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(products=3, categories=1, images_per_product=0)
+
+    def setUp(self):
+        caches['catalog'].clear()
+
+    def assertRevalidated(self, path, bump):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        bump()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_write_changes_the_etag(self):
+        self.assertRevalidated('/product/products/', lambda: Category.objects.create(name='New'))
+
+    def test_bump_from_another_process_changes_the_etag(self):
+        # What a bump by another worker or the task worker leaves behind
+        self.assertRevalidated(
+            '/product/facets/',
+            lambda: ContentVersion.objects.filter(namespace=CATALOG_NAMESPACE).update(version=get_version(CATALOG_NAMESPACE) + 1),
+        )
+
+    def test_version_always_moves_forward(self):
+        versions = [get_version(CATALOG_NAMESPACE)]
+        for _ in range(3):
+            bump_version(CATALOG_NAMESPACE)
+            versions.append(get_version(CATALOG_NAMESPACE))
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_shared_cache_holds_versions_without_expiry(self):
+        with mock.patch('Backend.versioning.is_shared', return_value=True):
+            version = get_version(CATALOG_NAMESPACE)
+            bump_version(CATALOG_NAMESPACE)
+            with self.assertNumQueries(0):
+                bumped = get_version(CATALOG_NAMESPACE)
+        self.assertGreater(bumped, version)
+        self.assertIsNone(caches['catalog']._expire_info[caches['catalog'].make_key('version:catalog')])
+        # The row follows, for replicas to be checked against
+        self.assertEqual(ContentVersion.objects.get(namespace=CATALOG_NAMESPACE).version, bumped)
+
+    # The test database stands in for the replica
+    @mock.patch('Backend.routers.replica_aliases', return_value=('default',))
+    def test_replica_is_kept_once_caught_up(self, replica_aliases):
+        with replica_reads():
+            get_version(CATALOG_NAMESPACE)
+            self.assertEqual(current_replica(), 'default')
+
+    @mock.patch('Backend.routers.replica_aliases', return_value=('default',))
+    @mock.patch('Backend.versioning.is_shared', return_value=True)
+    def test_lagging_replica_is_left_for_the_primary(self, is_shared, replica_aliases):
+        # A bump the replica has not received yet
+        caches['catalog'].set('version:catalog', get_version(CATALOG_NAMESPACE) + 1, None)
+        with replica_reads():
+            get_version(CATALOG_NAMESPACE)
+            self.assertIsNone(current_replica())
+            self.assertEqual(ReplicaRouter().db_for_read(Product), 'default')
+
+
+@mock.patch('Backend.routers.replica_aliases', return_value=('replica1', 'replica2', 'replica3'))
+class ReplicaRoutingTests(SimpleTestCase):
+
+    router = ReplicaRouter()
+
+    def read_alias(self, model=Product):
+        return self.router.db_for_read(model)
+
+    def test_one_replica_per_request(self, replica_aliases):
+        picked = set()
+        for _ in range(30):
+            with replica_reads():
+                alias = self.read_alias()
+                self.assertEqual({self.read_alias() for _ in range(20)}, {alias})
+            picked.add(alias)
+        self.assertEqual(picked, {'replica1', 'replica2', 'replica3'})
+
+    def test_primary_outside_replica_reads(self, replica_aliases):
+        self.assertEqual(self.read_alias(), 'default')
+        with replica_reads():
+            self.assertEqual(self.read_alias(User), 'default')
+            with replica_reads(False):
+                self.assertEqual(self.read_alias(), 'default')
+            self.assertNotEqual(self.read_alias(), 'default')
+            self.assertEqual(self.router.db_for_write(Product), 'default')
+
+    def test_related_reads_follow_their_instance(self, replica_aliases):
+        instance = Product()
+        instance._state.db = 'replica2'
+        with replica_reads(False):
+            self.assertEqual(self.router.db_for_read(Category, instance=instance), 'replica2')
+
+    def test_primary_without_replicas(self, replica_aliases):
+        replica_aliases.return_value = ()
+        with replica_reads():
+            self.assertEqual(self.read_alias(), 'default')
+
+
+@mock.patch('Backend.routers.replica_aliases', return_value=('replica1',))
+class ReplicaPinningTests(SimpleTestCase):
+
+    factory = RequestFactory()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.middleware = ReplicaPinningMiddleware(lambda request: HttpResponse(ReplicaRouter().db_for_read(Product)))
+
+    def request(self, method='get', cookie=None, **extra):
+        request = getattr(self.factory, method)('/product/products/', **extra)
+        if cookie is not None:
+            request.COOKIES[PIN_COOKIE] = cookie
+        return self.middleware(request)
+
+    def test_browser_reads_its_writes_from_the_primary(self, replica_aliases):
+        self.assertEqual(self.request().content, b'replica1')
+
+        response = self.request('post')
+        self.assertEqual(response.content, b'default')
+        cookie = response.cookies[PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertEqual(self.request(cookie=cookie.value).content, b'default')
+
+    def test_forged_or_expired_pin_cookie_is_ignored(self, replica_aliases):
+        self.assertEqual(self.request(cookie='1').content, b'replica1')
+
+        cookie = self.request('post').cookies[PIN_COOKIE].value
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + settings.REPLICA_PIN_SECONDS + 1):
+            self.assertEqual(self.request(cookie=cookie).content, b'replica1')
+
+    def test_token_clients_stay_on_the_primary_without_a_shared_cache(self, replica_aliases):
+        self.assertEqual(self.request(HTTP_AUTHORIZATION='Bearer one').content, b'default')
+        self.assertEqual(self.request().content, b'replica1')
+
+    @mock.patch('Backend.middleware.is_shared', return_value=True)
+    def test_token_clients_are_pinned_through_a_shared_cache(self, is_shared, replica_aliases):
+        self.assertEqual(self.request(HTTP_AUTHORIZATION='Bearer one').content, b'replica1')
+        self.request('post', HTTP_AUTHORIZATION='Bearer one')
+        self.assertEqual(self.request(HTTP_AUTHORIZATION='Bearer one').content, b'default')
+        self.assertEqual(self.request(HTTP_AUTHORIZATION='Bearer two').content, b'replica1')
+
+    @mock.patch('Backend.middleware.is_shared', return_value=True)
+    def test_async(self, is_shared, replica_aliases):
+        async def get_response(request):
+            return HttpResponse(ReplicaRouter().db_for_read(Product))
+        self.middleware = ReplicaPinningMiddleware(get_response)
+
+        @async_to_sync
+        async def request(*args, **kwargs):
+            return await self.request(*args, **kwargs)
+
+        self.assertEqual(request().content, b'replica1')
+        cookie = request('post', HTTP_AUTHORIZATION='Bearer one').cookies[PIN_COOKIE].value
+        self.assertEqual(request(cookie=cookie).content, b'default')
+        self.assertEqual(request(HTTP_AUTHORIZATION='Bearer one').content, b'default')
+
+
+class ThrottlingTests(SimpleTestCase):
+
+    factory = RequestFactory()
+    # Half a minute into a window
+    start = 1_000_000 * 60 + 30
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+        clock = mock.patch('Backend.throttling.time.time', return_value=self.start)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+        logger = mock.patch('Backend.throttling.logger')
+        self.logger = logger.start()
+        self.addCleanup(logger.stop)
+
+    def allow(self, throttle_class, scope, ip='10.0.0.1', user=None):
+        request = self.factory.get('/', REMOTE_ADDR=ip)
+        request.user = user or AnonymousUser()
+        return throttle_class().allow_request(request, SimpleNamespace(throttle_scope=scope))
+
+    def allowed(self, count, *args, **kwargs):
+        return [self.allow(*args, **kwargs) for _ in range(count)].count(True)
+
+    def test_limit_then_429_with_retry_after(self):
+        for _ in range(10):
+            self.assertEqual(self.client.post('/user-auth/guest-tokens/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+        response = self.client.post('/user-auth/guest-tokens/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+        self.assertEqual(self.client.post('/user-auth/guest-tokens/', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    def test_scopes_and_clients_are_counted_apart(self):
+        self.assertEqual(self.allowed(11, ScopedIPThrottle, 'guest_tokens'), 10)
+        self.assertEqual(self.allowed(11, ScopedIPThrottle, 'guest_tokens', ip='10.0.0.2'), 10)
+        self.assertEqual(self.allowed(11, ScopedIPThrottle, 'search'), 11)
+        # A scope without a rate is not throttled
+        self.assertEqual(self.allowed(100, ScopedIPThrottle, 'unlimited'), 100)
+
+    def test_users_guests_and_anonymous_clients_are_counted_apart(self):
+        first, second = SimpleNamespace(id=1, is_authenticated=True), SimpleNamespace(id=2, is_authenticated=True)
+        self.assertEqual(self.allowed(11, ScopedUserThrottle, 'coupon_apply', user=first), 10)
+        # Same IP, other identities
+        self.assertEqual(self.allowed(11, ScopedUserThrottle, 'coupon_apply', user=second), 10)
+        self.assertEqual(self.allowed(11, ScopedUserThrottle, 'coupon_apply', user=GuestUser('a' * 32)), 10)
+        self.assertEqual(self.allowed(11, ScopedUserThrottle, 'coupon_apply'), 10)
+        self.assertEqual(self.allowed(11, ScopedUserThrottle, 'coupon_apply', ip='10.0.0.2'), 10)
+
+    def test_window_slides(self):
+        self.clock.return_value = self.start - 30
+        self.assertEqual(self.allowed(10, ScopedIPThrottle, 'guest_tokens'), 10)
+
+        # Halfway into the next window, half of the last one still counts
+        self.clock.return_value = self.start + 60
+        self.assertEqual(self.allowed(6, ScopedIPThrottle, 'guest_tokens'), 5)
+        # Rejected requests count as well: 6 + 1 of the last window's 10
+        self.clock.return_value = self.start + 84
+        self.assertEqual(self.allowed(10, ScopedIPThrottle, 'guest_tokens'), 3)
+        # Two windows later nothing is left
+        self.clock.return_value = self.start + 150
+        self.assertEqual(self.allowed(11, ScopedIPThrottle, 'guest_tokens'), 10)
+
+    def test_rejections_are_counted_per_scope(self):
+        self.allowed(13, ScopedIPThrottle, 'guest_tokens')
+        self.allowed(12, ScopedUserThrottle, 'coupon_apply')
+        self.assertEqual(
+            rejection_counts(['guest_tokens.ip', 'coupon_apply.user', 'search.ip']),
+            {'guest_tokens.ip': 3, 'coupon_apply.user': 2, 'search.ip': 0},
+        )
+
+    def test_rejections_are_logged_once_per_client_and_window(self):
+        self.allowed(15, ScopedIPThrottle, 'guest_tokens')
+        self.allowed(12, ScopedIPThrottle, 'guest_tokens', ip='10.0.0.2')
+        self.assertEqual(self.logger.warning.call_count, 2)
+
+        self.clock.return_value = self.start + 60
+        self.allowed(10, ScopedIPThrottle, 'guest_tokens')
+        self.assertEqual(self.logger.warning.call_count, 3)
+
+
+class RequestInstrumentationTests(TestCase):
+
+    timing = re.compile(
+        r'db;dur=(?P<db>\d+\.\d);desc="(?P<queries>\d+) queries", render;dur=(?P<render>\d+\.\d), '
+        r'app;dur=(?P<app>\d+\.\d), total;dur=(?P<total>\d+\.\d)'
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(products=3, categories=1, images_per_product=0)
+
+    def setUp(self):
+        caches['catalog'].clear()
+        logger = mock.patch('Backend.instrumentation.logger')
+        self.logger = logger.start()
+        self.addCleanup(logger.stop)
+
+    def logged(self):
+        self.assertEqual(self.logger.log.call_count, 1)
+        level, message = self.logger.log.call_args.args
+        return level, json.loads(message)
+
+    @override_settings(REQUEST_SERVER_TIMING=True)
+    def test_server_timing(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/product/facets/')
+        match = self.timing.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        self.assertEqual(match['queries'], '2')
+        parts = float(match['db']) + float(match['render']) + float(match['app'])
+        self.assertAlmostEqual(parts, float(match['total']), delta=0.3)
+
+    @override_settings(REQUEST_SERVER_TIMING=False)
+    def test_server_timing_off(self):
+        self.assertNotIn('Server-Timing', self.client.get('/product/facets/'))
+
+    def test_request_within_budget_logs_info(self):
+        self.client.get('/product/facets/')
+        level, record = self.logged()
+        self.assertEqual(level, logging.INFO)
+        self.assertEqual((record['view'], record['status'], record['db_queries']), ('product-facets', 200, 2))
+        self.assertNotIn('query_budget', record)
+
+    @override_settings(REQUEST_QUERY_BUDGET=1)
+    def test_request_over_budget_logs_a_warning(self):
+        self.client.get('/product/facets/')
+        level, record = self.logged()
+        self.assertEqual(level, logging.WARNING)
+        self.assertEqual((record['db_queries'], record['query_budget']), (2, 1))
+
+    @mock.patch.object(ProductFacetsView, 'query_budget', 5, create=True)
+    @override_settings(REQUEST_QUERY_BUDGET=1)
+    def test_view_budget_overrides_the_setting(self):
+        self.client.get('/product/facets/')
+        self.assertEqual(self.logged()[0], logging.INFO)
+
+
+class MetricsTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        registry = mock.patch.dict('Backend.metrics.REGISTRY', clear=True)
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def in_process(self, pid):
+        """Record samples as if from process `pid`"""
+        return mock.patch('Backend.metrics._store', MmapedValues(os.path.join(self.directory, f'metrics_{pid}.db')))
+
+    def test_histogram_exposition(self):
+        histogram = Histogram('latency_seconds', 'Request latency', ['view'], buckets=(0.1, 1))
+        with self.in_process(1):
+            for value in [0.0625, 0.5, 0.75, 3]:
+                histogram.observe(value, view='a"b\\c\nd')
+
+        self.assertEqual(generate_latest(self.directory), '\n'.join([
+            '# HELP latency_seconds Request latency',
+            '# TYPE latency_seconds histogram',
+            r'latency_seconds_bucket{view="a\"b\\c\nd",le="0.1"} 1',
+            r'latency_seconds_bucket{view="a\"b\\c\nd",le="1"} 3',
+            r'latency_seconds_bucket{view="a\"b\\c\nd",le="+Inf"} 4',
+            r'latency_seconds_sum{view="a\"b\\c\nd"} 4.3125',
+            r'latency_seconds_count{view="a\"b\\c\nd"} 4',
+        ]) + '\n')
+
+    def test_processes_are_summed(self):
+        counter = Counter('hits', 'Hits by view', ['view'])
+        histogram = Histogram('size', 'Sizes', buckets=(10,))
+        with self.in_process(1):
+            counter.inc(2, view='home')
+            counter.inc(view='cart')
+            histogram.observe(5)
+        # A process that has exited still counts through its file
+        with self.in_process(2):
+            counter.inc(3, view='home')
+            histogram.observe(20)
+        with open(os.path.join(self.directory, 'README'), 'w') as other:
+            other.write('not metrics')
+
+        self.assertEqual(generate_latest(self.directory), '\n'.join([
+            '# HELP hits Hits by view',
+            '# TYPE hits counter',
+            'hits_total{view="cart"} 1',
+            'hits_total{view="home"} 5',
+            '# HELP size Sizes',
+            '# TYPE size histogram',
+            'size_bucket{le="10"} 1',
+            'size_bucket{le="+Inf"} 2',
+            'size_sum 25',
+            'size_count 2',
+        ]) + '\n')
+
+    def test_values_survive_reopening(self):
+        path = os.path.join(self.directory, 'metrics_1.db')
+        values = MmapedValues(path)
+        # Enough keys to grow the file past its initial size
+        for index in range(2000):
+            values.inc(f'key-{index:050}', index)
+        values.inc('key-' + '0' * 50, 1.5)
+
+        MmapedValues(path).inc(f'key-{1999:050}', 1)
+        samples = collect(self.directory)
+        self.assertEqual(len(samples), 2000)
+        self.assertEqual(samples['key-' + '0' * 50], 1.5)
+        self.assertEqual(samples[f'key-{1999:050}'], 2000)
+
+
+class MetricsEndpointTests(SimpleTestCase):
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn(b'# TYPE http_request_duration_seconds histogram', response.content)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_served_without_a_token_only_in_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    def test_tests_record_metrics_in_a_temporary_directory(self):
+        self.assertTrue(settings.METRICS_DIR.startswith(os.path.join(tempfile.gettempdir(), 'metrics-')))
+
+
+class SyntheticDataTests(TestCase):
+
+    counts = {
+        'categories': 2, 'products': 10, 'images': 1, 'users': 4, 'cart_lines': 2,
+        'coupons': 2, 'orders': 1, 'reviews': 10, 'posts': 2, 'comments': 2,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.product = seed_catalog(products=1, categories=1, images_per_product=0)[0]
+
+    def generate(self):
+        with self.settings(DEBUG=True):
+            generate(**self.counts)
+        return Product.objects.filter(category__description__startswith='[synthetic]').first()
+
+    def test_only_generated_with_debug_on(self):
+        with self.assertRaises(SyntheticDataError):
+            generate(**self.counts)
+        with self.assertRaisesMessage(CommandError, 'only with DEBUG on'):
+            call_command('generate_synthetic_data', users=1, stdout=StringIO())
+        self.assertFalse(User.objects.filter(username__startswith='synthetic-').exists())
+
+    def test_flush_leaves_real_data(self):
+        self.generate()
+        self.assertEqual(User.objects.filter(username__startswith='synthetic-').count(), 4)
+
+        self.assertGreater(flush(), 0)
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), [self.user.username])
+        self.assertEqual(list(Product.objects.all()), [self.product])
+        self.assertFalse(Review.objects.exists())
+
+    def test_flush_refuses_while_real_data_references_synthetic_products(self):
+        product = self.generate()
+        order = Order.objects.create(user=self.user, total_amount=product.price)
+        OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        CartItem.objects.create(cart=Cart.objects.create(guest_id='g' * 32), product=product)
+        users = User.objects.count()
+
+        with self.assertRaisesMessage(SyntheticDataError, '1 order lines, 1 cart lines'):
+            flush()
+        with self.assertRaisesMessage(CommandError, 'Real data references synthetic products'):
+            call_command('generate_synthetic_data', flush_only=True, stdout=StringIO())
+        self.assertEqual(User.objects.count(), users)
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 1)
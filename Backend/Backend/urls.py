@@ -16,11 +16,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
+
+from .views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('',include('FEcore.urls')),
     path('order/',include('Order.urls')),
     path('user-auth/',include('UserAuth.urls')),
@@ -33,7 +34,5 @@ urlpatterns = [
     path('accounts/', include('allauth.urls')),
 ]
 
-# Serve static and media files during development
-if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Static and media files are served by StaticFilesMiddleware and
+# MediaFilesMiddleware
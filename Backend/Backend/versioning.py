@@ -0,0 +1,91 @@
+"""
+Cheap content versions for cache invalidation.
+
+Each namespace (catalog, blog, ...) has a version: a millisecond timestamp
+of its last change. Cache keys built from the version are invalidated by
+bumping it, and the timestamp doubles as Last-Modified.
+
+Every process must see a bump as soon as it is made, including those of
+the task worker, so versions live where all of them look: in the
+namespace's cache when that is shared (CACHE_URL), without expiry, and in
+a ContentVersion row otherwise.
+
+The row is bumped in either case, as it replicates along with the data.
+A request reading from a replica that has not caught up with the versions
+it looks up moves to the primary, so nothing read on a lagging replica is
+cached or validated under a newer version.
+"""
+import time
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .caching import get_cache, is_shared
+from .models import ContentVersion
+from .routers import current_replica, read_from_primary
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def get_versions(*namespaces):
+    """{namespace: current version}, seeding missing ones; one query without a shared cache"""
+    versions = {}
+    stored = []
+    for namespace in namespaces:
+        version = get_cache(namespace).get(_version_key(namespace)) if is_shared(namespace) else None
+        if version is None:
+            stored.append(namespace)
+        else:
+            versions[namespace] = version
+
+    if stored:
+        versions.update(ContentVersion.objects.filter(namespace__in=stored).values_list('namespace', 'version'))
+        for namespace in stored:
+            if namespace not in versions:
+                row, _ = ContentVersion.objects.get_or_create(namespace=namespace, defaults={'version': _now()})
+                versions[namespace] = row.version
+            if is_shared(namespace):
+                get_cache(namespace).add(_version_key(namespace), versions[namespace], None)
+
+    require_replicated(versions)
+    return versions
+
+
+def require_replicated(versions):
+    """Move the current request to the primary unless its replica has caught up with `versions`"""
+    replica = current_replica()
+    if replica is None:
+        return
+    replicated = dict(ContentVersion.objects.using(replica).filter(namespace__in=versions).values_list('namespace', 'version'))
+    if any(replicated.get(namespace, 0) < version for namespace, version in versions.items()):
+        read_from_primary()
+
+
+def get_version(namespace):
+    """Current version of a namespace, seeding it on first use"""
+    return get_versions(namespace)[namespace]
+
+
+def bump_version(namespace):
+    """Mark every cache entry built from this namespace as stale"""
+    version = _now()
+    shared = is_shared(namespace)
+    if shared:
+        cache = get_cache(namespace)
+        key = _version_key(namespace)
+        version = max(version, (cache.get(key) or 0) + 1)
+
+    # Always moves forward, even when bumped twice in a millisecond
+    updated = ContentVersion.objects.filter(namespace=namespace).update(version=Greatest(Value(version), F('version') + 1))
+    if not updated:
+        ContentVersion.objects.get_or_create(namespace=namespace, defaults={'version': version})
+    if shared:
+        # The row's version, which replicas are checked against
+        version = ContentVersion.objects.values_list('version', flat=True).get(namespace=namespace)
+        cache.set(key, max(version, cache.get(key) or 0), None)
@@ -13,7 +13,7 @@ class BlogImageInline(admin.TabularInline):
 class BlogCommentInline(admin.TabularInline):
     model = BlogComment
     extra = 0
-    fields = ('user', 'comment', 'is_active', 'created_at')
+    fields = ('user', 'author_name', 'comment', 'is_active', 'created_at')
     readonly_fields = ('created_at',)
     ordering = ('-created_at',)
 
@@ -52,13 +52,13 @@ class BlogPostAdmin(admin.ModelAdmin):
 
 @admin.register(BlogComment)
 class BlogCommentAdmin(admin.ModelAdmin):
-    list_display = ('blog_title', 'user', 'comment_preview', 'is_active', 'created_at')
+    list_display = ('blog_title', 'display_name', 'comment_preview', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at', 'blog__category')
-    search_fields = ('comment', 'user__username', 'blog__title')
+    search_fields = ('comment', 'user__username', 'author_name', 'author_email', 'blog__title')
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
         ('Comment Details', {
-            'fields': ('blog', 'user', 'comment')
+            'fields': ('blog', 'user', 'author_name', 'author_email', 'comment')
         }),
         ('Status', {
             'fields': ('is_active',)
@@ -74,6 +74,10 @@ class BlogCommentAdmin(admin.ModelAdmin):
     def blog_title(self, obj):
         return obj.blog.title
     blog_title.short_description = 'Blog Post'
+
+    def display_name(self, obj):
+        return obj.display_name
+    display_name.short_description = 'Author'
     
     def comment_preview(self, obj):
         return obj.comment[:50] + '...' if len(obj.comment) > 50 else obj.comment
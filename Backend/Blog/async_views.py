@@ -0,0 +1,30 @@
+"""
+Async versions of the blog post list, search and category endpoints (see
+Backend/async_views.py), routed in place of the DRF views when
+ASYNC_VIEWS is on.
+"""
+from Backend.async_views import AsyncListView
+
+from .projections import aproject_blog_posts, blog_post_values
+from .signals import BLOG_NAMESPACE
+from .views import BlogCategoryAPIView, BlogPostViewSet, BlogSearchAPIView
+
+
+class AsyncBlogPostListView(AsyncListView):
+    # As the router builds it
+    sync_view = BlogPostViewSet.as_view({'get': 'list', 'post': 'create'}, basename='blogpost', detail=False, suffix='List')
+    namespaces = (BLOG_NAMESPACE,)
+
+    def get_queryset(self, view):
+        return blog_post_values(super().get_queryset(view))
+
+    async def project(self, rows, request):
+        return await aproject_blog_posts(rows, request)
+
+
+class AsyncBlogSearchView(AsyncBlogPostListView):
+    sync_view = BlogSearchAPIView.as_view()
+
+
+class AsyncBlogCategoryView(AsyncBlogPostListView):
+    sync_view = BlogCategoryAPIView.as_view()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Blog', '0002_alter_blogpost_options_blogpost_category_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized derivatives of the image'),
+        ),
+    ]
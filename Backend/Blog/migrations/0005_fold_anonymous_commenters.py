@@ -0,0 +1,97 @@
+"""
+Move the identity of anonymous commenters from the inactive `anonymous_<email>`
+users onto their comments, then delete those users where nothing else
+references them. Runs in short per-batch transactions so a large comment
+table is never locked for the whole migration.
+"""
+from django.db import migrations, transaction
+from django.db.models import Exists, OuterRef
+
+BATCH_SIZE = 500
+
+
+def anonymous_users(User):
+    return User.objects.filter(username__startswith='anonymous_', is_active=False)
+
+
+def fold_anonymous_commenters(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    BlogComment = apps.get_model('Blog', 'BlogComment')
+
+    last_pk = 0
+    while True:
+        batch = list(
+            anonymous_users(User)
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .values('pk', 'first_name', 'last_name', 'email')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_pk = batch[-1]['pk']
+        with transaction.atomic():
+            for user in batch:
+                BlogComment.objects.filter(user_id=user['pk']).update(
+                    user=None,
+                    author_name=f"{user['first_name']} {user['last_name']}".strip(),
+                    author_email=user['email'],
+                )
+
+    # Anyone who also posted, ordered, reviewed or used a coupon is kept
+    references = [
+        (apps.get_model('Blog', 'BlogComment'), 'user'),
+        (apps.get_model('Blog', 'BlogPost'), 'author'),
+        (apps.get_model('Order', 'Order'), 'user'),
+        (apps.get_model('Review', 'Review'), 'user'),
+        (apps.get_model('Coupon', 'CouponUsage'), 'user'),
+        (apps.get_model('Cart', 'Cart'), 'user'),
+    ]
+    unreferenced = anonymous_users(User)
+    for model, field in references:
+        unreferenced = unreferenced.exclude(Exists(model.objects.filter(**{field: OuterRef('pk')})))
+
+    while True:
+        ids = list(unreferenced.values_list('pk', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        with transaction.atomic():
+            User.objects.filter(pk__in=ids).delete()
+
+
+def restore_anonymous_users(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    BlogComment = apps.get_model('Blog', 'BlogComment')
+
+    emails = (
+        BlogComment.objects
+        .filter(user__isnull=True)
+        .exclude(author_email='')
+        .order_by()
+        .values_list('author_email', flat=True)
+        .distinct()
+    )
+    for email in emails.iterator():
+        comments = BlogComment.objects.filter(user__isnull=True, author_email=email)
+        first_name, _, last_name = comments.values_list('author_name', flat=True).first().partition(' ')
+        user, _ = User.objects.get_or_create(
+            username=f'anonymous_{email}',
+            defaults={'first_name': first_name, 'last_name': last_name, 'email': email, 'is_active': False},
+        )
+        comments.update(user=user)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('Blog', '0004_blogcomment_author'),
+        ('Cart', '0002_cart_guest_id'),
+        ('Coupon', '0001_initial'),
+        ('Order', '0001_initial'),
+        ('Review', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_anonymous_commenters, restore_anonymous_users),
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.text import slugify
 
+from Backend.imaging import ResponsiveImageMixin
+
 class BlogPost(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
@@ -40,7 +42,10 @@ class BlogPost(models.Model):
 
 class BlogComment(models.Model):
     blog = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='comments')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_comments')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_comments', null=True, blank=True)
+    # Identity of anonymous commenters, who have no user account
+    author_name = models.CharField(max_length=150, blank=True)
+    author_email = models.EmailField(blank=True)
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -52,11 +57,18 @@ class BlogComment(models.Model):
         verbose_name_plural = 'Blog Comments'
     
     def __str__(self):
-        return f"{self.user.username} - {self.comment[:50]}..."
+        return f"{self.display_name} - {self.comment[:50]}..."
+
+    @property
+    def display_name(self):
+        if self.user_id is None:
+            return self.author_name
+        return self.user.get_full_name() or self.user.username
 
-class BlogImage(models.Model):
+class BlogImage(ResponsiveImageMixin, models.Model):
     blog = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='blog_images/', null=True, blank=True)
+    variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized derivatives of the image")
     alt_text = models.CharField(max_length=200, blank=True, help_text="Alternative text for accessibility")
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
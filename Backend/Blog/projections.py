@@ -0,0 +1,131 @@
+"""
+Read-only fast path for blog post lists.
+
+Builds the exact BlogPostListSerializer output from `.values()` rows plus
+one image query and one comment-count query per page. Scalar formatting
+reuses the serializer's own fields so the rendered JSON stays byte-identical.
+aproject_blog_posts() makes both queries through the async ORM, for the
+views in Blog/async_views.py.
+"""
+from functools import lru_cache
+
+from django.db.models import Count
+
+from Backend.imaging import build_srcset
+
+from .models import BlogComment, BlogImage
+from .serializers import BlogPostListSerializer
+
+BLOG_POST_VALUE_FIELDS = (
+    'id', 'title', 'slug', 'content',
+    'author__id', 'author__username', 'author__first_name', 'author__last_name', 'author__email',
+    'created_at', 'updated_at', 'category', 'tags', 'is_active', 'is_new',
+    'number_of_views', 'number_of_likes', 'number_of_comments', 'rating',
+)
+
+
+@lru_cache(maxsize=None)
+def _serializer_fields():
+    return BlogPostListSerializer().fields
+
+
+def blog_post_values(queryset):
+    """Rows for project_blog_posts()"""
+    return queryset.select_related(None).prefetch_related(None).values(*BLOG_POST_VALUE_FIELDS)
+
+
+def image_rows(post_ids):
+    return (
+        BlogImage.objects
+        .filter(blog_id__in=post_ids)
+        .values_list('blog_id', 'id', 'image', 'variants', 'alt_text', 'order')
+    )
+
+
+def group_images(rows, request=None):
+    storage_url = BlogImage._meta.get_field('image').storage.url
+    if request is None:
+        url = storage_url
+    else:
+        def url(name):
+            return request.build_absolute_uri(storage_url(name))
+
+    images = {}
+    for blog_id, image_id, name, variants, alt_text, order in rows:
+        images.setdefault(blog_id, []).append({
+            'id': image_id,
+            'image': url(name) if name else None,
+            'srcset': build_srcset(variants, name, url),
+            'alt_text': alt_text,
+            'order': order,
+        })
+    return images
+
+
+def image_map(post_ids, request=None):
+    """Images of the given posts in BlogImage order, grouped by post id"""
+    return group_images(image_rows(post_ids), request)
+
+
+def comment_count_rows(post_ids):
+    return (
+        BlogComment.objects
+        .filter(blog_id__in=post_ids, is_active=True)
+        .values('blog_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def active_comment_counts(post_ids):
+    return {row['blog_id']: row['count'] for row in comment_count_rows(post_ids)}
+
+
+def project_blog_posts(rows, request=None):
+    """Plain dicts identical to BlogPostListSerializer(many=True).data"""
+    rows = list(rows)
+    post_ids = [row['id'] for row in rows]
+    return build_blog_posts(rows, image_map(post_ids, request), active_comment_counts(post_ids))
+
+
+async def aproject_blog_posts(rows, request=None):
+    """project_blog_posts() for a list of rows, with both queries made through the async ORM"""
+    post_ids = [row['id'] for row in rows]
+    images = group_images([row async for row in image_rows(post_ids)], request)
+    comment_counts = {row['blog_id']: row['count'] async for row in comment_count_rows(post_ids)}
+    return build_blog_posts(rows, images, comment_counts)
+
+
+def build_blog_posts(rows, images, comment_counts):
+    fields = _serializer_fields()
+    created_at = fields['created_at'].to_representation
+    updated_at = fields['updated_at'].to_representation
+    rating = fields['rating'].to_representation
+    return [
+        {
+            'id': row['id'],
+            'title': row['title'],
+            'slug': row['slug'],
+            'content': row['content'],
+            'author': {
+                'id': row['author__id'],
+                'username': row['author__username'],
+                'first_name': row['author__first_name'],
+                'last_name': row['author__last_name'],
+                'email': row['author__email'],
+            },
+            'created_at': created_at(row['created_at']),
+            'updated_at': updated_at(row['updated_at']),
+            'category': row['category'],
+            'tags': row['tags'],
+            'is_active': row['is_active'],
+            'is_new': row['is_new'],
+            'number_of_views': row['number_of_views'],
+            'number_of_likes': row['number_of_likes'],
+            'number_of_comments': row['number_of_comments'],
+            'rating': rating(row['rating']),
+            'images': images.get(row['id'], []),
+            'comments_count': comment_counts.get(row['id'], 0),
+        }
+        for row in rows
+    ]
@@ -8,17 +8,27 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'first_name', 'last_name', 'email']
 
 class BlogImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = BlogImage
-        fields = ['id', 'image', 'alt_text', 'order']
+        fields = ['id', 'image', 'srcset', 'alt_text', 'order']
+
+    def get_srcset(self, obj):
+        # Absolute like the image field itself when a request is available
+        request = self.context.get('request')
+        if request is not None and obj.image:
+            return obj.get_srcset(lambda name: request.build_absolute_uri(obj.image.storage.url(name)))
+        return obj.get_srcset()
 
 class BlogCommentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
-    user_id = serializers.IntegerField(write_only=True)
+    user_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
+    author_name = serializers.CharField(source='display_name', read_only=True)
     
     class Meta:
         model = BlogComment
-        fields = ['id', 'blog', 'user', 'user_id', 'comment', 'is_active', 'created_at', 'updated_at']
+        fields = ['id', 'blog', 'user', 'user_id', 'author_name', 'comment', 'is_active', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
 class BlogPostListSerializer(serializers.ModelSerializer):
@@ -38,6 +48,8 @@ class BlogPostListSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at', 'slug', 'number_of_views', 'number_of_likes', 'number_of_comments']
     
     def get_comments_count(self, obj):
+        if 'comments' in getattr(obj, '_prefetched_objects_cache', {}):
+            return sum(1 for comment in obj.comments.all() if comment.is_active)
         return obj.comments.filter(is_active=True).count()
 
 class BlogPostDetailSerializer(BlogPostListSerializer):
@@ -66,25 +78,9 @@ class AnonymousCommentCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'user', 'is_active', 'created_at', 'updated_at']
     
     def create(self, validated_data):
-        # Extract name and email
-        name = validated_data.pop('name')
-        email = validated_data.pop('email')
-        
-        # Create or get a user for anonymous comments
-        # We'll create a user with the provided name and email
-        user, created = User.objects.get_or_create(
-            username=f"anonymous_{email}",
-            defaults={
-                'first_name': name.split(' ')[0] if ' ' in name else name,
-                'last_name': name.split(' ')[1] if ' ' in name else '',
-                'email': email,
-                'is_active': False  # Mark as inactive since it's anonymous
-            }
-        )
-        
-        # Add user to validated_data
-        validated_data['user'] = user
-        
+        # Anonymous commenters are stored on the comment itself, not as users
+        validated_data['author_name'] = validated_data.pop('name')
+        validated_data['author_email'] = validated_data.pop('email')
         return super().create(validated_data)
 
 class CommentLikeSerializer(serializers.Serializer):
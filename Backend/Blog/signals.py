@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Backend.versioning import bump_version
+from TaskQueue.queue import enqueue
+from .models import BlogComment, BlogImage, BlogPost
+
+BLOG_NAMESPACE = 'blog'
+
+
+@receiver(post_save, sender=BlogImage)
+def queue_image_derivatives(sender, instance, **kwargs):
+    """Resizing runs on a worker; the original is served until it is done"""
+    if instance.image and not instance.has_current_variants:
+        enqueue(
+            'Blog.tasks.generate_image_derivatives',
+            args=[instance.pk],
+            unique_key=f'blog-image-derivatives:{instance.pk}',
+        )
+
+
+@receiver([post_save, post_delete], sender=BlogPost)
+@receiver([post_save, post_delete], sender=BlogComment)
+@receiver([post_save, post_delete], sender=BlogImage)
+def bump_blog_version(sender, **kwargs):
+    """Any blog change invalidates cached blog responses"""
+    bump_version(BLOG_NAMESPACE)
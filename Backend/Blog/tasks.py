@@ -0,0 +1,11 @@
+from Backend.versioning import bump_version
+from TaskQueue.queue import task
+from .models import BlogImage
+from .signals import BLOG_NAMESPACE
+
+
+@task
+def generate_image_derivatives(image_id):
+    image = BlogImage.objects.filter(pk=image_id).first()
+    if image is not None and image.refresh_variants():
+        bump_version(BLOG_NAMESPACE)
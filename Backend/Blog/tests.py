@@ -1,3 +1,132 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from Backend.testing import PerformanceTestCase, bearer, create_user, seed_blog
+from .async_views import AsyncBlogCategoryView, AsyncBlogPostListView, AsyncBlogSearchView
+from .models import BlogComment, BlogImage, BlogPost
+from .projections import blog_post_values, project_blog_posts
+from .serializers import BlogPostListSerializer
+
+
+class BlogPostProjectionTests(TestCase):
+    """The list fast path must render exactly like BlogPostListSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='editor', email='editor@example.com', first_name='Ed')
+        post = BlogPost.objects.create(title='Glass skin routine', content='Step one', author=author, tags='skin,glow')
+        BlogPost.objects.create(title='Sunscreen myths', content='SPF', author=author, category='Tips', is_new=True)
+        BlogImage.objects.create(blog=post, image='blog_images/routine.jpg', alt_text='Routine', order=2)
+        BlogImage.objects.create(
+            blog=post, image='blog_images/cover.jpg', order=1,
+            variants={
+                'source': 'blog_images/cover.jpg', 'width': 320, 'height': 200,
+                'sizes': [{'width': 320, 'height': 200, 'webp': 'blog_images/derivatives/cover_320w.webp',
+                           'jpeg': 'blog_images/derivatives/cover_320w.jpeg'}],
+            },
+        )
+        BlogImage.objects.create(blog=post)
+        BlogComment.objects.create(blog=post, user=author, comment='Great')
+        BlogComment.objects.create(blog=post, user=author, comment='Hidden', is_active=False)
+
+    def test_projection_matches_serializer(self):
+        request = RequestFactory().get('/blog/posts/')
+        queryset = BlogPost.objects.select_related('author').prefetch_related('images', 'comments')
+
+        expected = JSONRenderer().render(
+            BlogPostListSerializer(queryset, many=True, context={'request': request}).data
+        )
+        actual = JSONRenderer().render(project_blog_posts(blog_post_values(queryset), request))
+
+        self.assertEqual(actual, expected)
+
+
+class AnonymousCommentTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='editor', email='editor@example.com')
+        self.post = BlogPost.objects.create(title='Night routine', content='Step one', author=author)
+
+    def test_anonymous_comment_is_stored_without_a_user(self):
+        response = APIClient().post(reverse('blogcomment-list'), {
+            'blog': self.post.pk, 'comment': 'Lovely', 'name': 'Ann Lee', 'email': 'ann@example.com',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        comment = BlogComment.objects.get()
+        self.assertIsNone(comment.user_id)
+        self.assertEqual((comment.author_name, comment.author_email), ('Ann Lee', 'ann@example.com'))
+        self.assertEqual(comment.display_name, 'Ann Lee')
+        self.assertEqual(User.objects.count(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.number_of_comments, 1)
+
+
+class BlogQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('editor')
+        cls.posts = seed_blog(cls.author, posts=60, comments_per_post=60)
+        cls.post = cls.posts[0]
+        cls.comment = BlogComment.objects.filter(blog=cls.post, user__isnull=False).first()
+
+    # Lists read the blog version first and writes bump it, a query each
+    # here since the test cache is not shared
+    def test_post_list(self):
+        self.assertBudget('get', '/blog/posts/', 5)
+        self.assertBudget('get', '/blog/posts/?page=2&page_size=10&category=Tips', 5)
+
+    # Counting the view bumps the blog version
+    def test_post_detail(self):
+        self.assertBudget('get', f'/blog/posts/{self.post.pk}/', 5)
+
+    def test_reading_a_post_revalidates_the_lists(self):
+        etag = self.api.get('/blog/posts/?ordering=-number_of_views')['ETag']
+        self.assertEqual(self.api.get('/blog/posts/?ordering=-number_of_views', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.api.get(f'/blog/posts/{self.posts[-1].pk}/')
+        response = self.api.get('/blog/posts/?ordering=-number_of_views', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['number_of_views'], 1)
+
+    def test_post_writes(self):
+        auth = bearer(self.author)
+        self.assertBudget('post', '/blog/posts/', 3, {
+            'title': 'Night routine', 'content': 'Cleanse, treat, moisturise.', 'author': self.author.pk, 'category': 'Routines',
+        }, status=201, **auth)
+        post = BlogPost.objects.get(title='Night routine')
+        path = f'/blog/posts/{post.pk}/'
+        self.assertBudget('patch', path, 3, {'tags': 'night,routine'}, **auth)
+        self.assertBudget('delete', path, 5, status=204, **auth)
+        self.assertBudget('delete', f'/blog/posts/{self.post.pk}/', 0, status=401)
+
+    def test_post_like_and_unlike(self):
+        auth = bearer(self.author)
+        self.assertBudget('post', f'/blog/posts/{self.post.pk}/like/', 3, **auth)
+        self.assertBudget('post', f'/blog/posts/{self.post.pk}/unlike/', 3, **auth)
+
+    def test_comment_routes(self):
+        self.assertBudget('get', f'/blog/comments/?blog={self.post.pk}', 3)
+        self.assertBudget('get', f'/blog/comments/{self.comment.pk}/', 1)
+        self.assertBudget('post', '/blog/comments/', 6, {
+            'blog': self.post.pk, 'comment': 'Lovely', 'name': 'Ann Lee', 'email': 'ann@example.com',
+        }, status=201)
+        self.assertBudget('post', '/blog/comments/like/', 1, {'comment_id': self.comment.pk, 'action': 'like'}, **bearer(self.author))
+        path = f'/blog/comments/{self.comment.pk}/'
+        self.assertBudget('patch', path, 3, {'comment': 'Edited'})
+        self.assertBudget('delete', path, 6, status=204)
+
+    def test_search_and_categories(self):
+        self.assertBudget('get', '/blog/search/?q=Skincare&page_size=20', 5)
+        self.assertBudget('get', '/blog/category/Tips/?page_size=20', 5)
+        self.assertBudget('get', '/blog/categories/', 2)
+
+    def test_async_post_list_and_search(self):
+        self.assertAsyncMatches(AsyncBlogPostListView, '/blog/posts/')
+        self.assertAsyncMatches(AsyncBlogPostListView, '/blog/posts/?page=2&page_size=10&category=Tips')
+        self.assertAsyncMatches(AsyncBlogPostListView, f'/blog/posts/?author={self.author.pk}&ordering=-rating')
+        self.assertAsyncMatches(AsyncBlogSearchView, '/blog/search/?q=Skincare&page_size=20')
+        self.assertAsyncMatches(AsyncBlogCategoryView, '/blog/category/Tips/?page_size=20')
@@ -1,17 +1,26 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'posts', views.BlogPostViewSet, basename='blogpost')
 router.register(r'comments', views.BlogCommentViewSet, basename='blogcomment')
 
 urlpatterns = [
-    path('', include(router.urls)),
-    
-    # Additional API endpoints
+    # Additional API endpoints; comments/like/ must come before the router's comments/<pk>/
     path('comments/like/', views.CommentLikeAPIView.as_view(), name='comment-like'),
     path('search/', views.BlogSearchAPIView.as_view(), name='blog-search'),
     path('category/<str:category>/', views.BlogCategoryAPIView.as_view(), name='blog-category'),
     path('categories/', views.BlogCategoriesListAPIView.as_view(), name='blog-categories-list'),
+
+    path('', include(router.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Same URL names; the first matching pattern wins
+    urlpatterns = [
+        path('posts/', async_views.AsyncBlogPostListView.as_view(), name='blogpost-list'),
+        path('search/', async_views.AsyncBlogSearchView.as_view(), name='blog-search'),
+        path('category/<str:category>/', async_views.AsyncBlogCategoryView.as_view(), name='blog-category'),
+    ] + urlpatterns
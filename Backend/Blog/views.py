@@ -4,13 +4,19 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, F, Count
+from django.db import transaction
+from django.db.models import Q, F, Count, Prefetch
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from Backend.conditional import conditional_on
+from Backend.versioning import bump_version
 from .models import BlogPost, BlogComment, BlogImage
 from .serializers import (
     BlogPostListSerializer, BlogPostDetailSerializer, BlogPostCreateSerializer,
     BlogCommentSerializer, CommentCreateSerializer, AnonymousCommentCreateSerializer, CommentLikeSerializer
 )
+from .signals import BLOG_NAMESPACE
+from .projections import blog_post_values, project_blog_posts
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 4  # Back to normal page size
@@ -22,8 +28,25 @@ class StandardResultsSetPagination(PageNumberPagination):
         response.data['page_size'] = self.page_size
         return response
 
-class BlogPostViewSet(viewsets.ModelViewSet):
-    queryset = BlogPost.objects.filter(is_active=True).select_related('author').prefetch_related('images', 'comments')
+class ProjectedListMixin:
+    """
+    Read-only fast path: same JSON as BlogPostListSerializer, built from
+    values() rows plus one image and one comment-count query per page
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = blog_post_values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(project_blog_posts(page, request))
+
+        return Response(project_blog_posts(queryset, request))
+
+# Only list endpoints are conditional: retrieve has to run to count the view
+@method_decorator(conditional_on(BLOG_NAMESPACE), name='list')
+class BlogPostViewSet(ProjectedListMixin, viewsets.ModelViewSet):
+    queryset = BlogPost.objects.filter(is_active=True).select_related('author')
     pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'is_new', 'author']
@@ -43,6 +66,10 @@ class BlogPostViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                'images', Prefetch('comments', queryset=BlogComment.objects.select_related('user'))
+            )
         
         # Filter by category
         category = self.request.query_params.get('category', None)
@@ -60,8 +87,9 @@ class BlogPostViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        # Increment view count
+        # Increment view count; lists show and sort by it, so their validators must change
         BlogPost.objects.filter(pk=instance.pk).update(number_of_views=F('number_of_views') + 1)
+        bump_version(BLOG_NAMESPACE)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -97,17 +125,18 @@ class BlogCommentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         blog_post = serializer.validated_data['blog']
-        # Increment comment count
-        BlogPost.objects.filter(pk=blog_post.pk).update(number_of_comments=F('number_of_comments') + 1)
-        serializer.save()
+        # The comment and the count it is part of commit together
+        with transaction.atomic():
+            serializer.save()
+            BlogPost.objects.filter(pk=blog_post.pk).update(number_of_comments=F('number_of_comments') + 1)
 
     def destroy(self, request, *args, **kwargs):
         comment = self.get_object()
-        blog_post = comment.blog
-        # Decrement comment count
-        if blog_post.number_of_comments > 0:
-            BlogPost.objects.filter(pk=blog_post.pk).update(number_of_comments=F('number_of_comments') - 1)
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            BlogPost.objects.filter(pk=comment.blog_id, number_of_comments__gt=0).update(
+                number_of_comments=F('number_of_comments') - 1
+            )
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 class CommentLikeAPIView(generics.GenericAPIView):
@@ -144,7 +173,8 @@ class CommentLikeAPIView(generics.GenericAPIView):
                 'comment_id': comment_id
             })
 
-class BlogSearchAPIView(generics.ListAPIView):
+@method_decorator(conditional_on(BLOG_NAMESPACE), name='list')
+class BlogSearchAPIView(ProjectedListMixin, generics.ListAPIView):
     serializer_class = BlogPostListSerializer
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -179,7 +209,8 @@ class BlogSearchAPIView(generics.ListAPIView):
         
         return queryset
 
-class BlogCategoryAPIView(generics.ListAPIView):
+@method_decorator(conditional_on(BLOG_NAMESPACE), name='list')
+class BlogCategoryAPIView(ProjectedListMixin, generics.ListAPIView):
     serializer_class = BlogPostListSerializer
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.OrderingFilter]
@@ -194,6 +225,7 @@ class BlogCategoryAPIView(generics.ListAPIView):
             category__icontains=category
         ).select_related('author').prefetch_related('images')
 
+@method_decorator(conditional_on(BLOG_NAMESPACE), name='get')
 class BlogCategoriesListAPIView(generics.GenericAPIView):
     """
     API endpoint to get all unique categories with their post counts
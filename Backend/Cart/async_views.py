@@ -0,0 +1,22 @@
+"""
+Async version of the cart summary (see Backend/async_views.py), routed in
+place of GetCartSummaryView when ASYNC_VIEWS is on.
+"""
+from Backend.async_views import AsyncAPIView
+
+from .models import Cart
+from .serializers import CartItemSerializer
+from .totals import acart_total
+from .views import GetCartSummaryView
+
+
+class AsyncCartSummaryView(AsyncAPIView):
+    sync_view = GetCartSummaryView.as_view()
+
+    async def respond(self, request, view):
+        owner = view.get_cart_owner()
+        cart, _ = await Cart.objects.aget_or_create(**owner)
+        items = [item async for item in view.get_item_queryset(cart)]
+        cart_total = await acart_total(**owner)
+        coupon_usage = await view.get_coupon_usages().afirst()
+        return view.summary_response(CartItemSerializer(items, many=True).data, cart_total, coupon_usage)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Cart', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='guest_id',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='cart',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('guest_id__isnull', True), ('user__isnull', False)), models.Q(('guest_id__isnull', False), ('user__isnull', True)), _connector='OR'), name='cart_user_xor_guest'),
+        ),
+    ]
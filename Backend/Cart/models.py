@@ -3,10 +3,25 @@ from django.contrib.auth.models import User
 from Product.models import Product
 
 class Cart(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    """Belongs to a user or, before they log in, to a signed guest id"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    guest_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(user__isnull=False, guest_id__isnull=True)
+                    | models.Q(user__isnull=True, guest_id__isnull=False)
+                ),
+                name='cart_user_xor_guest',
+            ),
+        ]
+
     def __str__(self):
+        if self.guest_id:
+            return f"Cart for guest {self.guest_id}"
         return f"Cart for {self.user.username}"
 
 class CartItem(models.Model):
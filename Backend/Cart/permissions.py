@@ -0,0 +1,9 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsAuthenticatedOrGuest(BasePermission):
+    """Authenticated users, or guests holding a signed guest token"""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and (user.is_authenticated or getattr(user, 'is_guest', False)))
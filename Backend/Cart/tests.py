@@ -1,3 +1,45 @@
-from django.test import TestCase
+from Backend.testing import PerformanceTestCase, bearer, create_user, guest_bearer, seed_cart, seed_catalog, seed_coupons
+from .async_views import AsyncCartSummaryView
 
-# Create your tests here.
+
+class CartQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(products=1000)
+        cls.user = create_user()
+        seed_cart(cls.products, lines=60, user=cls.user)
+        seed_cart(cls.products, lines=60, guest_id='a' * 32)
+        seed_coupons(user=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.user_auth = bearer(self.user)
+        self.guest_auth = guest_bearer('a' * 32)
+
+    def test_get_items(self):
+        self.assertBudget('get', '/cart/get_items/', 3, **self.user_auth)
+        self.assertBudget('get', '/cart/get_items/', 3, **self.guest_auth)
+
+    def test_summary(self):
+        self.assertBudget('get', '/cart/summary/', 5, **self.user_auth)
+        self.assertBudget('get', '/cart/summary/', 5, **self.guest_auth)
+
+    def test_add_item(self):
+        new_product, existing_product = self.products[500], self.products[0]
+        self.assertBudget('post', '/cart/add_item/', 8, {'product_id': new_product.pk}, **self.user_auth)
+        self.assertBudget('post', '/cart/add_item/', 8, {'product_id': existing_product.pk}, **self.guest_auth)
+
+    def test_increase_and_remove_item(self):
+        product = self.products[1]
+        self.assertBudget('post', '/cart/increase_item/', 6, {'product_id': product.pk}, **self.user_auth)
+        self.assertBudget('post', '/cart/remove_item/', 6, {'product_id': product.pk}, **self.user_auth)
+
+    def test_clear_cart(self):
+        self.assertBudget('delete', '/cart/clear_cart/', 2, **self.user_auth)
+        self.assertBudget('post', '/cart/clear_cart/', 2, **self.guest_auth)
+
+    def test_async_summary(self):
+        self.assertAsyncMatches(AsyncCartSummaryView, '/cart/summary/', **self.user_auth)
+        self.assertAsyncMatches(AsyncCartSummaryView, '/cart/summary/', **self.guest_auth)
+        self.assertAsyncMatches(AsyncCartSummaryView, '/cart/summary/', status=401)
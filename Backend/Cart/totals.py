@@ -0,0 +1,25 @@
+from decimal import Decimal
+
+from .models import CartItem
+
+
+def cart_lines(**owner):
+    lines = CartItem.objects.filter(**{f'cart__{field}': value for field, value in owner.items()})
+    return lines.values_list('product__price', 'quantity')
+
+
+def add_up(lines):
+    return sum((price * quantity for price, quantity in lines), Decimal('0'))
+
+
+def cart_total(**owner):
+    """
+    Sum of price x quantity over the cart of `owner` (user_id=... or
+    guest_id=...) in one query. Summed in Python so the Decimal result is
+    exact on every database; SQLite would add the products up as floats.
+    """
+    return add_up(cart_lines(**owner))
+
+
+async def acart_total(**owner):
+    return add_up([line async for line in cart_lines(**owner)])
@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('get_items/', views.GetCartItemsView.as_view(), name='get_cart_items'),
@@ -9,3 +10,8 @@ urlpatterns = [
     path('clear_cart/', views.ClearCartView.as_view(), name='clear_cart'),
     path('summary/', views.GetCartSummaryView.as_view(), name='cart_summary'),
 ]
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path('summary/', async_views.AsyncCartSummaryView.as_view(), name='cart_summary'),
+    ] + urlpatterns
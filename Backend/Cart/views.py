@@ -4,27 +4,37 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import Cart, CartItem
 from .serializers import CartSerializer, CartItemSerializer
+from .totals import cart_total
 from Product.models import Product
 from Coupon.models import CouponUsage
 from decimal import Decimal
 import json
-from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from Backend.custom_auth import GuestJWTAuthentication
+from .permissions import IsAuthenticatedOrGuest
 
 class BaseCartView(APIView):
-    permission_classes = [IsAuthenticated]  # Require authentication for all cart operations
-    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticatedOrGuest]  # Logged-in users and token-holding guests
+    authentication_classes = [GuestJWTAuthentication]
     
     def get_authenticated_user(self):
-        """Get authenticated user - authentication is required"""
+        """Get the requesting TokenUser or GuestUser; only ids are available"""
         return self.request.user
+
+    def get_cart_owner(self):
+        """Cart lookup for the requesting user or guest"""
+        user = self.get_authenticated_user()
+        if getattr(user, 'is_guest', False):
+            return {'guest_id': user.guest_id}
+        return {'user_id': user.id}
     
     def get_cart_items(self):
         """Get cart items for authenticated users only"""
-        user = self.get_authenticated_user()
-        cart = Cart.objects.get_or_create(user=user)[0]
-        items = cart.items.all()
-        return CartItemSerializer(items, many=True).data
+        cart = Cart.objects.get_or_create(**self.get_cart_owner())[0]
+        return CartItemSerializer(self.get_item_queryset(cart), many=True).data
+
+    def get_item_queryset(self, cart):
+        """Items of `cart` with what CartItemSerializer nests"""
+        return cart.items.select_related('product__category').prefetch_related('product__images')
 
     def get_product_data(self, product):
         """Get product data with images"""
@@ -41,16 +51,8 @@ class BaseCartView(APIView):
         }
     
     def calculate_cart_total(self):
-        """Calculate total cart amount for authenticated users only"""
-        user = self.get_authenticated_user()
-        try:
-            cart = Cart.objects.get(user=user)
-            total = Decimal('0')
-            for item in cart.items.all():
-                total += item.product.price * item.quantity
-            return total
-        except Cart.DoesNotExist:
-            return Decimal('0')
+        """Calculate total cart amount for the requesting user or guest"""
+        return cart_total(**self.get_cart_owner())
 
 class GetCartItemsView(BaseCartView):
     """API 1: Get all items in the cart"""
@@ -65,6 +67,7 @@ class GetCartItemsView(BaseCartView):
 
 class AddItemView(BaseCartView):
     """API 2: Add item to cart (or increase quantity if exists)"""
+    throttle_scope = 'cart'
     
     def post(self, request):
         product_id = str(request.data.get('product_id'))
@@ -84,8 +87,7 @@ class AddItemView(BaseCartView):
                 'message': 'Product not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        user = self.get_authenticated_user()
-        cart = Cart.objects.get_or_create(user=user)[0]
+        cart = Cart.objects.get_or_create(**self.get_cart_owner())[0]
         cart_item, created = CartItem.objects.get_or_create(
             cart=cart,
             product=product,
@@ -115,9 +117,8 @@ class RemoveItemView(BaseCartView):
                 'message': 'product_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        user = self.get_authenticated_user()
         try:
-            cart = Cart.objects.get(user=user)
+            cart = Cart.objects.get(**self.get_cart_owner())
             cart_item = CartItem.objects.get(cart=cart, product_id=product_id)
         except (Cart.DoesNotExist, CartItem.DoesNotExist):
             return Response({
@@ -153,9 +154,8 @@ class IncreaseItemView(BaseCartView):
                 'message': 'product_id is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        user = self.get_authenticated_user()
         try:
-            cart = Cart.objects.get(user=user)
+            cart = Cart.objects.get(**self.get_cart_owner())
             cart_item = CartItem.objects.get(cart=cart, product_id=product_id)
         except (Cart.DoesNotExist, CartItem.DoesNotExist):
             return Response({
@@ -176,9 +176,8 @@ class ClearCartView(BaseCartView):
     """API 5: Clear all items from cart (empty the cart)"""
     
     def delete(self, request):
-        user = self.get_authenticated_user()
         try:
-            cart = Cart.objects.get(user=user)
+            cart = Cart.objects.get(**self.get_cart_owner())
             cart.items.all().delete()
             return Response({
                 'success': True,
@@ -201,27 +200,27 @@ class GetCartSummaryView(BaseCartView):
     def get(self, request):
         cart_total = self.calculate_cart_total()
         items = self.get_cart_items()
-        
-        # Get applied coupon info for authenticated users
+        return self.summary_response(items, cart_total, self.get_coupon_usages().first())
+
+    def get_coupon_usages(self):
+        """The requester's coupon usages, most recent first"""
+        return CouponUsage.objects.filter(**self.get_cart_owner()).select_related('coupon').order_by('-used_at')
+
+    def summary_response(self, items, cart_total, coupon_usage):
+        """The summary, with the most recent coupon usage (if any) applied"""
         applied_coupon = None
         discount_amount = Decimal('0')
         final_amount = cart_total
         
-        user = self.get_authenticated_user()
-        try:
-            # Get the most recent coupon usage for this user
-            coupon_usage = CouponUsage.objects.filter(user=user).order_by('-used_at').first()
-            if coupon_usage:
-                applied_coupon = {
-                    'code': coupon_usage.coupon.code,
-                    'discount_type': coupon_usage.coupon.discount_type,
-                    'discount_value': coupon_usage.coupon.discount_value,
-                    'used_at': coupon_usage.used_at
-                }
-                discount_amount = coupon_usage.coupon.apply_discount(cart_total)
-                final_amount = cart_total - discount_amount
-        except CouponUsage.DoesNotExist:
-            pass
+        if coupon_usage:
+            applied_coupon = {
+                'code': coupon_usage.coupon.code,
+                'discount_type': coupon_usage.coupon.discount_type,
+                'discount_value': coupon_usage.coupon.discount_value,
+                'used_at': coupon_usage.used_at
+            }
+            discount_amount = coupon_usage.coupon.apply_discount(cart_total)
+            final_amount = cart_total - discount_amount
         
         return Response({
             'success': True,
@@ -234,4 +233,4 @@ class GetCartSummaryView(BaseCartView):
                 'item_count': len(items)
             },
             'message': 'Cart summary retrieved successfully'
-        })
\ No newline at end of file
+        })
@@ -13,7 +13,7 @@ class CouponAdmin(admin.ModelAdmin):
 
 @admin.register(CouponUsage)
 class CouponUsageAdmin(admin.ModelAdmin):
-    list_display = ['user', 'coupon', 'used_at']
+    list_display = ['user', 'guest_id', 'coupon', 'used_at']
     list_filter = ['used_at', 'coupon']
     search_fields = ['user__username', 'user__email', 'coupon__code']
     readonly_fields = ['used_at']
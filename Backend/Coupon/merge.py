@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models import F
+
+from .models import Coupon, CouponUsage
+
+
+def merge_guest_coupons(guest_id, user_id):
+    """
+    Hand a guest's coupon usages over to the user. A coupon both of them
+    used counts once: the guest's usage is dropped and the coupon's use
+    given back. Returns the number of usages handed over.
+    """
+    usages = CouponUsage.objects.filter(guest_id=guest_id)
+    duplicates = list(
+        usages
+        .filter(coupon__in=CouponUsage.objects.filter(user_id=user_id).values('coupon'))
+        .values_list('coupon_id', flat=True)
+    )
+    if duplicates:
+        with transaction.atomic():
+            usages.filter(coupon_id__in=duplicates).delete()
+            Coupon.objects.filter(pk__in=duplicates, used_count__gt=0).update(used_count=F('used_count') - 1)
+    return usages.update(user_id=user_id, guest_id=None)
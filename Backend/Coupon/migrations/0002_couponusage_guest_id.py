@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Coupon', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='couponusage',
+            name='guest_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='coupon',
+            name='code',
+            field=models.CharField(help_text='Coupon code that users will enter ALWAYS IN UPPERCASE', max_length=50, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='couponusage',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='couponusage',
+            unique_together={('guest_id', 'coupon'), ('user', 'coupon')},
+        ),
+        migrations.AddConstraint(
+            model_name='couponusage',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('guest_id__isnull', True), ('user__isnull', False)), models.Q(('guest_id__isnull', False), ('user__isnull', True)), _connector='OR'), name='couponusage_user_xor_guest'),
+        ),
+    ]
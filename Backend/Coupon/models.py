@@ -47,8 +47,8 @@ class Coupon(models.Model):
         return self.is_active and self.remaining_count > 0
     
     def can_be_used_by_user(self, user):
-        """Check if user can use this coupon (hasn't used it before)"""
-        return not CouponUsage.objects.filter(user=user, coupon=self).exists()
+        """Check if user (or guest) can use this coupon (hasn't used it before)"""
+        return not CouponUsage.objects.filter(**usage_owner(user), coupon=self).exists()
     
     def apply_discount(self, cart_total):
         """Apply discount to cart total and return discounted amount"""
@@ -62,15 +62,34 @@ class Coupon(models.Model):
         return discount_amount
 
 
+def usage_owner(user):
+    """CouponUsage lookup for a user, or for a guest (GuestUser) before they log in"""
+    if getattr(user, 'is_guest', False):
+        return {'guest_id': user.guest_id}
+    return {'user_id': user.pk}
+
+
 class CouponUsage(models.Model):
-    """Track which users have used which coupons"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    """Track which users (or guests, until they log in) have used which coupons"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    guest_id = models.CharField(max_length=64, null=True, blank=True)
     coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE)
     used_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        unique_together = ['user', 'coupon']  # One user can use one coupon only once
+        # One user (or guest) can use one coupon only once
+        unique_together = [['user', 'coupon'], ['guest_id', 'coupon']]
         ordering = ['-used_at']
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(user__isnull=False, guest_id__isnull=True)
+                    | models.Q(user__isnull=True, guest_id__isnull=False)
+                ),
+                name='couponusage_user_xor_guest',
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} used {self.coupon.code} on {self.used_at}"
\ No newline at end of file
+        owner = f"Guest {self.guest_id}" if self.guest_id else self.user.username
+        return f"{owner} used {self.coupon.code} on {self.used_at}"
\ No newline at end of file
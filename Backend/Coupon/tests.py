@@ -1,3 +1,47 @@
-from django.test import TestCase
+from Backend.testing import PerformanceTestCase, bearer, create_user, guest_bearer, seed_cart, seed_catalog, seed_coupons
+from .models import CouponUsage
 
-# Create your tests here.
\ No newline at end of file
+
+class CouponQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        products = seed_catalog(products=500)
+        cls.user = create_user()
+        seed_cart(products, lines=80, user=cls.user)
+        seed_cart(products, lines=80, guest_id='c' * 32)
+        cls.coupons = seed_coupons(count=200, user=cls.user, used=60)
+
+    def setUp(self):
+        super().setUp()
+        self.auth = bearer(self.user)
+
+    def test_validate(self):
+        self.assertBudget('post', '/coupon/validate/', 3, {'code': 'SAVE100'}, **self.auth)
+
+    def test_apply_and_remove(self):
+        self.assertBudget('post', '/coupon/apply/', 7, {'code': 'SAVE100'}, **self.auth)
+        self.assertBudget('post', '/coupon/remove/', 5, {'code': 'SAVE100'}, **self.auth)
+
+    def test_history(self):
+        self.assertBudget('get', '/coupon/history/', 1, **self.auth)
+
+    def test_list(self):
+        self.assertBudget('get', '/coupon/list/', 1, **self.auth)
+
+
+    def test_guests(self):
+        auth = guest_bearer('c' * 32)
+        self.assertBudget('post', '/coupon/validate/', 3, {'code': 'SAVE100'}, **auth)
+        self.assertBudget('post', '/coupon/apply/', 7, {'code': 'SAVE100'}, **auth)
+        self.assertEqual(CouponUsage.objects.get(coupon__code='SAVE100', guest_id='c' * 32).user_id, None)
+        self.assertBudget('post', '/coupon/apply/', 2, {'code': 'SAVE100'}, status=400, **auth)
+
+        summary = self.assertBudget('get', '/cart/summary/', 5, **auth)
+        self.assertEqual(summary.data['data']['applied_coupon']['code'], 'SAVE100')
+        self.assertBudget('get', '/coupon/history/', 1, **auth)
+        self.assertBudget('post', '/coupon/remove/', 5, {'code': 'SAVE100'}, **auth)
+        self.assertFalse(CouponUsage.objects.filter(guest_id='c' * 32).exists())
+
+    def test_anonymous(self):
+        self.assertBudget('post', '/coupon/apply/', 0, {'code': 'SAVE100'}, status=401)
@@ -1,20 +1,20 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.db import transaction
-from .models import Coupon, CouponUsage
+from .models import Coupon, CouponUsage, usage_owner
 from .serializers import CouponSerializer, CouponValidationSerializer, CouponUsageSerializer
 from Cart.models import Cart, CartItem
+from Cart.permissions import IsAuthenticatedOrGuest
 from Cart.serializers import CartItemSerializer
+from Cart.totals import cart_total
 from Product.models import Product
-from decimal import Decimal
 
 
 class ValidateCouponView(APIView):
     """API to validate coupon code and check if user can use it"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticatedOrGuest]
     
     def post(self, request):
         code = request.data.get('code', '').strip().upper()
@@ -79,19 +79,13 @@ class ValidateCouponView(APIView):
     
     def calculate_cart_total(self, user):
         """Calculate total cart amount"""
-        try:
-            cart = Cart.objects.get(user=user)
-            total = Decimal('0')
-            for item in cart.items.all():
-                total += item.product.price * item.quantity
-            return total
-        except Cart.DoesNotExist:
-            return Decimal('0')
+        return cart_total(**usage_owner(user))
 
 
 class ApplyCouponView(APIView):
     """API to apply coupon to cart"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticatedOrGuest]
+    throttle_scope = 'coupon_apply'
     
     def post(self, request):
         code = request.data.get('code', '').strip().upper()
@@ -137,7 +131,7 @@ class ApplyCouponView(APIView):
         try:
             with transaction.atomic():
                 # Create coupon usage record
-                CouponUsage.objects.create(user=request.user, coupon=coupon)
+                CouponUsage.objects.create(**usage_owner(request.user), coupon=coupon)
                 
                 # Update coupon used count
                 coupon.used_count += 1
@@ -169,19 +163,12 @@ class ApplyCouponView(APIView):
     
     def calculate_cart_total(self, user):
         """Calculate total cart amount"""
-        try:
-            cart = Cart.objects.get(user=user)
-            total = Decimal('0')
-            for item in cart.items.all():
-                total += item.product.price * item.quantity
-            return total
-        except Cart.DoesNotExist:
-            return Decimal('0')
+        return cart_total(**usage_owner(user))
 
 
 class RemoveCouponView(APIView):
     """API to remove applied coupon (if user hasn't completed checkout)"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticatedOrGuest]
     
     def post(self, request):
         code = request.data.get('code', '').strip().upper()
@@ -193,7 +180,7 @@ class RemoveCouponView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            coupon_usage = CouponUsage.objects.get(user=request.user, coupon__code=code)
+            coupon_usage = CouponUsage.objects.select_related('coupon').get(**usage_owner(request.user), coupon__code=code)
         except CouponUsage.DoesNotExist:
             return Response({
                 'success': False,
@@ -224,10 +211,10 @@ class RemoveCouponView(APIView):
 
 class CouponUsageHistoryView(APIView):
     """API to get user's coupon usage history"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticatedOrGuest]
     
     def get(self, request):
-        coupon_usages = CouponUsage.objects.filter(user=request.user).order_by('-used_at')
+        coupon_usages = CouponUsage.objects.filter(**usage_owner(request.user)).select_related('coupon', 'user').order_by('-used_at')
         serializer = CouponUsageSerializer(coupon_usages, many=True)
         
         return Response({
@@ -239,7 +226,7 @@ class CouponUsageHistoryView(APIView):
 
 class CouponListView(APIView):
     """API to list all active coupons (for admin or public view)"""
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticatedOrGuest]
     
     def get(self, request):
         coupons = Coupon.objects.filter(is_active=True).order_by('-created_at')
@@ -1,3 +1,101 @@
-from django.test import TestCase
+import re
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.staticfiles import finders
+from django.test import TestCase, override_settings
+
+from Backend.storage import StaticFilesStorage
+from Backend.testing import PerformanceTestCase, seed_catalog
+from Product.models import ProductImage, RelatedProduct
+
+
+def write_static_manifest(directory):
+    """The manifest collectstatic would write to `directory`, without copying or compressing files"""
+    storage = StaticFilesStorage(location=directory)
+    for finder in finders.get_finders():
+        for path, source_storage in finder.list(['CVS', '.*', '*~']):
+            with source_storage.open(path) as content:
+                storage.hashed_files[storage.hash_key(path)] = storage.hashed_name(path, content)
+    storage.save_manifest()
+
+
+class PageQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(products=2000)
+        product = cls.products[0]
+        RelatedProduct.objects.bulk_create([
+            RelatedProduct(product=product, related=related, score=index, rank=index) for index, related in enumerate(cls.products[1:9])
+        ])
+
+    def test_static_pages(self):
+        # home-02/ and home-03/ are unlinked template demos that do not render
+        for path in ['/blog/', '/contact/', '/about/', '/blog-detail/1/', '/cart/', '/checkout/']:
+            self.assertBudget('get', path, 0)
+
+    def test_home(self):
+        # The overview renders every active product, 2000 here
+        self.assertBudget('get', '/', 4, ms=3000)
+
+    def test_product_pages(self):
+        # The category tabs come from the facets, cached under the catalog version
+        self.assertBudget('get', '/product/', 5)
+        # Facets are cached by the first request
+        self.assertBudget('get', '/product/?page=50', 4)
+        self.assertBudget('get', f'/product-detail/?id={self.products[0].pk}', 4)
+
+    def test_add_to_cart(self):
+        self.assertBudget('post', '/api/add-to-cart/', 1, {'product_id': self.products[0].pk})
+
+    def test_oauth_redirects(self):
+        # The start view stores the return URL in the session, which the
+        # callback reads back (from the database without a shared cache)
+        self.assertBudget('get', '/oauth/google/start/?return_url=/cart/', 4, status=302)
+        self.assertBudget('get', '/oauth/google/callback/', 1, status=302)
+
+    def test_responsive_images(self):
+        image = ProductImage.objects.filter(product=self.products[1]).order_by('order').first()
+        base = image.image.name.rsplit('.', 1)[0]
+        image.variants = {
+            'source': image.image.name, 'width': 640, 'height': 640,
+            'sizes': [{'width': 320, 'height': 320, 'webp': f'{base}_320w.webp', 'jpeg': f'{base}_320w.jpeg'}],
+        }
+        image.save()
+
+        content = self.client.get(f'/product-detail/?id={self.products[0].pk}').content.decode()
+        self.assertInHTML(f'<source type="image/webp" srcset="/media/{base}_320w.webp 320w" sizes="(max-width: 575px) 100vw, (max-width: 991px) 50vw, 25vw">', content)
+        self.assertIn(f'<img src="/media/{image.image.name}" srcset="/media/{base}_320w.jpeg 320w"', content)
+        # Images without derivatives keep a plain <img>
+        self.assertEqual(content.count('<source '), 1)
+
+
+class ManifestStaticFilesTests(TestCase):
+    """Pages as served in production: DEBUG off and {% static %} looked up in the manifest"""
+
+    hashed_placeholder = re.compile(r'/static/images/no-image\.[0-9a-f]{12}\.jpg')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory)
+        write_static_manifest(directory)
+        cls.enterClassContext(override_settings(DEBUG=False, STATIC_ROOT=directory))
+
+    def test_product_without_images(self):
+        product = seed_catalog(products=1, categories=1, images_per_product=0)[0]
+        response = self.client.get(f'/product-detail/?id={product.pk}')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.content.decode(), self.hashed_placeholder)
+
+    def test_related_product_without_images(self):
+        product, related = seed_catalog(products=2, categories=1, images_per_product=1)
+        related.images.all().delete()
+        RelatedProduct.objects.create(product=product, related=related, score=1.0, rank=1)
+
+        response = self.client.get(f'/product-detail/?id={product.pk}')
+        self.assertEqual(response.status_code, 200)
+        # Only the "Frequently Bought Together" card needs the placeholder
+        self.assertEqual(len(self.hashed_placeholder.findall(response.content.decode())), 1)
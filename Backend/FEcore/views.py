@@ -7,6 +7,7 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth import login
 from django.core.paginator import Paginator
 from Product.models import Product
+from Product.facets import get_catalog_facets
 import os
 import json
 import secrets
@@ -22,10 +23,10 @@ class HomeView(View): #done
         api_url = api_url.rstrip('/')
         
         # Fetch new arrival products
-        new_arrivals = Product.objects.filter(is_active=True, is_new=True).select_related('category').prefetch_related('images').order_by('-created_at')[:8]
+        new_arrivals = Product.objects.filter(is_active=True, is_new=True).with_effective_price().select_related('category').prefetch_related('images').order_by('-created_at')[:8]
         
         # Fetch all active products for Product Overview section
-        all_products = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images').order_by('-created_at')
+        all_products = Product.objects.filter(is_active=True).with_effective_price().select_related('category').prefetch_related('images').order_by('-created_at')
         
         context = {
             'base_url': api_url,
@@ -88,7 +89,7 @@ class ProductDetailView(View): #done
         try:
             # Fetch product with related data
             print(f"DEBUG: Attempting to fetch product with ID: {product_id}")
-            product = Product.objects.select_related('category').prefetch_related('images').get(
+            product = Product.objects.with_effective_price().select_related('category').prefetch_related('images').get(
                 id=product_id, 
                 is_active=True
             )
@@ -113,7 +114,7 @@ class ProductDetailView(View): #done
                 'is_on_sale': product.is_on_sale,
                 'is_new': product.is_new,
                 'percentage_discount': str(product.percentage_discount) if product.percentage_discount else "0.00",
-                'discounted_price': float(product.get_discounted_price()) if product.is_on_sale else None,
+                'discounted_price': float(product.effective_price) if product.is_on_sale else None,
                 'rating': str(product.rating) if product.rating else "0.00",
                 'total_reviews': product.total_reviews,
                 'images': [
@@ -124,12 +125,18 @@ class ProductDetailView(View): #done
                         'order': img.order,
                         'is_active': img.is_active
                     }
-                    for img in product.images.filter(is_active=True).order_by('order')
+                    # From the prefetched images rather than another query
+                    for img in sorted(product.images.all(), key=lambda img: img.order)
+                    if img.is_active
                 ]
             }
             
             print(f"DEBUG: Product data prepared: {product_data}")
-            context = {'product': product_data, 'product_id': product_id, 'debug': True}
+            
+            # Frequently bought together, from the offline co-occurrence table
+            related_products = product.get_related_products(limit=4).prefetch_related('images')
+            
+            context = {'product': product_data, 'product_id': product_id, 'debug': True, 'related_products': related_products}
             return render(request, 'product-detail.html', context)
             
         except Product.DoesNotExist:
@@ -164,7 +171,7 @@ class ProductView(View): #done
         api_url = api_url.rstrip('/')
         
         # Fetch all active products with related data
-        products_queryset = Product.objects.filter(is_active=True).select_related('category').prefetch_related('images').order_by('-created_at')
+        products_queryset = Product.objects.filter(is_active=True).with_effective_price().select_related('category').prefetch_related('images').order_by('-created_at')
         
         # Implement pagination - 12 products per page
         paginator = Paginator(products_queryset, 12)
@@ -173,8 +180,8 @@ class ProductView(View): #done
         
         
         
-        # Get categories for filtering
-        categories = Product.objects.filter(is_active=True).values_list('category__name', flat=True).distinct()
+        # Get categories for filtering from the cached catalog facets
+        categories = [category['name'] for category in get_catalog_facets()['categories']]
         
         context = {
             'base_url': api_url,
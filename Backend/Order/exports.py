@@ -0,0 +1,30 @@
+"""
+Order export for analytics (see Backend/exports.py).
+"""
+from Backend.exports import EXPORT_CHUNK_SIZE, batched
+
+from .models import Order
+
+ORDER_EXPORT_FIELDS = (
+    'id', 'created_at', 'status', 'user_id', 'total_amount',
+    'items__product_id', 'items__product__name', 'items__quantity', 'items__price',
+)
+
+ORDER_COLUMNS = (
+    'order_id', 'created_at', 'status', 'user_id', 'total_amount',
+    'product_id', 'product_name', 'quantity', 'price',
+)
+
+
+def order_batches(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Rows of ORDER_COLUMNS, one per order line, ordered by order. An order
+    without lines still gets a row, its product columns empty.
+    """
+    rows = (
+        Order.objects
+        .order_by('id', 'items__id')
+        .values_list(*ORDER_EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    return batched(rows, chunk_size)
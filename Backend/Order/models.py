@@ -8,6 +8,10 @@ class Order(models.Model):
     status = models.CharField(max_length=20, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Best-seller rankings read orders by creation date
+        indexes = [models.Index(fields=['created_at'])]
+
     def __str__(self):
         return f"Order {self.id} - {self.user.username}"
 
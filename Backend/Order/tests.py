@@ -1,3 +1,62 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from Backend.testing import PerformanceTestCase, bearer, create_user, seed_catalog, seed_orders
+from .exports import ORDER_COLUMNS
+from .models import OrderItem
+
+
+class OrderQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        products = seed_catalog(products=300)
+        cls.user = create_user()
+        cls.orders = seed_orders(cls.user, products, orders=40, items_per_order=8)
+        seed_orders(create_user('other'), products, orders=40)
+        cls.staff = create_user('staff', is_staff=True)
+
+    def setUp(self):
+        super().setUp()
+        self.auth = bearer(self.user)
+        self.staff_auth = bearer(self.staff)
+
+    def test_orders(self):
+        self.assertBudget('get', '/order/orders/', 4, **self.auth)
+        self.assertBudget('get', f'/order/orders/{self.orders[0].pk}/', 3, **self.auth)
+
+    def test_items(self):
+        self.assertBudget('get', '/order/items/', 3, **self.auth)
+        item = self.orders[0].items.first()
+        self.assertBudget('get', f'/order/items/{item.pk}/', 2, **self.auth)
+
+    def test_order_writes(self):
+        response = self.assertBudget('post', '/order/orders/', 3, {
+            'user': self.user.pk, 'total_amount': '45.00', 'status': 'pending',
+        }, status=201, **self.auth)
+        path = f"/order/orders/{response.data['id']}/"
+        # Items are prefetched again for the response after the update
+        self.assertBudget('patch', path, 4, {'status': 'cancelled'}, **self.auth)
+        self.assertBudget('delete', path, 4, status=204, **self.auth)
+
+    # The nested product is read-only, so items are created with their order
+    def test_item_writes(self):
+        path = f'/order/items/{self.orders[0].items.first().pk}/'
+        self.assertBudget('patch', path, 3, {'quantity': 3}, **self.auth)
+        self.assertBudget('delete', path, 3, status=204, **self.auth)
+
+    def test_export(self):
+        self.assertBudget('get', '/order/export/', 1, status=403, **self.auth)
+
+        response, content = self.assertStreamBudget('/order/export/?format=jsonl', 2, **self.staff_auth)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="orders.jsonl"')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), OrderItem.objects.count())
+        self.assertEqual(tuple(rows[0]), ORDER_COLUMNS)
+        self.assertEqual(rows[0]['total_amount'], '100.00')
+
+    async def test_export_streams_asynchronously(self):
+        # Under ASGI the rows are read a batch at a time, not buffered first
+        response = await self.async_client.get('/order/export/', headers={'Authorization': self.staff_auth['HTTP_AUTHORIZATION']})
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content.decode().splitlines()[0], ','.join(ORDER_COLUMNS))
@@ -8,4 +8,5 @@ router.register(r'items', views.OrderItemViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('export/', views.OrderExportView.as_view(), name='order-export'),
 ]
@@ -1,4 +1,10 @@
+from django.db.models import Prefetch
 from rest_framework import viewsets
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from Backend.custom_auth import CachedJWTAuthentication, CsrfExemptSessionAuthentication
+from Backend.exports import EXPORT_RENDERERS, export_response
+from .exports import ORDER_COLUMNS, order_batches
 from .models import Order, OrderItem
 from .serializers import OrderSerializer, OrderItemSerializer
 
@@ -7,11 +13,32 @@ class OrderViewSet(viewsets.ModelViewSet):
     serializer_class = OrderSerializer
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return Order.objects.filter(user_id=self.request.user.id).prefetch_related(
+            Prefetch('items', queryset=OrderItem.objects.select_related('product__category')),
+            'items__product__images',
+        )
 
 class OrderItemViewSet(viewsets.ModelViewSet):
     queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
 
     def get_queryset(self):
-        return OrderItem.objects.filter(order__user=self.request.user)
+        return (
+            OrderItem.objects.filter(order__user_id=self.request.user.id)
+            .select_related('product__category')
+            .prefetch_related('product__images')
+        )
+
+
+class OrderExportView(APIView):
+    """
+    Every order line as CSV or JSON Lines, streamed, for analytics. Staff only.
+    Example: /order/export/?format=csv
+    """
+    # IsAdminUser checks is_staff, which needs the full User model
+    authentication_classes = [CachedJWTAuthentication, CsrfExemptSessionAuthentication]
+    permission_classes = [IsAdminUser]
+    renderer_classes = EXPORT_RENDERERS
+
+    def get(self, request):
+        return export_response(request, ORDER_COLUMNS, order_batches(), 'orders')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Product, Category, ProductImage
+from .models import Product, Category, ProductImage, BestSellerRank
 # Register your models here.
 
 @admin.register(Product)
@@ -11,6 +11,14 @@ class ProductAdmin(admin.ModelAdmin):
     list_editable = ('price', 'quantity')
     list_display_links = ('name', 'category', 'created_at', 'is_active', 'is_featured', 'is_on_sale', 'is_new')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_effective_price()
+
+    def get_discounted_price(self, obj):
+        return obj.effective_price
+    get_discounted_price.short_description = 'Discounted price'
+    get_discounted_price.admin_order_field = 'effective_price'
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -28,3 +36,12 @@ class ProductImageAdmin(admin.ModelAdmin):
     list_per_page = 20
     list_editable = ('order', 'is_active')
     list_display_links = ('id', 'product', 'alt_text')
+
+
+@admin.register(BestSellerRank)
+class BestSellerRankAdmin(admin.ModelAdmin):
+    list_display = ('rank', 'product', 'window_days', 'units_sold', 'computed_at')
+    list_filter = ('window_days',)
+    search_fields = ('product__name',)
+    list_per_page = 50
+    ordering = ('window_days', 'rank')
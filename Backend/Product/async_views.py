@@ -0,0 +1,42 @@
+"""
+Async versions of the product list, search and filter endpoints (see
+Backend/async_views.py), routed in place of the DRF views when
+ASYNC_VIEWS is on.
+"""
+from Backend.async_views import AsyncListView
+
+from .projections import aproject_products, product_values
+from .signals import CATALOG_NAMESPACE
+from .views import ProductFilterView, ProductSearchView, ProductViewSet
+
+
+class AsyncProductListView(AsyncListView):
+    # As the router builds it
+    sync_view = ProductViewSet.as_view({'get': 'list', 'post': 'create'}, basename='product', detail=False, suffix='List')
+    namespaces = (CATALOG_NAMESPACE,)
+
+    def get_queryset(self, view):
+        return product_values(super().get_queryset(view))
+
+    async def project(self, rows, request):
+        return await aproject_products(rows)
+
+
+class AsyncProductSearchView(AsyncProductListView):
+    sync_view = ProductSearchView.as_view()
+
+    def get_queryset(self, view):
+        # Like ProductSearchView.list(), which applies no filter backends
+        invalid = view.invalid_params_response()
+        if invalid is not None:
+            return invalid
+        return product_values(view.get_queryset())
+
+    def get_paginated_response(self, view, data):
+        response = super().get_paginated_response(view, data)
+        response.data.update(view.get_response_extras())
+        return response
+
+
+class AsyncProductFilterView(AsyncProductSearchView):
+    sync_view = ProductFilterView.as_view()
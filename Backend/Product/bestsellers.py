@@ -0,0 +1,95 @@
+"""
+Best-seller rankings.
+
+Every run re-aggregates the daily sales of the widest window from the
+orders created in it, then ranks each window from those daily totals. An
+order that commits after later ones, or is cancelled or refunded after it
+was counted, is therefore reflected by the next run.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from Backend.versioning import bump_version
+from Order.models import OrderItem
+from .models import BestSellerRank, ProductSalesDaily
+from .signals import CATALOG_NAMESPACE
+
+BEST_SELLER_WINDOWS = [window for window, _ in BestSellerRank.WINDOW_CHOICES]
+DEFAULT_BEST_SELLER_WINDOW = 30
+
+# Only this many products are kept per window; deeper pages are never browsed
+BEST_SELLER_RANK_LIMIT = 500
+
+# Orders in these states never count towards sales
+EXCLUDED_ORDER_STATUSES = ['cancelled', 'refunded']
+
+
+def day_start(day):
+    """Midnight at the start of `day` in the current time zone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_daily_sales(today=None):
+    """
+    Replace the daily sales table with the units sold per product and day
+    over the widest window, from the orders created in it. Returns the
+    number of (product, day) rows written.
+    """
+    today = today or timezone.localdate()
+    since = today - timedelta(days=max(BEST_SELLER_WINDOWS) - 1)
+    sales = (
+        OrderItem.objects
+        .filter(order__created_at__gte=day_start(since), order__created_at__lt=day_start(today + timedelta(days=1)))
+        .exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+        .annotate(day=TruncDate('order__created_at'))
+        .values('product_id', 'day')
+        .annotate(units=Sum('quantity'))
+        .order_by()
+    )
+    rows = [ProductSalesDaily(product_id=row['product_id'], day=row['day'], units_sold=row['units']) for row in sales]
+
+    with transaction.atomic():
+        # Days that fell out of the window go as well
+        ProductSalesDaily.objects.all().delete()
+        ProductSalesDaily.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def rebuild_rankings(today=None):
+    """Recompute the ranking table of every window from the daily sales table"""
+    today = today or timezone.localdate()
+
+    with transaction.atomic():
+        for window in BEST_SELLER_WINDOWS:
+            since = today - timedelta(days=window - 1)
+            totals = (
+                ProductSalesDaily.objects
+                .filter(day__gte=since, product__is_active=True)
+                .values('product_id')
+                .annotate(units=Sum('units_sold'))
+                .order_by('-units', 'product_id')[:BEST_SELLER_RANK_LIMIT]
+            )
+            BestSellerRank.objects.filter(window_days=window).delete()
+            BestSellerRank.objects.bulk_create([
+                BestSellerRank(
+                    product_id=row['product_id'],
+                    window_days=window,
+                    rank=position,
+                    units_sold=row['units'],
+                )
+                for position, row in enumerate(totals, start=1)
+            ], batch_size=500)
+
+    # The best_selling filter reads the ranking table
+    bump_version(CATALOG_NAMESPACE)
+
+
+def update_best_sellers(today=None):
+    """Daily sales rebuild followed by a ranking rebuild"""
+    touched = rebuild_daily_sales(today=today)
+    rebuild_rankings(today=today)
+    return touched
@@ -0,0 +1,52 @@
+"""
+Catalog export for feeds and analytics (see Backend/exports.py).
+"""
+from decimal import Decimal
+
+from Backend.exports import EXPORT_CHUNK_SIZE, batched
+
+from .models import Product, ProductImage
+
+PRODUCT_EXPORT_FIELDS = (
+    'id', 'name', 'category__name', 'price', 'effective_price', 'percentage_discount', 'is_on_sale',
+    'quantity', 'is_active', 'is_featured', 'is_new', 'rating', 'total_reviews', 'created_at',
+)
+
+EFFECTIVE_PRICE = PRODUCT_EXPORT_FIELDS.index('effective_price')
+CENTS = Decimal('0.01')
+
+PRODUCT_COLUMNS = (
+    'id', 'name', 'category', 'price', 'effective_price', 'percentage_discount', 'is_on_sale',
+    'quantity', 'is_active', 'is_featured', 'is_new', 'rating', 'total_reviews', 'created_at', 'image_urls',
+)
+
+
+def product_batches(chunk_size=EXPORT_CHUNK_SIZE, url=None):
+    """
+    Rows of PRODUCT_COLUMNS, every product ordered by id. `image_urls`
+    lists the active images in display order; `url` turns a stored image
+    name into its URL (storage URLs by default).
+    """
+    url = url or ProductImage._meta.get_field('image').storage.url
+    rows = (
+        Product.objects.with_effective_price()
+        .order_by('id')
+        .values_list(*PRODUCT_EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for batch in batched(rows, chunk_size):
+        # The batch holds every product between its first and last id, so
+        # a range finds their images without one parameter per product
+        images = {}
+        for product_id, name in (
+            ProductImage.objects
+            .filter(product_id__gte=batch[0][0], product_id__lte=batch[-1][0], is_active=True)
+            .order_by('product_id', 'order', 'id')
+            .values_list('product_id', 'image')
+        ):
+            images.setdefault(product_id, []).append(url(name))
+        # SQLite returns the computed price unscaled (855 rather than 855.00)
+        yield [
+            (*row[:EFFECTIVE_PRICE], row[EFFECTIVE_PRICE].quantize(CENTS), *row[EFFECTIVE_PRICE + 1:], images.get(row[0], []))
+            for row in batch
+        ]
@@ -0,0 +1,93 @@
+from django.db.models import Count, Q
+
+from Backend.caching import get_cache, get_or_refresh
+from Backend.versioning import get_version
+from .models import Product
+from .signals import CATALOG_NAMESPACE
+
+# (min, max) ranges of the discounted price; max is exclusive and None means open-ended
+PRICE_BUCKETS = [
+    (0, 500),
+    (500, 1000),
+    (1000, 2500),
+    (2500, 5000),
+    (5000, None),
+]
+
+FLAG_FIELDS = {
+    'featured': 'is_featured',
+    'on_sale': 'is_on_sale',
+    'new': 'is_new',
+}
+
+FACETS_CACHE_TIMEOUT = 60 * 15
+
+
+def price_bucket_key(low, high):
+    return f'{low}-{high}' if high is not None else f'{low}+'
+
+
+def price_bucket_q(low, high):
+    q = Q(effective_price__gte=low)
+    if high is not None:
+        q &= Q(effective_price__lt=high)
+    return q
+
+
+def compute_facets():
+    """
+    Count active products per category, price bucket and flag in a single
+    grouped query: one row per category with conditional counts, summed here.
+    """
+    aggregates = {'total': Count('id')}
+    for flag, field in FLAG_FIELDS.items():
+        aggregates[flag] = Count('id', filter=Q(**{field: True}))
+    for low, high in PRICE_BUCKETS:
+        aggregates[f'price_{price_bucket_key(low, high)}'] = Count('id', filter=price_bucket_q(low, high))
+
+    rows = (
+        Product.objects
+        .filter(is_active=True)
+        .with_effective_price()
+        .values('category_id', 'category__name')
+        .annotate(**aggregates)
+        .order_by('category__name')
+    )
+
+    categories = []
+    flags = dict.fromkeys(FLAG_FIELDS, 0)
+    price_counts = dict.fromkeys((price_bucket_key(low, high) for low, high in PRICE_BUCKETS), 0)
+    total = 0
+    for row in rows:
+        categories.append({
+            'id': row['category_id'],
+            'name': row['category__name'],
+            'count': row['total'],
+        })
+        total += row['total']
+        for flag in flags:
+            flags[flag] += row[flag]
+        for key in price_counts:
+            price_counts[key] += row[f'price_{key}']
+
+    return {
+        'total': total,
+        'categories': categories,
+        'price_ranges': [
+            {
+                'key': price_bucket_key(low, high),
+                'min': low,
+                'max': high,
+                'count': price_counts[price_bucket_key(low, high)],
+            }
+            for low, high in PRICE_BUCKETS
+        ],
+        'flags': flags,
+    }
+
+
+def get_catalog_facets(version=None):
+    """Facet counts cached until the next catalog change (`version` when already looked up)"""
+    if version is None:
+        version = get_version(CATALOG_NAMESPACE)
+    return get_or_refresh(get_cache(CATALOG_NAMESPACE), f'facets:{version}', compute_facets, FACETS_CACHE_TIMEOUT)
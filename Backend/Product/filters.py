@@ -3,13 +3,23 @@ from .models import Product, Category
 
 class ProductFilter(django_filters.FilterSet):
     name = django_filters.CharFilter(lookup_expr='icontains')
-    price_min = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
-    price_max = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    # Price filters and ordering work on the discounted price; the queryset
+    # must come from Product.objects.with_effective_price()
+    price_min = django_filters.NumberFilter(field_name='effective_price', lookup_expr='gte')
+    price_max = django_filters.NumberFilter(field_name='effective_price', lookup_expr='lte')
     category = django_filters.CharFilter(field_name='category__name')
     is_featured = django_filters.BooleanFilter(field_name='is_featured')
     is_on_sale = django_filters.BooleanFilter(field_name='is_on_sale')
     created_after = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='gte')
     created_before = django_filters.DateTimeFilter(field_name='created_at', lookup_expr='lte')
+    ordering = django_filters.OrderingFilter(
+        fields=(
+            ('effective_price', 'price'),
+            ('created_at', 'created_at'),
+            ('rating', 'rating'),
+            ('name', 'name'),
+        )
+    )
     
     class Meta:
         model = Product
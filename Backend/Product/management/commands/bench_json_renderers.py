@@ -0,0 +1,79 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from Backend.renderers import FastJSONRenderer, orjson
+from Product.models import Category, Product, ProductImage
+from Product.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON rendering time of a product page with the stdlib and orjson renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100, help='Products per page (default: 100)')
+        parser.add_argument('--images', type=int, default=3, help='Images per product (default: 3)')
+        parser.add_argument('--iterations', type=int, default=200, help='Timed renders per renderer (default: 200)')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer falls back to the stdlib'))
+
+        # Build the page inside a transaction that is always rolled back
+        with transaction.atomic():
+            data = self.build_page(options['products'], options['images'])
+            transaction.set_rollback(True)
+
+        stdlib_output = JSONRenderer().render(data)
+        fast_output = FastJSONRenderer().render(data)
+        if stdlib_output != fast_output:
+            self.stdout.write(self.style.ERROR('Renderer outputs differ'))
+            return
+
+        self.stdout.write(
+            f"Page: {options['products']} products, {len(stdlib_output) / 1024:.1f} KiB of JSON, "
+            f"{options['iterations']} iterations"
+        )
+        for label, renderer in [('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())]:
+            elapsed = self.time_render(renderer, data, options['iterations'])
+            self.stdout.write(f"  {label:<18} {elapsed * 1000:8.3f} ms/page")
+
+    def build_page(self, product_count, image_count):
+        category = Category.objects.create(name='Benchmark', description='Benchmark category')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Benchmark product {index}',
+                description='Lorem ipsum dolor sit amet ' * 10,
+                price=Decimal('1999.99') + index,
+                quantity=index,
+                category=category,
+                is_on_sale=index % 2 == 0,
+                percentage_discount=Decimal('12.50'),
+                rating=Decimal('4.25'),
+                total_reviews=index,
+            )
+            for index in range(product_count)
+        ])
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image=f'products/images/benchmark_{index}.jpg', alt_text=product.name, order=index)
+            for product in products
+            for index in range(image_count)
+        ])
+
+        queryset = (
+            Product.objects.filter(category=category)
+            .with_effective_price()
+            .select_related('category')
+            .prefetch_related('images')
+            .order_by('id')
+        )
+        return ProductSerializer(queryset, many=True).data
+
+    def time_render(self, renderer, data, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            renderer.render(data)
+        return (time.perf_counter() - start) / iterations
@@ -0,0 +1,119 @@
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from Blog.models import BlogComment, BlogImage, BlogPost
+from Blog.projections import blog_post_values, project_blog_posts
+from Blog.serializers import BlogPostListSerializer
+from Product.models import Category, Product, ProductImage
+from Product.projections import product_values, project_products
+from Product.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare list serialization time of ModelSerializers and the values() projections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Products and blog posts per page (default: 100)')
+        parser.add_argument('--images', type=int, default=3, help='Images per row (default: 3)')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed runs per path (default: 50)')
+
+    def handle(self, *args, **options):
+        # Blog image URLs are absolute, so the request needs an allowed host
+        request = RequestFactory().get('/blog/posts/', HTTP_HOST=settings.ALLOWED_HOSTS[0])
+
+        # Everything runs inside a transaction that is always rolled back
+        with transaction.atomic():
+            products, posts = self.seed(options['rows'], options['images'])
+            cases = [
+                (
+                    'products',
+                    lambda: ProductSerializer(products, many=True).data,
+                    lambda: project_products(product_values(products)),
+                ),
+                (
+                    'blog posts',
+                    lambda: BlogPostListSerializer(posts, many=True, context={'request': request}).data,
+                    lambda: project_blog_posts(blog_post_values(posts), request),
+                ),
+            ]
+            for label, serializer_path, projection_path in cases:
+                self.compare(label, serializer_path, projection_path, options['iterations'])
+            transaction.set_rollback(True)
+
+    def compare(self, label, serializer_path, projection_path, iterations):
+        if JSONRenderer().render(serializer_path()) != JSONRenderer().render(projection_path()):
+            self.stdout.write(self.style.ERROR(f'{label}: projection output differs from the serializer'))
+            return
+
+        self.stdout.write(f'{label} ({iterations} iterations, queries included)')
+        for name, path in [('serializer', serializer_path), ('projection', projection_path)]:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                path()
+            elapsed = (time.perf_counter() - start) / iterations
+            self.stdout.write(f'  {name:<12} {elapsed * 1000:8.3f} ms/page')
+
+    def seed(self, row_count, image_count):
+        category = Category.objects.create(name='Benchmark', description='Benchmark category')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Benchmark product {index}',
+                description='Lorem ipsum dolor sit amet ' * 10,
+                price=Decimal('1999.99') + index,
+                quantity=index,
+                category=category,
+                is_on_sale=index % 2 == 0,
+                percentage_discount=Decimal('12.50'),
+                rating=Decimal('4.25'),
+                total_reviews=index,
+            )
+            for index in range(row_count)
+        ])
+        ProductImage.objects.bulk_create([
+            ProductImage(product=product, image=f'products/images/benchmark_{index}.jpg', alt_text=product.name, order=index)
+            for product in products
+            for index in range(image_count)
+        ])
+
+        author = User.objects.create_user(username='benchmark-author')
+        posts = BlogPost.objects.bulk_create([
+            BlogPost(
+                title=f'Benchmark post {index}',
+                slug=f'benchmark-post-{index}',
+                content='Lorem ipsum dolor sit amet ' * 40,
+                author=author,
+                tags='benchmark',
+            )
+            for index in range(row_count)
+        ])
+        BlogImage.objects.bulk_create([
+            BlogImage(blog=post, image=f'blog_images/benchmark_{index}.jpg', order=index)
+            for post in posts
+            for index in range(image_count)
+        ])
+        BlogComment.objects.bulk_create([
+            BlogComment(blog=post, user=author, comment='Benchmark comment')
+            for post in posts
+        ])
+
+        product_queryset = (
+            Product.objects.filter(category=category)
+            .with_effective_price()
+            .select_related('category')
+            .prefetch_related('images')
+            .order_by('id')
+        )
+        post_queryset = (
+            BlogPost.objects.filter(author=author)
+            .select_related('author')
+            .prefetch_related('images', 'comments')
+            .order_by('id')
+        )
+        return product_queryset, post_queryset
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from Product.recommendations import DEFAULT_TOP_K, build_related_products
+
+
+class Command(BaseCommand):
+    help = 'Rebuild frequently-bought-together recommendations from order and cart history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=DEFAULT_TOP_K,
+            help=f'Number of related products kept per product (default: {DEFAULT_TOP_K})',
+        )
+
+    def handle(self, *args, **options):
+        products = build_related_products(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f'Related products rebuilt for {products} products'))
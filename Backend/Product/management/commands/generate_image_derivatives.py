@@ -0,0 +1,66 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from Backend.imaging import render_derivatives
+from Backend.versioning import bump_version
+from Blog.models import BlogImage
+from Blog.signals import BLOG_NAMESPACE
+from Product.models import ProductImage
+from Product.signals import CATALOG_NAMESPACE
+
+IMAGE_MODELS = {
+    'product': (ProductImage, CATALOG_NAMESPACE),
+    'blog': (BlogImage, BLOG_NAMESPACE),
+}
+
+
+class Command(BaseCommand):
+    help = 'Backfill resized WebP/JPEG derivatives for product and blog images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=[*IMAGE_MODELS, 'all'], default='all', help='Images to process (default: all)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that are already current')
+
+    def handle(self, *args, **options):
+        labels = list(IMAGE_MODELS) if options['model'] == 'all' else [options['model']]
+        for label in labels:
+            model, namespace = IMAGE_MODELS[label]
+            pending = self.pending_images(model, options['force'])
+            if not pending:
+                self.stdout.write(f'{label}: nothing to do')
+                continue
+
+            done, failed = self.process(model, pending, options['workers'])
+            if done:
+                bump_version(namespace)
+            self.stdout.write(self.style.SUCCESS(f'{label}: {done} images processed, {failed} missing or unreadable'))
+
+    def pending_images(self, model, force):
+        rows = model.objects.exclude(image='').exclude(image__isnull=True).values_list('pk', 'image', 'variants')
+        return [
+            (pk, name)
+            for pk, name, variants in rows
+            if force or variants.get('source') != name
+        ]
+
+    def process(self, model, pending, workers):
+        # Forked workers must not share the parent's database connections;
+        # they only touch storage and the parent writes the results
+        connections.close_all()
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, workers), initializer=django.setup) as executor:
+            futures = {executor.submit(render_derivatives, name): pk for pk, name in pending}
+            for future in as_completed(futures):
+                variants = future.result()
+                model.objects.filter(pk=futures[future]).update(variants=variants)
+                if variants:
+                    done += 1
+                else:
+                    failed += 1
+        return done, failed
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from Product.bestsellers import BEST_SELLER_WINDOWS, update_best_sellers
+from Product.models import BestSellerRank
+
+
+class Command(BaseCommand):
+    help = 'Re-aggregate the daily sales of the widest window and rebuild the best-seller rankings'
+
+    def handle(self, *args, **options):
+        touched = update_best_sellers()
+        self.stdout.write(f"Daily sales rows rebuilt: {touched}")
+        for window in BEST_SELLER_WINDOWS:
+            count = BestSellerRank.objects.filter(window_days=window).count()
+            self.stdout.write(f"  {window}-day ranking: {count} products")
+        self.stdout.write(self.style.SUCCESS('Best-seller rankings updated'))
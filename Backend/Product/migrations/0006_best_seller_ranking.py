@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0005_remove_product_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollupState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_order_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BestSellerRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window_days', models.PositiveSmallIntegerField(choices=[(7, 'Last 7 days'), (30, 'Last 30 days'), (90, 'Last 90 days')])),
+                ('rank', models.PositiveIntegerField()),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='best_seller_ranks', to='Product.product')),
+            ],
+            options={
+                'ordering': ['window_days', 'rank'],
+                'indexes': [models.Index(fields=['window_days', 'rank'], name='Product_bes_window__b7df24_idx')],
+                'unique_together': {('window_days', 'product')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='Product.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='Product_pro_day_bd0ebd_idx')],
+                'unique_together': {('product', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0008_productimage_variants'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='SalesRollupState',
+        ),
+    ]
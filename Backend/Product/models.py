@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Cast
 from django.contrib.auth.models import User
 from django.urls import reverse
+
+from Backend.imaging import ResponsiveImageMixin
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
@@ -9,6 +13,27 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+class ProductQuerySet(models.QuerySet):
+    def with_effective_price(self):
+        """
+        Annotate `effective_price`: the price after the sale discount,
+        computed by the database so it can be filtered and ordered on.
+        """
+        price_field = DecimalField(max_digits=10, decimal_places=2)
+        # Float literals keep SQLite from doing integer division on whole prices
+        discounted = Cast(
+            F('price') * (Value(100.0) - F('percentage_discount')) / Value(100.0),
+            output_field=price_field,
+        )
+        return self.annotate(
+            effective_price=Case(
+                When(is_on_sale=True, then=discounted),
+                default=F('price'),
+                output_field=price_field,
+            )
+        )
+
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField()
@@ -24,6 +49,7 @@ class Product(models.Model):
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0)
     total_reviews = models.PositiveIntegerField(default=0)
 
+    objects = ProductQuerySet.as_manager()
    
     def __str__(self):
         return f"{self.name} - {self.id}"
@@ -33,6 +59,15 @@ class Product(models.Model):
             return self.price - (self.price * self.percentage_discount / 100)
         return self.price
     
+    def get_related_products(self, limit=None):
+        """Active products frequently bought together with this one, best first"""
+        queryset = Product.objects.filter(
+            is_active=True,
+            recommended_for__product=self,
+        ).with_effective_price().order_by('recommended_for__rank')
+        if limit:
+            queryset = queryset[:limit]
+        return queryset
     
 
     def validate_rating(self):
@@ -41,12 +76,65 @@ class Product(models.Model):
         return self.rating
     
 
-class ProductImage(models.Model):
+class ProductImage(ResponsiveImageMixin, models.Model):
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
     alt_text = models.CharField(max_length=200, blank=True, null=True)
     image = models.ImageField(upload_to='products/images/')
+    variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized derivatives of the image")
     order = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
-        return f"{self.product.name} - Image {self.id}"
\ No newline at end of file
+        return f"{self.product.name} - Image {self.id}"
+
+class ProductSalesDaily(models.Model):
+    """Units sold per product per day over the widest best-seller window, rebuilt from order items"""
+    product = models.ForeignKey(Product, related_name='daily_sales', on_delete=models.CASCADE)
+    day = models.DateField()
+    units_sold = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['product', 'day']
+        indexes = [models.Index(fields=['day'])]
+
+    def __str__(self):
+        return f"{self.product_id} - {self.day} ({self.units_sold})"
+
+
+class BestSellerRank(models.Model):
+    """Materialized best-seller ranking for a rolling window"""
+    WINDOW_CHOICES = [
+        (7, 'Last 7 days'),
+        (30, 'Last 30 days'),
+        (90, 'Last 90 days'),
+    ]
+
+    product = models.ForeignKey(Product, related_name='best_seller_ranks', on_delete=models.CASCADE)
+    window_days = models.PositiveSmallIntegerField(choices=WINDOW_CHOICES)
+    rank = models.PositiveIntegerField()
+    units_sold = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['window_days', 'product']
+        ordering = ['window_days', 'rank']
+        indexes = [models.Index(fields=['window_days', 'rank'])]
+
+    def __str__(self):
+        return f"#{self.rank} ({self.window_days}d) - {self.product_id}"
+
+
+class RelatedProduct(models.Model):
+    """Top-K frequently-bought-together neighbors of a product, built offline"""
+    product = models.ForeignKey(Product, related_name='related_links', on_delete=models.CASCADE)
+    related = models.ForeignKey(Product, related_name='recommended_for', on_delete=models.CASCADE)
+    score = models.FloatField(default=0)
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ['product', 'related']
+        ordering = ['product', 'rank']
+        indexes = [models.Index(fields=['product', 'rank'])]
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} (#{self.rank})"
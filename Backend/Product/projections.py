@@ -0,0 +1,112 @@
+"""
+Read-only fast path for product lists.
+
+Builds the exact ProductSerializer output from `.values()` rows and one
+image query per page, skipping model instantiation and per-row serializer
+machinery. Scalar formatting reuses the serializer's own fields so the
+rendered JSON stays byte-identical. aproject_products() makes the image
+query through the async ORM, for the views in Product/async_views.py.
+"""
+from functools import lru_cache
+
+from Backend.imaging import build_srcset
+
+from .models import ProductImage
+from .serializers import ProductSerializer
+
+PRODUCT_VALUE_FIELDS = (
+    'id', 'name', 'description', 'price', 'quantity',
+    'category__id', 'category__name', 'category__description', 'category__created_at',
+    'created_at', 'is_active', 'is_featured', 'is_on_sale', 'is_new',
+    'percentage_discount', 'effective_price', 'rating', 'total_reviews',
+)
+
+
+@lru_cache(maxsize=None)
+def _serializer_fields():
+    fields = ProductSerializer().fields
+    return fields, fields['category'].fields
+
+
+def product_values(queryset):
+    """
+    Rows for project_products(). The queryset must be annotated with
+    Product.objects.with_effective_price().
+    """
+    return queryset.prefetch_related(None).values(*PRODUCT_VALUE_FIELDS)
+
+
+def image_rows(product_ids):
+    return (
+        ProductImage.objects
+        .filter(product_id__in=product_ids)
+        .order_by('id')
+        .values_list('product_id', 'id', 'image', 'variants', 'alt_text', 'order', 'is_active')
+    )
+
+
+def group_images(rows):
+    url = ProductImage._meta.get_field('image').storage.url
+    images = {}
+    for product_id, image_id, name, variants, alt_text, order, is_active in rows:
+        images.setdefault(product_id, []).append({
+            'id': image_id,
+            'image': url(name) if name else None,
+            'srcset': build_srcset(variants, name, url),
+            'alt_text': alt_text,
+            'order': order,
+            'is_active': is_active,
+        })
+    return images
+
+
+def image_map(product_ids):
+    """All images of the given products, grouped by product id"""
+    return group_images(image_rows(product_ids))
+
+
+def project_products(rows):
+    """Plain dicts identical to ProductSerializer(many=True).data"""
+    rows = list(rows)
+    return build_products(rows, image_map([row['id'] for row in rows]))
+
+
+async def aproject_products(rows):
+    """project_products() for a list of rows, with the image query made through the async ORM"""
+    product_ids = [row['id'] for row in rows]
+    return build_products(rows, group_images([row async for row in image_rows(product_ids)]))
+
+
+def build_products(rows, images):
+    fields, category_fields = _serializer_fields()
+    price = fields['price'].to_representation
+    percentage_discount = fields['percentage_discount'].to_representation
+    rating = fields['rating'].to_representation
+    created_at = fields['created_at'].to_representation
+    category_created_at = category_fields['created_at'].to_representation
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'price': price(row['price']),
+            'quantity': row['quantity'],
+            'category': {
+                'id': row['category__id'],
+                'name': row['category__name'],
+                'description': row['category__description'],
+                'created_at': category_created_at(row['category__created_at']),
+            },
+            'created_at': created_at(row['created_at']),
+            'is_active': row['is_active'],
+            'is_featured': row['is_featured'],
+            'is_on_sale': row['is_on_sale'],
+            'is_new': row['is_new'],
+            'percentage_discount': percentage_discount(row['percentage_discount']),
+            'discounted_price': row['effective_price'],
+            'rating': rating(row['rating']),
+            'total_reviews': row['total_reviews'],
+            'images': images.get(row['id'], []),
+        }
+        for row in rows
+    ]
@@ -0,0 +1,102 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from itertools import combinations, groupby
+from operator import itemgetter
+
+from django.db import transaction
+
+from Backend.versioning import bump_version
+from Cart.models import CartItem
+from Order.models import OrderItem
+from .models import Product, RelatedProduct
+from .signals import CATALOG_NAMESPACE
+
+DEFAULT_TOP_K = 8
+
+# A purchase is a stronger signal than a product sitting in a cart
+ORDER_WEIGHT = 1.0
+CART_WEIGHT = 0.5
+
+# Huge baskets add quadratic pairs but say little about affinity
+MAX_BASKET_SIZE = 50
+
+
+def iter_baskets(queryset, basket_field):
+    """Yield the set of product ids in each basket (order or cart)"""
+    rows = (
+        queryset
+        .order_by(basket_field)
+        .values_list(basket_field, 'product_id')
+        .iterator(chunk_size=5000)
+    )
+    for _, items in groupby(rows, key=itemgetter(0)):
+        basket = {product_id for _, product_id in items}
+        if 1 < len(basket) <= MAX_BASKET_SIZE:
+            yield basket
+
+
+def count_cooccurrences(weighted_baskets):
+    """
+    Sparse co-occurrence counting: only pairs that were actually seen
+    together are stored. Returns (pair counts, per-product basket counts).
+    """
+    pair_counts = defaultdict(Counter)
+    product_counts = Counter()
+
+    for baskets, weight in weighted_baskets:
+        for basket in baskets:
+            for product_id in basket:
+                product_counts[product_id] += weight
+            for a, b in combinations(sorted(basket), 2):
+                pair_counts[a][b] += weight
+                pair_counts[b][a] += weight
+
+    return pair_counts, product_counts
+
+
+def top_neighbors(pair_counts, product_counts, top_k=DEFAULT_TOP_K, allowed_ids=None):
+    """
+    Rank neighbors by cosine similarity of their basket vectors so that
+    products in every basket do not dominate every list.
+    """
+    neighbors = {}
+    for product_id, counts in pair_counts.items():
+        scored = (
+            (weight / math.sqrt(product_counts[product_id] * product_counts[other]), other)
+            for other, weight in counts.items()
+            if allowed_ids is None or other in allowed_ids
+        )
+        best = heapq.nlargest(top_k, scored)
+        if best:
+            neighbors[product_id] = best
+    return neighbors
+
+
+def build_related_products(top_k=DEFAULT_TOP_K):
+    """
+    Rebuild the related-products table from order and cart co-occurrence.
+    Returns the number of products that received recommendations.
+    """
+    pair_counts, product_counts = count_cooccurrences([
+        (iter_baskets(OrderItem.objects.all(), 'order_id'), ORDER_WEIGHT),
+        (iter_baskets(CartItem.objects.all(), 'cart_id'), CART_WEIGHT),
+    ])
+    active_ids = set(Product.objects.filter(is_active=True).values_list('id', flat=True))
+    neighbors = top_neighbors(pair_counts, product_counts, top_k=top_k, allowed_ids=active_ids)
+
+    links = [
+        RelatedProduct(product_id=product_id, related_id=related_id, score=score, rank=rank)
+        for product_id, best in neighbors.items()
+        if product_id in active_ids
+        for rank, (score, related_id) in enumerate(best, start=1)
+    ]
+
+    with transaction.atomic():
+        RelatedProduct.objects.all().delete()
+        RelatedProduct.objects.bulk_create(links, batch_size=1000)
+
+    # Product detail responses embed the related products
+    bump_version(CATALOG_NAMESPACE)
+
+    return len({link.product_id for link in links})
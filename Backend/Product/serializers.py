@@ -9,16 +9,20 @@ class CategorySerializer(serializers.ModelSerializer):
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ProductImage
-        fields = ['id', 'image', 'alt_text', 'order', 'is_active']
+        fields = ['id', 'image', 'srcset', 'alt_text', 'order', 'is_active']
     
     def get_image(self, obj):
         if obj.image:
             return obj.image.url
         return None
 
+    def get_srcset(self, obj):
+        return obj.get_srcset()
+
 class ProductSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     discounted_price = serializers.SerializerMethodField()
@@ -33,6 +37,11 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
     
     def get_discounted_price(self, obj):
+        # Precomputed by Product.objects.with_effective_price(); products
+        # nested in carts, orders and reviews fall back to the model method
+        effective_price = getattr(obj, 'effective_price', None)
+        if effective_price is not None:
+            return effective_price
         return obj.get_discounted_price()
     
     def get_image_url(self, obj):
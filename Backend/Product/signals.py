@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Backend.versioning import bump_version
+from TaskQueue.queue import enqueue
+from .models import Category, Product, ProductImage
+
+CATALOG_NAMESPACE = 'catalog'
+
+
+@receiver(post_save, sender=ProductImage)
+def queue_image_derivatives(sender, instance, **kwargs):
+    """Resizing runs on a worker; the original is served until it is done"""
+    if instance.image and not instance.has_current_variants:
+        enqueue(
+            'Product.tasks.generate_image_derivatives',
+            args=[instance.pk],
+            unique_key=f'product-image-derivatives:{instance.pk}',
+        )
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=ProductImage)
+def bump_catalog_version(sender, **kwargs):
+    """Any catalog change invalidates cached catalog data"""
+    bump_version(CATALOG_NAMESPACE)
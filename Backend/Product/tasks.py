@@ -0,0 +1,22 @@
+from Backend.versioning import bump_version
+from TaskQueue.queue import task
+from . import bestsellers, recommendations
+from .models import ProductImage
+from .signals import CATALOG_NAMESPACE
+
+
+@task
+def generate_image_derivatives(image_id):
+    image = ProductImage.objects.filter(pk=image_id).first()
+    if image is not None and image.refresh_variants():
+        bump_version(CATALOG_NAMESPACE)
+
+
+@task
+def update_best_sellers():
+    bestsellers.update_best_sellers()
+
+
+@task
+def build_related_products():
+    recommendations.build_related_products()
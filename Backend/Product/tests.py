@@ -1,3 +1,242 @@
-from django.test import TestCase
+import csv
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+
+from Backend.imaging import render_derivatives
+from Backend.testing import PerformanceTestCase, bearer, create_user, seed_catalog
+from Order.models import Order, OrderItem
+from .async_views import AsyncProductFilterView, AsyncProductListView, AsyncProductSearchView
+from .exports import PRODUCT_COLUMNS
+from .bestsellers import day_start, update_best_sellers
+from .models import BestSellerRank, Category, Product, ProductImage, RelatedProduct
+from .projections import product_values, project_products
+from .serializers import ProductSerializer
+
+
+class ProductProjectionTests(TestCase):
+    """The list fast path must render exactly like ProductSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Skincare', description='Face and body')
+        on_sale = Product.objects.create(
+            name='Serum', description='Vitamin C', price=Decimal('2530.00'), quantity=5,
+            category=category, is_on_sale=True, percentage_discount=Decimal('45.00'), rating=Decimal('4.50'),
+        )
+        Product.objects.create(
+            name='Cleanser', description='Gentle', price=Decimal('999.99'), quantity=0,
+            category=category, is_featured=True,
+        )
+        ProductImage.objects.create(
+            product=on_sale, image='products/images/serum.jpg', alt_text='Serum', order=1,
+            variants={
+                'source': 'products/images/serum.jpg', 'width': 400, 'height': 400,
+                'sizes': [
+                    {'width': 320, 'height': 320, 'webp': 'products/images/derivatives/serum_320w.webp',
+                     'jpeg': 'products/images/derivatives/serum_320w.jpeg'},
+                    {'width': 400, 'height': 400, 'webp': 'products/images/derivatives/serum_400w.webp',
+                     'jpeg': 'products/images/derivatives/serum_400w.jpeg'},
+                ],
+            },
+        )
+        ProductImage.objects.create(product=on_sale, image='products/images/serum_back.jpg', is_active=False)
+
+    def test_projection_matches_serializer(self):
+        queryset = Product.objects.with_effective_price().select_related('category').prefetch_related('images').order_by('id')
+
+        expected = JSONRenderer().render(ProductSerializer(queryset, many=True).data)
+        actual = JSONRenderer().render(project_products(product_values(queryset)))
+
+        self.assertEqual(actual, expected)
+
+
+class ProductImageServingTests(TestCase):
+    """Uploads and their derivatives as served by MediaFilesMiddleware"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, SERVE_MEDIA=True, MEDIA_MAX_AGE=3600)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        buffer = BytesIO()
+        Image.new('RGB', (800, 600), 'teal').save(buffer, 'JPEG')
+        self.name = default_storage.save('products/images/serum.jpg', ContentFile(buffer.getvalue()))
+
+    def test_derivatives_are_immutable(self):
+        variants = render_derivatives(self.name)
+        self.assertEqual(render_derivatives(self.name), variants)
+
+        response = self.client.get(f'/media/{variants["sizes"][0]["webp"]}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_uploads_support_conditional_and_range_requests(self):
+        response = self.client.get(f'/media/{self.name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'max-age=3600, public')
+        self.assertEqual(self.client.get(f'/media/{self.name}', headers={'If-None-Match': response['ETag']}).status_code, 304)
+        self.assertEqual(
+            self.client.get(f'/media/{self.name}', headers={'If-Modified-Since': response['Last-Modified']}).status_code, 304,
+        )
+
+        partial = self.client.get(f'/media/{self.name}', headers={'Range': 'bytes=0-99'})
+        self.assertEqual(partial.status_code, 206)
+        with default_storage.open(self.name) as upload:
+            self.assertEqual(b''.join(partial.streaming_content), upload.read(100))
+
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+
+class ProductQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(products=2000)
+        cls.product = cls.products[0]
+        RelatedProduct.objects.bulk_create([
+            RelatedProduct(product=cls.product, related=related, rank=rank, score=1.0 / rank)
+            for rank, related in enumerate(cls.products[1:11], start=1)
+        ])
+        BestSellerRank.objects.bulk_create([
+            BestSellerRank(product=product, window_days=30, rank=rank, units_sold=1000 - rank)
+            for rank, product in enumerate(cls.products[:100], start=1)
+        ])
+
+    # Conditional routes read the catalog version before anything else; it
+    # is a query here since the test cache is not shared
+    def test_category_routes(self):
+        auth = bearer(create_user())
+        self.assertBudget('get', '/product/categories/', 3, **auth)
+        self.assertBudget('get', f'/product/categories/{self.product.category_id}/', 2, **auth)
+
+    def test_category_writes(self):
+        auth = bearer(create_user())
+        response = self.assertBudget('post', '/product/categories/', 2, {'name': 'Sunscreen', 'description': 'SPF'}, status=201, **auth)
+        path = f"/product/categories/{response.data['id']}/"
+        self.assertBudget('patch', path, 3, {'description': 'Broad spectrum'}, **auth)
+        self.assertBudget('delete', path, 4, status=204, **auth)
+
+    # ProductSerializer has no writable category, so products are created
+    # in the admin and only updated or deleted through the API
+    def test_product_writes(self):
+        path = f'/product/products/{self.products[1].pk}/'
+        self.assertBudget('patch', path, 5, {'price': '12.50', 'is_on_sale': True})
+        # Cascades to images, reviews, order and cart lines and sales
+        # figures; each deleted image bumps the catalog version as well
+        self.assertBudget('delete', path, 14, status=204)
+
+    def test_product_list(self):
+        self.assertBudget('get', '/product/products/', 4)
+        self.assertBudget('get', '/product/products/?page=50&page_size=40', 4)
+        self.assertBudget('get', '/product/products/?category=Category 3&price_min=20&ordering=-price', 4)
+
+    def test_product_detail(self):
+        self.assertBudget('get', f'/product/products/{self.product.pk}/', 6)
+
+    def test_product_filter(self):
+        for filter_type in ['discounted', 'featured', 'new', 'best_selling']:
+            self.assertBudget('get', f'/product/filter/?type={filter_type}&page_size=50', 4)
+
+    def test_product_search(self):
+        self.assertBudget('get', '/product/search/?q=Product 1&page_size=50', 4)
+
+    def test_product_facets(self):
+        self.assertBudget('get', '/product/facets/', 2)
+
+    def test_product_export(self):
+        self.assertBudget('get', '/product/export/', 1, status=403, **bearer(create_user()))
+
+        auth = bearer(create_user('staff', is_staff=True))
+        # The staff user, then the products and their images in one batch
+        _, content = self.assertStreamBudget('/product/export/?format=csv', 3, ms=2000, **auth)
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(tuple(rows[0]), PRODUCT_COLUMNS)
+        self.assertEqual(len(rows), len(self.products) + 1)
+        self.assertEqual(rows[1][2], self.product.category.name)
+        self.assertTrue(rows[1][-1].startswith('http://testserver/media/'))
+
+    def test_async_product_list(self):
+        self.assertAsyncMatches(AsyncProductListView, '/product/products/')
+        self.assertAsyncMatches(AsyncProductListView, '/product/products/?page=50&page_size=40')
+        self.assertAsyncMatches(AsyncProductListView, '/product/products/?category=Category 3&price_min=20&ordering=-price')
+        self.assertAsyncMatches(AsyncProductListView, '/product/products/?page=999', status=404)
+
+    def test_async_product_filter(self):
+        for filter_type in ['discounted', 'featured', 'new', 'best_selling']:
+            self.assertAsyncMatches(AsyncProductFilterView, f'/product/filter/?type={filter_type}&page_size=50')
+        self.assertAsyncMatches(AsyncProductFilterView, '/product/filter/?type=cheapest', status=400)
+
+    def test_async_product_search(self):
+        self.assertAsyncMatches(AsyncProductSearchView, '/product/search/?q=Product 1&page_size=50')
+        self.assertAsyncMatches(AsyncProductSearchView, '/product/search/', status=400)
+
+
+class BestSellerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.products = seed_catalog(products=5, categories=1, images_per_product=0)
+
+    def order(self, sales, days_ago=0, status='delivered', **fields):
+        """An order of {product index: quantity}, placed `days_ago` days ago at noon"""
+        order = Order.objects.create(user=self.user, total_amount=Decimal('10.00'), status=status, **fields)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=self.products[index], quantity=quantity, price=Decimal('10.00'))
+            for index, quantity in sales.items()
+        ])
+        today = timezone.localdate()
+        Order.objects.filter(pk=order.pk).update(created_at=day_start(today - timedelta(days=days_ago)) + timedelta(hours=12))
+        return order
+
+    def ranking(self, window):
+        return [
+            (self.products.index(rank.product), rank.units_sold)
+            for rank in BestSellerRank.objects.filter(window_days=window).select_related('product')
+        ]
+
+    def test_rank_order(self):
+        self.order({0: 1, 1: 5, 2: 3})
+        self.order({0: 4, 3: 3})
+        update_best_sellers()
+        # Ties go to the lower product id
+        self.assertEqual(self.ranking(7), [(0, 5), (1, 5), (2, 3), (3, 3)])
+
+    def test_window_bounds(self):
+        self.order({0: 1}, days_ago=6)
+        self.order({1: 1}, days_ago=7)
+        self.order({2: 1}, days_ago=29)
+        self.order({3: 1}, days_ago=89)
+        self.order({4: 1}, days_ago=90)
+        self.order({4: 1}, days_ago=-1)
+        update_best_sellers()
+
+        self.assertEqual(self.ranking(7), [(0, 1)])
+        self.assertEqual(self.ranking(30), [(0, 1), (1, 1), (2, 1)])
+        self.assertEqual(self.ranking(90), [(0, 1), (1, 1), (2, 1), (3, 1)])
+
+    def test_late_and_cancelled_orders(self):
+        counted = self.order({0: 2})
+        self.order({1: 1}, id=counted.pk + 10)
+        update_best_sellers()
+        self.assertEqual(self.ranking(7), [(0, 2), (1, 1)])
+
+        # Committed after a later order was counted
+        self.order({2: 5}, id=counted.pk + 5, days_ago=1)
+        Order.objects.filter(pk=counted.pk).update(status='cancelled')
+        update_best_sellers()
+        self.assertEqual(self.ranking(7), [(2, 5), (1, 1)])
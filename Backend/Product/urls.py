@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r'categories', views.CategoryViewSet)
@@ -10,4 +11,14 @@ urlpatterns = [
     path('', include(router.urls)),
     path('filter/', views.ProductFilterView.as_view(), name='product-filter'),
     path('search/', views.ProductSearchView.as_view(), name='product-search'),
+    path('facets/', views.ProductFacetsView.as_view(), name='product-facets'),
+    path('export/', views.ProductExportView.as_view(), name='product-export'),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Same URL names; the first matching pattern wins
+    urlpatterns = [
+        path('products/', async_views.AsyncProductListView.as_view(), name='product-list'),
+        path('filter/', async_views.AsyncProductFilterView.as_view(), name='product-filter'),
+        path('search/', async_views.AsyncProductSearchView.as_view(), name='product-search'),
+    ] + urlpatterns
@@ -1,26 +1,48 @@
 from rest_framework import viewsets, status, generics
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
-from .models import Product, Category
+from django.utils.decorators import method_decorator
+from Backend.conditional import conditional_on, request_versions
+from Backend.custom_auth import CachedJWTAuthentication, CsrfExemptSessionAuthentication
+from Backend.exports import EXPORT_RENDERERS, export_response
+from .models import Product, Category, ProductImage
 from .serializers import ProductSerializer, CategorySerializer
 from .filters import ProductFilter
+from .bestsellers import BEST_SELLER_WINDOWS, DEFAULT_BEST_SELLER_WINDOW
+from .recommendations import DEFAULT_TOP_K as RELATED_PRODUCTS_LIMIT
+from .exports import PRODUCT_COLUMNS, product_batches
+from .facets import get_catalog_facets
+from .signals import CATALOG_NAMESPACE
+from .projections import product_values, project_products
 from rest_framework.pagination import PageNumberPagination
 
+FILTER_NAMES = {
+    'discounted': 'Discounted Products',
+    'featured': 'Featured Products',
+    'new': 'New Products',
+    'best_selling': 'Best Selling Products',
+}
+
 class Pagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
+@method_decorator(conditional_on(CATALOG_NAMESPACE), name='list')
+@method_decorator(conditional_on(CATALOG_NAMESPACE), name='retrieve')
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+@method_decorator(conditional_on(CATALOG_NAMESPACE), name='list')
+@method_decorator(conditional_on(CATALOG_NAMESPACE), name='retrieve')
 class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.filter(is_active=True)
+    queryset = Product.objects.filter(is_active=True).with_effective_price()
     serializer_class = ProductSerializer
     pagination_class = Pagination
     permission_classes = [AllowAny]
@@ -31,8 +53,35 @@ class ProductViewSet(viewsets.ModelViewSet):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Read-only fast path: same JSON as ProductSerializer, built from
+        values() rows and one image query per page
+        """
+        queryset = product_values(self.filter_queryset(self.get_queryset()))
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(project_products(page))
+        
+        return Response(project_products(queryset))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Product detail with its frequently-bought-together products
+        """
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        
+        related_products = instance.get_related_products(
+            limit=RELATED_PRODUCTS_LIMIT
+        ).select_related('category').prefetch_related('images')
+        data['related_products'] = self.get_serializer(related_products, many=True).data
+        return Response(data)
 
 
+@method_decorator(conditional_on(CATALOG_NAMESPACE), name='list')
 class ProductSearchView(generics.ListAPIView):
     """
     Search products by name or category with partial matching
@@ -42,6 +91,7 @@ class ProductSearchView(generics.ListAPIView):
     serializer_class = ProductSerializer
     pagination_class = Pagination
     permission_classes = [AllowAny]
+    throttle_scope = 'search'
     
     def get_queryset(self):
         """
@@ -52,8 +102,11 @@ class ProductSearchView(generics.ListAPIView):
         if not query:
             return Product.objects.none()
         
-        # Base queryset - only active products
-        queryset = Product.objects.filter(is_active=True)
+        # Base queryset - only active products, with what the serializer nests
+        queryset = (
+            Product.objects.filter(is_active=True).with_effective_price()
+            .select_related('category').prefetch_related('images')
+        )
         
         # Search in product name and category name (case-insensitive)
         search_query = Q(name__icontains=query) | Q(category__name__icontains=query)
@@ -63,16 +116,32 @@ class ProductSearchView(generics.ListAPIView):
         
         return queryset
     
-    def list(self, request, *args, **kwargs):
+    def invalid_params_response(self):
         """
-        Override list method to add custom response format
+        400 response when the search query is missing, else None
         """
-        query = request.query_params.get('q', '').strip()
-        
-        if not query:
+        if not self.request.query_params.get('q', '').strip():
             return Response({
                 'error': 'Search query is required. Use ?q=search_term'
             }, status=status.HTTP_400_BAD_REQUEST)
+        return None
+    
+    def get_response_extras(self):
+        """
+        Keys added to the paginated response
+        """
+        return {
+            'query': self.request.query_params.get('q', '').strip(),
+            'search_type': 'partial_match',
+        }
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Override list method to add custom response format
+        """
+        invalid = self.invalid_params_response()
+        if invalid is not None:
+            return invalid
         
         # Get queryset
         queryset = self.get_queryset()
@@ -82,16 +151,14 @@ class ProductSearchView(generics.ListAPIView):
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             paginated_response = self.get_paginated_response(serializer.data)
-            paginated_response.data['query'] = query
-            paginated_response.data['search_type'] = 'partial_match'
+            paginated_response.data.update(self.get_response_extras())
             return paginated_response
         
         # If no pagination
         serializer = self.get_serializer(queryset, many=True)
         return Response({
             'success': True,
-            'query': query,
-            'search_type': 'partial_match',
+            **self.get_response_extras(),
             'count': queryset.count(),
             'data': serializer.data
         })
@@ -102,13 +169,14 @@ class ProductSearchView(generics.ListAPIView):
         return context
 
 
+@method_decorator(conditional_on(CATALOG_NAMESPACE), name='list')
 class ProductFilterView(generics.ListAPIView):
     """
     Class-based view for filtering products based on different criteria:
     - discounted: Products with is_on_sale=True
     - featured: Products with is_featured=True  
     - new: Products with is_new=True
-    - best_selling: Products with rating=5
+    - best_selling: Top sellers from the materialized ranking, ?window=7|30|90 (days)
     """
     serializer_class = ProductSerializer
     pagination_class = Pagination
@@ -123,8 +191,11 @@ class ProductFilterView(generics.ListAPIView):
         if not filter_type:
             return Product.objects.none()
         
-        # Base queryset - only active products
-        queryset = Product.objects.filter(is_active=True)
+        # Base queryset - only active products, with what the serializer nests
+        queryset = (
+            Product.objects.filter(is_active=True).with_effective_price()
+            .select_related('category').prefetch_related('images')
+        )
         
         # Apply filters based on type
         if filter_type == 'discounted':
@@ -137,18 +208,30 @@ class ProductFilterView(generics.ListAPIView):
             queryset = queryset.filter(is_new=True)
             
         elif filter_type == 'best_selling':
-            queryset = queryset.filter(rating=5)
+            # Served from the ranking table built by `manage.py update_best_sellers`
+            queryset = queryset.filter(
+                best_seller_ranks__window_days=self.get_best_seller_window()
+            ).order_by('best_seller_ranks__rank')
             
         else:
             return Product.objects.none()
         
         return queryset
     
-    def list(self, request, *args, **kwargs):
+    def get_best_seller_window(self):
         """
-        Override list method to add custom response format
+        Get the ranking window in days, falling back to the default window
         """
-        filter_type = request.query_params.get('type', None)
+        window = self.request.query_params.get('window')
+        if window is None:
+            return DEFAULT_BEST_SELLER_WINDOW
+        return int(window)
+    
+    def invalid_params_response(self):
+        """
+        400 response for a missing or unknown filter type or window, else None
+        """
+        filter_type = self.request.query_params.get('type', None)
         
         if not filter_type:
             return Response({
@@ -156,20 +239,42 @@ class ProductFilterView(generics.ListAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Validate filter type
-        valid_types = ['discounted', 'featured', 'new', 'best_selling']
+        valid_types = list(FILTER_NAMES)
         if filter_type not in valid_types:
             return Response({
                 'error': f'Invalid filter type. Use: {", ".join(valid_types)}'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get filter name
-        filter_names = {
-            'discounted': 'Discounted Products',
-            'featured': 'Featured Products',
-            'new': 'New Products',
-            'best_selling': 'Best Selling Products'
+        # Validate best-seller window
+        if filter_type == 'best_selling':
+            window = self.request.query_params.get('window')
+            valid_windows = [str(days) for days in BEST_SELLER_WINDOWS]
+            if window is not None and window not in valid_windows:
+                return Response({
+                    'error': f'Invalid window. Use: {", ".join(valid_windows)}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        return None
+    
+    def get_response_extras(self):
+        """
+        Keys added to the paginated response
+        """
+        filter_type = self.request.query_params.get('type')
+        extras = {
+            'filter_name': FILTER_NAMES[filter_type],
+            'filter_type': filter_type,
         }
-        filter_name = filter_names[filter_type]
+        if filter_type == 'best_selling':
+            extras['window'] = self.get_best_seller_window()
+        return extras
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Override list method to add custom response format
+        """
+        invalid = self.invalid_params_response()
+        if invalid is not None:
+            return invalid
         
         # Get queryset
         queryset = self.get_queryset()
@@ -179,16 +284,49 @@ class ProductFilterView(generics.ListAPIView):
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             paginated_response = self.get_paginated_response(serializer.data)
-            paginated_response.data['filter_name'] = filter_name
-            paginated_response.data['filter_type'] = filter_type
+            paginated_response.data.update(self.get_response_extras())
             return paginated_response
         
         # If no pagination
         serializer = self.get_serializer(queryset, many=True)
         return Response({
             'success': True,
-            'filter_name': filter_name,
-            'filter_type': filter_type,
+            **self.get_response_extras(),
             'count': queryset.count(),
             'data': serializer.data
-        })
\ No newline at end of file
+        })
+
+
+@method_decorator(conditional_on(CATALOG_NAMESPACE), name='get')
+class ProductFacetsView(APIView):
+    """
+    Counts of active products per category, price range and flag
+    (featured / on sale / new), so the storefront can render every filter
+    tab with one request.
+    Example: /product/facets/
+    """
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        return Response({
+            'success': True,
+            'data': get_catalog_facets(request_versions(request, [CATALOG_NAMESPACE])[0]),
+            'message': 'Catalog facets retrieved successfully'
+        })
+
+
+class ProductExportView(APIView):
+    """
+    The whole catalog as CSV or JSON Lines, streamed, for feeds and
+    analytics. Staff only; image URLs are absolute.
+    Example: /product/export/?format=jsonl
+    """
+    # IsAdminUser checks is_staff, which needs the full User model
+    authentication_classes = [CachedJWTAuthentication, CsrfExemptSessionAuthentication]
+    permission_classes = [IsAdminUser]
+    renderer_classes = EXPORT_RENDERERS
+
+    def get(self, request):
+        storage = ProductImage._meta.get_field('image').storage
+        batches = product_batches(url=lambda name: request.build_absolute_uri(storage.url(name)))
+        return export_response(request, PRODUCT_COLUMNS, batches, 'products')
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Review.tasks import recompute_all_product_ratings
+
+
+class Command(BaseCommand):
+    help = 'Set the rating and review count of every product from its reviews (backfill for PRODUCT_RATINGS_FROM_REVIEWS)'
+
+    def handle(self, *args, **options):
+        if not settings.PRODUCT_RATINGS_FROM_REVIEWS:
+            raise CommandError('PRODUCT_RATINGS_FROM_REVIEWS is off; ratings are set in the admin and would be overwritten')
+        updated = recompute_all_product_ratings()
+        self.stdout.write(self.style.SUCCESS(f'Ratings recomputed for {updated} products'))
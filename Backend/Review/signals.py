@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from TaskQueue.queue import enqueue
+from .models import Review
+
+
+@receiver([post_save, post_delete], sender=Review)
+def queue_rating_recompute(sender, instance, **kwargs):
+    """Coalesced per product: a burst of reviews triggers one recompute"""
+    if not settings.PRODUCT_RATINGS_FROM_REVIEWS:
+        return
+    enqueue(
+        'Review.tasks.recompute_product_rating',
+        args=[instance.product_id],
+        unique_key=f'product-rating:{instance.product_id}',
+    )
@@ -0,0 +1,32 @@
+from django.db.models import Avg, Count, DecimalField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Round
+
+from Backend.versioning import bump_version
+from Product.models import Product
+from Product.signals import CATALOG_NAMESPACE
+from TaskQueue.queue import task
+from .models import Review
+
+
+@task
+def recompute_product_rating(product_id):
+    """Refresh the denormalized rating and review count of a product"""
+    stats = Review.objects.filter(product_id=product_id).aggregate(average=Avg('rating'), total=Count('id'))
+    Product.objects.filter(pk=product_id).update(
+        rating=round(stats['average'] or 0, 2),
+        total_reviews=stats['total'],
+    )
+    bump_version(CATALOG_NAMESPACE)
+
+
+def recompute_all_product_ratings():
+    """Rating and review count of every product from its reviews, in one UPDATE"""
+    reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    average = reviews.annotate(average=Round(Avg('rating'), 2)).values('average')
+    total = reviews.annotate(total=Count('id')).values('total')
+    updated = Product.objects.update(
+        rating=Coalesce(Subquery(average, output_field=DecimalField()), Value(0), output_field=DecimalField()),
+        total_reviews=Coalesce(Subquery(total, output_field=IntegerField()), Value(0)),
+    )
+    bump_version(CATALOG_NAMESPACE)
+    return updated
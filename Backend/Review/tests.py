@@ -1,3 +1,82 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from Backend.testing import PerformanceTestCase, bearer, create_user, seed_catalog, seed_reviews
+from Product.models import Product
+from TaskQueue.models import Task
+from .models import Review
+
+
+class ReviewQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        products = seed_catalog(products=300)
+        cls.user = create_user()
+        cls.reviews = seed_reviews(cls.user, products, count=100)
+        # Someone else's reviews stay out of the listing
+        seed_reviews(create_user('other'), products, count=100)
+
+    def setUp(self):
+        super().setUp()
+        self.auth = bearer(self.user)
+
+    def test_list(self):
+        response = self.assertBudget('get', '/review/reviews/', 3, **self.auth)
+        self.assertEqual(response.data['count'], 100)
+
+    def test_detail(self):
+        self.assertBudget('get', f'/review/reviews/{self.reviews[0].pk}/', 2, **self.auth)
+
+    # The nested product is read-only, so reviews are created elsewhere
+    def test_update_and_delete(self):
+        path = f'/review/reviews/{self.reviews[0].pk}/'
+        self.assertBudget('patch', path, 3, {'rating': 4, 'comment': 'Better after a week'}, **self.auth)
+        self.assertBudget('delete', path, 3, status=204, **self.auth)
+        self.assertBudget('delete', path, 1, status=404, **self.auth)
+
+
+class ProductRatingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.products = seed_catalog(products=3, categories=1, images_per_product=0)
+
+    def review(self, product, rating):
+        return Review.objects.create(user=self.user, product=product, rating=rating, comment='Fine')
+
+    def test_admin_rating_is_kept_by_default(self):
+        self.review(self.products[0], 1)
+        self.products[0].refresh_from_db()
+        self.assertEqual((self.products[0].rating, self.products[0].total_reviews), (Decimal('4.20'), 0))
+        self.assertFalse(Task.objects.exists())
+
+    @override_settings(PRODUCT_RATINGS_FROM_REVIEWS=True)
+    def test_reviews_of_a_product_are_coalesced_into_one_recompute(self):
+        self.review(self.products[0], 1)
+        self.review(self.products[0], 4)
+        self.assertEqual(Task.objects.filter(unique_key=f'product-rating:{self.products[0].pk}').count(), 1)
+
+        with self.settings(TASK_QUEUE_EAGER=True):
+            self.review(self.products[0], 5)
+        self.products[0].refresh_from_db()
+        self.assertEqual((self.products[0].rating, self.products[0].total_reviews), (Decimal('3.33'), 3))
+
+    def test_backfill(self):
+        with self.assertRaises(CommandError):
+            call_command('recompute_product_ratings')
+
+        with self.settings(PRODUCT_RATINGS_FROM_REVIEWS=True):
+            self.review(self.products[0], 2)
+            self.review(self.products[0], 5)
+            self.review(self.products[1], 4)
+            call_command('recompute_product_ratings', stdout=StringIO())
+
+        ratings = dict(Product.objects.values_list('pk', 'rating'))
+        totals = dict(Product.objects.values_list('pk', 'total_reviews'))
+        self.assertEqual([ratings[product.pk] for product in self.products], [Decimal('3.50'), Decimal('4.00'), Decimal('0.00')])
+        self.assertEqual([totals[product.pk] for product in self.products], [2, 1, 0])
@@ -7,4 +7,8 @@ class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
 
     def get_queryset(self):
-        return Review.objects.filter(user=self.request.user)
+        return (
+            Review.objects.filter(user_id=self.request.user.id)
+            .select_related('product__category')
+            .prefetch_related('product__images')
+        )
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'unique_key', 'last_error']
+    readonly_fields = ['attempts', 'locked_by', 'locked_at', 'last_error', 'created_at', 'finished_at']
+    ordering = ['-id']
+    actions = ['retry_tasks']
+
+    @admin.action(description='Retry selected failed tasks now')
+    def retry_tasks(self, request, queryset):
+        queued_keys = Task.objects.filter(status=Task.STATUS_QUEUED, unique_key__isnull=False).values('unique_key')
+        updated = queryset.filter(status=Task.STATUS_FAILED).exclude(unique_key__in=queued_keys).update(
+            status=Task.STATUS_QUEUED, run_at=timezone.now(), attempts=0, finished_at=None,
+        )
+        self.message_user(request, f'{updated} tasks queued for retry')
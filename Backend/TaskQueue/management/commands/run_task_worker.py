@@ -0,0 +1,82 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from TaskQueue.queue import claim_tasks, enqueue_scheduled, requeue_stale_tasks, run_task
+
+# Seconds between stale-task and schedule checks
+HOUSEKEEPING_INTERVAL = 30
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Tasks run in parallel threads (default: 2)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between queue polls when idle (default: 1)')
+        parser.add_argument('--burst', action='store_true', help='Exit once no task is due instead of polling')
+        parser.add_argument('--no-schedule', action='store_true', help='Do not queue the periodic tasks of TASK_QUEUE_SCHEDULE')
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        stopping = threading.Event()
+
+        def stop(signum, frame):
+            self.stdout.write('Finishing running tasks before exiting...')
+            stopping.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        self.stdout.write(f'Worker {worker_id} started with concurrency {concurrency}')
+        succeeded = failed = 0
+        next_housekeeping = 0
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while not stopping.is_set():
+                if time.monotonic() >= next_housekeeping:
+                    requeue_stale_tasks()
+                    if not options['no_schedule']:
+                        enqueue_scheduled()
+                    next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL
+
+                # Keep every thread busy: claim only as many tasks as there are free slots
+                free_slots = concurrency - len(running)
+                if free_slots:
+                    running.update(executor.submit(self.run, row) for row in claim_tasks(worker_id, free_slots))
+
+                if not running:
+                    if options['burst']:
+                        break
+                    stopping.wait(options['poll_interval'])
+                    continue
+
+                done, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.result():
+                        succeeded += 1
+                    else:
+                        failed += 1
+
+            # Let claimed tasks finish so they are not left in the running state
+            wait(running)
+
+        connections.close_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Worker {worker_id} stopped: {succeeded} tasks succeeded, {failed} failed'
+        ))
+
+    def run(self, task_row):
+        # Every pool thread holds its own connection; drop broken or expired ones
+        close_old_connections()
+        try:
+            return run_task(task_row)
+        finally:
+            close_old_connections()
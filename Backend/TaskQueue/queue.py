@@ -0,0 +1,221 @@
+"""
+Database-backed task queue.
+
+Tasks are plain functions registered with @task and enqueued as rows in the
+Task table, inside the caller's transaction: work is only visible to
+workers once the request that queued it commits. Workers claim rows with a
+conditional UPDATE, which is safe on SQLite as well as on databases with
+row locking.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Task
+
+_registry = {}
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Seconds before the first retry; doubles on every further attempt
+DEFAULT_RETRY_BACKOFF = 30
+
+# Running tasks whose worker has been silent this long are requeued
+STALE_TASK_TIMEOUT = timedelta(minutes=30)
+
+
+class TaskNotRegistered(Exception):
+    pass
+
+
+def task(func=None, *, name=None, max_attempts=DEFAULT_MAX_ATTEMPTS, retry_backoff=DEFAULT_RETRY_BACKOFF):
+    """
+    Register a function as a task. The function gains .delay(*args, **kwargs)
+    and .enqueue(args, kwargs, run_at=..., countdown=..., unique_key=...).
+    Arguments must be JSON serializable.
+    """
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        func.task_name = task_name
+        func.max_attempts = max_attempts
+        func.retry_backoff = retry_backoff
+        func.delay = lambda *args, **kwargs: enqueue(task_name, args=args, kwargs=kwargs)
+        func.enqueue = lambda args=(), kwargs=None, **options: enqueue(task_name, args=args, kwargs=kwargs, **options)
+        _registry[task_name] = func
+        return func
+
+    return register(func) if func is not None else register
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise TaskNotRegistered(name) from None
+
+
+def registered_tasks():
+    return dict(_registry)
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, countdown=None, unique_key=None, max_attempts=None):
+    """
+    Queue the task `name`. With a unique_key, nothing is added while a task
+    with the same key is still waiting; the waiting task is returned instead.
+    """
+    func = _registry.get(name)
+    if run_at is None:
+        run_at = timezone.now() + timedelta(seconds=countdown or 0)
+    if max_attempts is None:
+        max_attempts = func.max_attempts if func else DEFAULT_MAX_ATTEMPTS
+
+    if getattr(settings, 'TASK_QUEUE_EAGER', False):
+        get_task(name)(*args, **(kwargs or {}))
+        return None
+
+    fields = {
+        'name': name,
+        'args': list(args),
+        'kwargs': kwargs or {},
+        'run_at': run_at,
+        'unique_key': unique_key,
+        'max_attempts': max_attempts,
+    }
+    if unique_key is None:
+        return Task.objects.create(**fields)
+
+    try:
+        with transaction.atomic():
+            return Task.objects.create(**fields)
+    except IntegrityError:
+        existing = Task.objects.filter(unique_key=unique_key, status=Task.STATUS_QUEUED).first()
+        if existing is None:
+            # Claimed in the meantime; the new one still has to run
+            return Task.objects.create(**fields)
+        return existing
+
+
+def claim_tasks(worker_id, limit):
+    """Mark up to `limit` due tasks as running for this worker and return them"""
+    now = timezone.now()
+    candidate_ids = list(
+        Task.objects
+        .filter(status=Task.STATUS_QUEUED, run_at__lte=now)
+        .order_by('run_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+    claimed = []
+    for task_id in candidate_ids:
+        # Another worker may have claimed the row since it was selected
+        updated = Task.objects.filter(id=task_id, status=Task.STATUS_QUEUED).update(
+            status=Task.STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(task_id)
+
+    return list(Task.objects.filter(id__in=claimed))
+
+
+def run_task(task_row):
+    """Run a claimed task and record the outcome, scheduling a retry on failure"""
+    try:
+        func = get_task(task_row.name)
+        func(*task_row.args, **task_row.kwargs)
+    except Exception as exc:
+        task_row.last_error = ''.join(traceback.format_exception(exc))[-5000:]
+        retryable = not isinstance(exc, TaskNotRegistered) and task_row.attempts < task_row.max_attempts
+        if retryable:
+            backoff = getattr(func, 'retry_backoff', DEFAULT_RETRY_BACKOFF) * 2 ** (task_row.attempts - 1)
+            task_row.status = Task.STATUS_QUEUED
+            task_row.run_at = timezone.now() + timedelta(seconds=backoff)
+        else:
+            task_row.status = Task.STATUS_FAILED
+            task_row.finished_at = timezone.now()
+        task_row.locked_by = ''
+        task_row.locked_at = None
+        try:
+            with transaction.atomic():
+                task_row.save(update_fields=['status', 'run_at', 'finished_at', 'locked_by', 'locked_at', 'last_error'])
+        except IntegrityError:
+            # A fresh task with the same unique_key was queued meanwhile; it covers the retry
+            task_row.status = Task.STATUS_FAILED
+            task_row.finished_at = timezone.now()
+            task_row.save(update_fields=['status', 'finished_at', 'locked_by', 'locked_at', 'last_error'])
+        return False
+
+    Task.objects.filter(pk=task_row.pk).update(
+        status=Task.STATUS_SUCCEEDED,
+        finished_at=timezone.now(),
+        locked_by='',
+        locked_at=None,
+    )
+    return True
+
+
+def requeue_stale_tasks(timeout=STALE_TASK_TIMEOUT):
+    """Hand tasks of crashed workers back to the queue"""
+    now = timezone.now()
+    stale = Task.objects.filter(status=Task.STATUS_RUNNING, locked_at__lt=now - timeout)
+    queued_keys = Task.objects.filter(status=Task.STATUS_QUEUED, unique_key__isnull=False).values('unique_key')
+    newest_with_key = stale.filter(unique_key=OuterRef('unique_key')).order_by('-id').values('id')[:1]
+    with transaction.atomic():
+        # A newer queued task with the same key already covers these
+        stale.filter(unique_key__in=queued_keys).update(status=Task.STATUS_FAILED, finished_at=now)
+        # Only one task per key may be queued; the newest covers the others
+        stale.filter(unique_key__isnull=False).exclude(id=Subquery(newest_with_key)).update(
+            status=Task.STATUS_FAILED, finished_at=now,
+        )
+        return stale.update(status=Task.STATUS_QUEUED, locked_by='', locked_at=None)
+
+
+def enqueue_scheduled(schedule=None):
+    """
+    Queue the next run of every periodic task in settings.TASK_QUEUE_SCHEDULE:
+
+        {'name': {'task': 'App.tasks.func', 'interval': seconds, 'args': [...], 'kwargs': {...}}}
+
+    Runs are tracked through the task table itself, so restarting or adding
+    workers never double-books a slot.
+    """
+    if schedule is None:
+        schedule = getattr(settings, 'TASK_QUEUE_SCHEDULE', {})
+
+    queued = 0
+    now = timezone.now()
+    for entry_name, entry in schedule.items():
+        unique_key = f'schedule:{entry_name}'
+        last = Task.objects.filter(unique_key=unique_key).order_by('-run_at', '-id').first()
+        if last is not None and last.status in (Task.STATUS_QUEUED, Task.STATUS_RUNNING):
+            continue
+
+        run_at = now
+        if last is not None:
+            run_at = max(now, last.run_at + timedelta(seconds=entry['interval']))
+        enqueue(
+            entry['task'],
+            args=entry.get('args', ()),
+            kwargs=entry.get('kwargs'),
+            run_at=run_at,
+            unique_key=unique_key,
+            max_attempts=1,
+        )
+        queued += 1
+    return queued
+
+
+def purge_finished_tasks(older_than):
+    """Delete succeeded and failed tasks that finished before `older_than` ago"""
+    cutoff = timezone.now() - older_than
+    deleted, _ = Task.objects.filter(
+        status__in=[Task.STATUS_SUCCEEDED, Task.STATUS_FAILED],
+        finished_at__lt=cutoff,
+    ).delete()
+    return deleted
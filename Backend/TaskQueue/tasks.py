@@ -0,0 +1,11 @@
+from datetime import timedelta
+
+from .queue import purge_finished_tasks, task
+
+# Finished tasks are kept this long for inspection in the admin
+FINISHED_TASK_RETENTION = timedelta(days=7)
+
+
+@task
+def purge_old_tasks():
+    return purge_finished_tasks(FINISHED_TASK_RETENTION)
@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Task
+from .queue import (
+    claim_tasks, enqueue, enqueue_scheduled, purge_finished_tasks, requeue_stale_tasks, run_task, task,
+)
+
+calls = []
+
+
+@task(name='TaskQueue.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='TaskQueue.tests.fail', max_attempts=3, retry_backoff=10)
+def fail():
+    raise ValueError('broken')
+
+
+class QueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def claim_one(self, worker_id='worker-1'):
+        claimed = claim_tasks(worker_id, 10)
+        self.assertEqual(len(claimed), 1)
+        return claimed[0]
+
+    def test_claim_leases_due_tasks_once(self):
+        due = record.delay(1)
+        record.enqueue([2], countdown=60)
+
+        claimed = self.claim_one()
+        self.assertEqual(claimed.pk, due.pk)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (Task.STATUS_RUNNING, 'worker-1', 1))
+        self.assertIsNotNone(claimed.locked_at)
+        # Neither another worker nor the same one gets it again
+        self.assertEqual(claim_tasks('worker-2', 10), [])
+
+        self.assertTrue(run_task(claimed))
+        claimed.refresh_from_db()
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.locked_at), (Task.STATUS_SUCCEEDED, '', None))
+        self.assertEqual(calls, [1])
+
+    def test_claim_respects_the_limit_in_run_order(self):
+        now = timezone.now()
+        later = record.enqueue([1], run_at=now - timedelta(seconds=1))
+        earlier = record.enqueue([2], run_at=now - timedelta(seconds=2))
+        record.enqueue([3], run_at=now)
+
+        self.assertEqual([row.pk for row in claim_tasks('worker-1', 2)], [earlier.pk, later.pk])
+
+    def test_retries_back_off_then_fail(self):
+        row = fail.delay()
+        for attempt, backoff in [(1, 10), (2, 20)]:
+            before = timezone.now()
+            self.assertFalse(run_task(self.claim_one()))
+            row.refresh_from_db()
+            self.assertEqual((row.status, row.attempts), (Task.STATUS_QUEUED, attempt))
+            self.assertIn('ValueError: broken', row.last_error)
+            self.assertGreaterEqual(row.run_at, before + timedelta(seconds=backoff))
+            self.assertLess(row.run_at, before + timedelta(seconds=backoff + 5))
+            # Not due until the backoff has passed
+            self.assertEqual(claim_tasks('worker-1', 10), [])
+            Task.objects.filter(pk=row.pk).update(run_at=timezone.now())
+
+        self.assertFalse(run_task(self.claim_one()))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Task.STATUS_FAILED, 3))
+        self.assertIsNotNone(row.finished_at)
+
+    def test_unregistered_task_fails_without_retry(self):
+        row = enqueue('TaskQueue.tests.missing')
+        self.assertFalse(run_task(self.claim_one()))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), (Task.STATUS_FAILED, 1))
+
+    def test_unique_key_coalesces_queued_tasks(self):
+        first = record.enqueue([1], unique_key='key')
+        self.assertEqual(record.enqueue([2], unique_key='key').pk, first.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+        # Once running, the next change needs a run of its own
+        self.claim_one()
+        second = record.enqueue([3], unique_key='key')
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual(record.enqueue([4], unique_key='key').pk, second.pk)
+
+    def test_partial_constraint_allows_one_queued_task_per_key(self):
+        Task.objects.create(name='TaskQueue.tests.record', unique_key='key', status=Task.STATUS_SUCCEEDED)
+        Task.objects.create(name='TaskQueue.tests.record', unique_key='key', status=Task.STATUS_FAILED)
+        Task.objects.create(name='TaskQueue.tests.record', unique_key='key')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Task.objects.create(name='TaskQueue.tests.record', unique_key='key')
+
+    def test_failed_retry_yields_to_a_newer_queued_task(self):
+        fail.enqueue(unique_key='key')
+        running = self.claim_one()
+        newer = fail.enqueue(unique_key='key')
+
+        self.assertFalse(run_task(running))
+        running.refresh_from_db()
+        self.assertEqual(running.status, Task.STATUS_FAILED)
+        self.assertEqual(Task.objects.get(status=Task.STATUS_QUEUED).pk, newer.pk)
+
+    def test_requeue_stale_tasks(self):
+        stale = record.delay(1)
+        covered = record.enqueue([2], unique_key='key')
+        fresh = record.delay(3)
+        claim_tasks('crashed', 10)
+        Task.objects.filter(pk__in=[stale.pk, covered.pk]).update(locked_at=timezone.now() - timedelta(hours=1))
+        newer = record.enqueue([4], unique_key='key')
+
+        self.assertEqual(requeue_stale_tasks(timedelta(minutes=30)), 1)
+        statuses = dict(Task.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            stale.pk: Task.STATUS_QUEUED,
+            covered.pk: Task.STATUS_FAILED,
+            fresh.pk: Task.STATUS_RUNNING,
+            newer.pk: Task.STATUS_QUEUED,
+        })
+        stale.refresh_from_db()
+        self.assertEqual((stale.locked_by, stale.locked_at), ('', None))
+
+    def test_requeue_stale_tasks_sharing_a_key(self):
+        old = timezone.now() - timedelta(hours=1)
+        older, newest = [
+            Task.objects.create(name='TaskQueue.tests.record', unique_key='key', status=Task.STATUS_RUNNING, locked_at=old)
+            for _ in range(2)
+        ]
+        other = Task.objects.create(name='TaskQueue.tests.record', unique_key='other', status=Task.STATUS_RUNNING, locked_at=old)
+
+        self.assertEqual(requeue_stale_tasks(timedelta(minutes=30)), 2)
+        statuses = dict(Task.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses, {
+            older.pk: Task.STATUS_FAILED,
+            newest.pk: Task.STATUS_QUEUED,
+            other.pk: Task.STATUS_QUEUED,
+        })
+
+    def test_enqueue_scheduled_books_each_slot_once(self):
+        schedule = {'hourly': {'task': 'TaskQueue.tests.record', 'interval': 3600, 'args': [1]}}
+        self.assertEqual(enqueue_scheduled(schedule), 1)
+        self.assertEqual(enqueue_scheduled(schedule), 0)
+
+        first = self.claim_one()
+        self.assertEqual((first.unique_key, first.args, first.max_attempts), ('schedule:hourly', [1], 1))
+        self.assertEqual(enqueue_scheduled(schedule), 0)
+
+        run_task(first)
+        self.assertEqual(enqueue_scheduled(schedule), 1)
+        second = Task.objects.get(status=Task.STATUS_QUEUED)
+        self.assertEqual(second.run_at, first.run_at + timedelta(seconds=3600))
+        self.assertEqual(claim_tasks('worker-1', 10), [])
+
+    def test_purge_finished_tasks(self):
+        now = timezone.now()
+        old = now - timedelta(days=8)
+        for status in [Task.STATUS_SUCCEEDED, Task.STATUS_FAILED]:
+            Task.objects.create(name='TaskQueue.tests.record', status=status, finished_at=old)
+            Task.objects.create(name='TaskQueue.tests.record', status=status, finished_at=now)
+        kept = [
+            Task.objects.create(name='TaskQueue.tests.record', status=Task.STATUS_QUEUED).pk,
+            Task.objects.create(name='TaskQueue.tests.record', status=Task.STATUS_RUNNING, finished_at=old).pk,
+        ]
+
+        self.assertEqual(purge_finished_tasks(timedelta(days=7)), 2)
+        self.assertEqual(Task.objects.count(), 4)
+        self.assertEqual(Task.objects.filter(pk__in=kept).count(), 2)
@@ -0,0 +1,42 @@
+"""
+Guest identities.
+
+A guest is a random id carried in signed JWTs, not a User row. The tokens
+are ordinary access/refresh tokens without a user_id claim, so the refresh
+endpoint renews them unchanged and only GuestJWTAuthentication accepts them.
+"""
+import uuid
+
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+
+def new_guest_id():
+    return uuid.uuid4().hex
+
+
+def guest_tokens(guest_id):
+    """(refresh, access) tokens for a guest id"""
+    refresh = RefreshToken()
+    refresh['is_guest'] = True
+    refresh['guest_id'] = guest_id
+    return refresh, refresh.access_token
+
+
+def guest_id_from_request(request):
+    """
+    The guest id a request carries, either as its authentication or as a
+    `guest_token` field (used when logging in from a guest session)
+    """
+    guest_id = getattr(request.user, 'guest_id', None)
+    if guest_id:
+        return guest_id
+
+    raw_token = request.data.get('guest_token') if hasattr(request, 'data') else None
+    if not raw_token:
+        return None
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+    return token.get('guest_id') if token.get('is_guest') else None
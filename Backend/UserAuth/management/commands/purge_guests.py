@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, Max, OuterRef, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from Cart.models import Cart
+from Coupon.models import CouponUsage
+from Order.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete stale guest carts, guest coupon usages and the guest_* user rows '
+        'created by the old guest login, in batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Purge guests inactive for this many days (default: 30)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per query (default: 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be deleted')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        # A guest cart is active while items are being added to it
+        stale_carts = (
+            Cart.objects
+            .filter(guest_id__isnull=False)
+            .annotate(last_activity=Coalesce(Max('items__created_at'), 'created_at'))
+            .filter(last_activity__lt=cutoff)
+        )
+        # A guest's coupon usages go once the guest is gone; while its cart is
+        # active they keep it from using a coupon twice
+        active_guest_carts = Cart.objects.filter(guest_id=OuterRef('guest_id')).filter(
+            Q(created_at__gte=cutoff) | Q(items__created_at__gte=cutoff)
+        )
+        stale_usages = (
+            CouponUsage.objects
+            .filter(guest_id__isnull=False, used_at__lt=cutoff)
+            .exclude(Exists(active_guest_carts))
+        )
+        # Legacy guest users; anyone who placed an order is kept with their orders
+        stale_users = (
+            User.objects
+            .filter(username__startswith='guest_', email__endswith='@guest.local', date_joined__lt=cutoff)
+            .exclude(Exists(Order.objects.filter(user=OuterRef('pk'))))
+        )
+
+        for label, queryset in [('guest carts', stale_carts), ('guest coupon usages', stale_usages), ('guest users', stale_users)]:
+            if options['dry_run']:
+                self.stdout.write(f'{label}: {queryset.count()} would be deleted')
+                continue
+            deleted = self.delete_in_batches(queryset, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{label}: {deleted} deleted'))
+
+    def delete_in_batches(self, queryset, batch_size):
+        """Short delete transactions keep the tables writable for live traffic"""
+        model = queryset.model
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            model.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
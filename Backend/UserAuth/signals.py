@@ -0,0 +1,11 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Backend.custom_auth import forget_cached_user
+
+
+@receiver([post_save, post_delete], sender=User)
+def drop_cached_user(sender, instance, **kwargs):
+    """Activation, staff and profile changes apply to the next request"""
+    forget_cached_user(instance.pk)
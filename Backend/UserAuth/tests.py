@@ -1,3 +1,238 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Backend.custom_auth import user_cache_key, user_from_fields
+from Backend.testing import (
+    PASSWORD, PerformanceTestCase, bearer, create_user, guest_bearer, seed_cart, seed_catalog, seed_coupons, seed_orders,
+)
+from Cart.models import Cart, CartItem
+from Coupon.models import Coupon, CouponUsage
+
+# Login and registration hash a password on purpose; their time budget covers it
+PASSWORD_HASHING_MS = 1500
+
+
+class UserAuthQueryBudgetTests(PerformanceTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(products=200)
+        cls.user = create_user()
+        seed_cart(cls.products, lines=40, user=cls.user)
+        seed_cart(cls.products[100:], lines=40, guest_id='b' * 32)
+
+    def test_profiles(self):
+        auth = bearer(self.user)
+        response = self.assertBudget('get', '/user-auth/profiles/', 2, **auth)
+        self.assertEqual(response.data['count'], 1)
+        path = f"/user-auth/profiles/{response.data['results'][0]['id']}/"
+        self.assertBudget('get', path, 1, **auth)
+        self.assertBudget('patch', path, 2, {'address': '2 Test Street'}, **auth)
+        # Other users' profiles are not found
+        self.assertBudget('get', f'/user-auth/profiles/{create_user("other").userprofile.pk}/', 1, status=404, **auth)
+
+    # Merging the guest's coupon usages adds two queries
+    def test_register_merges_guest_cart(self):
+        self.assertBudget('post', '/user-auth/api/auth/register/', 17, {
+            'username': 'newcomer', 'email': 'newcomer@example.com',
+            'password': PASSWORD, 'password_confirm': PASSWORD,
+        }, status=201, ms=PASSWORD_HASHING_MS, **guest_bearer('b' * 32))
+
+    def test_login_merges_guest_cart(self):
+        self.assertBudget('post', '/user-auth/api/auth/login/', 13, {
+            'username': self.user.username, 'password': PASSWORD,
+        }, ms=PASSWORD_HASHING_MS, **guest_bearer('b' * 32))
+
+    def test_refresh_and_logout(self):
+        login = self.api.post('/user-auth/api/auth/login/', {'username': self.user.username, 'password': PASSWORD}, format='json')
+        tokens = login.data['data']['tokens']
+        self.assertBudget('post', '/user-auth/api/auth/refresh/', 1, {'refresh': tokens['refresh']})
+        self.assertBudget('post', '/user-auth/api/auth/logout/', 6, {'refresh': tokens['refresh']}, **bearer(self.user))
+
+    def test_check_auth(self):
+        self.assertBudget('get', '/user-auth/check-auth/', 2, **bearer(self.user))
+        self.assertBudget('get', '/user-auth/check-auth/', 0)
+
+    def test_guest_tokens(self):
+        self.assertBudget('post', '/user-auth/guest-tokens/', 0)
+
+
+class CachedUserAuthenticationTests(TestCase):
+    """Views with CachedJWTAuthentication see deactivation and demotion on the next request"""
+
+    def setUp(self):
+        caches['sessions'].clear()
+        self.api = APIClient()
+        self.staff = create_user('staff', is_staff=True)
+        self.auth = bearer(self.staff)
+
+    def assertRevoked(self):
+        self.assertEqual(self.api.get('/product/export/', **self.auth).status_code, 200)
+
+        self.staff.is_staff = False
+        self.staff.save()
+        self.assertEqual(self.api.get('/product/export/', **self.auth).status_code, 403)
+
+        self.staff.is_active = False
+        self.staff.save()
+        self.assertEqual(self.api.get('/product/export/', **self.auth).status_code, 401)
+
+    def test_deactivation_without_a_shared_cache(self):
+        self.assertRevoked()
+
+    @mock.patch('Backend.custom_auth.is_shared', return_value=True)
+    def test_deactivation_with_a_shared_cache(self, is_shared):
+        self.assertRevoked()
+
+    @mock.patch('Backend.custom_auth.is_shared', return_value=True)
+    def test_cached_user_has_no_password(self, is_shared):
+        self.assertEqual(self.api.get('/user-auth/check-auth/', **self.auth).json()['user']['username'], 'staff')
+        cached = caches['sessions'].get(user_cache_key(self.staff.pk))
+        self.assertNotIn('password', cached)
+        self.assertTrue(cached['is_staff'])
+        # Deferred: loaded from the database when asked for
+        self.assertEqual(user_from_fields(cached).password, self.staff.password)
+
+
+class GuestMergeTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(products=6, categories=1, images_per_product=0)
+        cls.user = create_user()
+        cls.coupons = seed_coupons(count=3, user=cls.user, used=1)
+
+    def setUp(self):
+        self.api = APIClient()
+        # Both carts hold 2 of each product: products 0-2 and products 2-4
+        seed_cart(self.products[:3], user=self.user)
+        seed_cart(self.products[2:5], guest_id='d' * 32)
+        CouponUsage.objects.bulk_create([CouponUsage(guest_id='d' * 32, coupon=coupon) for coupon in self.coupons[:2]])
+        Coupon.objects.filter(pk__in=[coupon.pk for coupon in self.coupons[:2]]).update(used_count=1)
+
+    def quantities(self, user):
+        return dict(CartItem.objects.filter(cart__user=user).values_list('product_id', 'quantity'))
+
+    def test_login_adds_up_both_carts(self):
+        response = self.api.post(
+            '/user-auth/api/auth/login/', {'username': self.user.username, 'password': PASSWORD},
+            format='json', **guest_bearer('d' * 32),
+        )
+        self.assertEqual(response.status_code, 200)
+
+        product_ids = [product.pk for product in self.products]
+        self.assertEqual(self.quantities(self.user), {
+            product_ids[0]: 2, product_ids[1]: 2, product_ids[2]: 4, product_ids[3]: 2, product_ids[4]: 2,
+        })
+        self.assertEqual(Cart.objects.filter(user=self.user).count(), 1)
+        self.assertFalse(Cart.objects.filter(guest_id='d' * 32).exists())
+
+    def test_login_hands_over_coupon_usages(self):
+        self.api.post(
+            '/user-auth/api/auth/login/', {'username': self.user.username, 'password': PASSWORD},
+            format='json', **guest_bearer('d' * 32),
+        )
+        used = sorted(CouponUsage.objects.filter(user=self.user).values_list('coupon_id', flat=True))
+        self.assertEqual(used, [self.coupons[0].pk, self.coupons[1].pk])
+        self.assertFalse(CouponUsage.objects.filter(guest_id__isnull=False).exists())
+        # The coupon both had used counts once
+        self.assertEqual(Coupon.objects.get(pk=self.coupons[0].pk).used_count, 0)
+        self.assertEqual(Coupon.objects.get(pk=self.coupons[1].pk).used_count, 1)
+
+    def test_register_takes_over_the_guest_cart(self):
+        response = self.api.post('/user-auth/api/auth/register/', {
+            'username': 'newcomer', 'email': 'newcomer@example.com',
+            'password': PASSWORD, 'password_confirm': PASSWORD,
+        }, format='json', **guest_bearer('d' * 32))
+        self.assertEqual(response.status_code, 201)
+
+        newcomer = User.objects.get(username='newcomer')
+        self.assertEqual(self.quantities(newcomer), {product.pk: 2 for product in self.products[2:5]})
+        self.assertEqual(CouponUsage.objects.filter(user=newcomer).count(), 2)
+        self.assertFalse(Cart.objects.filter(guest_id='d' * 32).exists())
+
+    def test_login_without_a_guest_token_leaves_the_guest_cart(self):
+        self.api.post('/user-auth/api/auth/login/', {'username': self.user.username, 'password': PASSWORD}, format='json')
+        self.assertEqual(len(self.quantities(self.user)), 3)
+        self.assertTrue(Cart.objects.filter(guest_id='d' * 32).exists())
+
+
+class PurgeGuestsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.products = seed_catalog(products=2, categories=1, images_per_product=0)
+
+    def age(self, queryset, days, field='created_at'):
+        queryset.update(**{field: timezone.now() - timedelta(days=days)})
+
+    def purge(self, *args):
+        call_command('purge_guests', *args, stdout=StringIO())
+
+    def test_deletes_only_stale_guest_carts(self):
+        stale = seed_cart(self.products, guest_id='stale')
+        self.age(Cart.objects.filter(pk=stale.pk), 40)
+        self.age(stale.items.all(), 40)
+        # Old cart, but items were added recently
+        active = seed_cart(self.products, guest_id='active')
+        self.age(Cart.objects.filter(pk=active.pk), 40)
+        fresh = seed_cart(self.products, guest_id='fresh')
+        owned = seed_cart(self.products, user=create_user())
+        self.age(Cart.objects.filter(pk=owned.pk), 400)
+        self.age(owned.items.all(), 400)
+
+        self.purge('--dry-run')
+        self.assertEqual(Cart.objects.count(), 4)
+
+        self.purge('--batch-size', '1')
+        self.assertEqual(set(Cart.objects.values_list('pk', flat=True)), {active.pk, fresh.pk, owned.pk})
+        self.assertFalse(CartItem.objects.filter(cart_id=stale.pk).exists())
+
+    def test_deletes_coupon_usages_of_stale_guests(self):
+        coupon, other = seed_coupons(count=2, used=0)
+        usages = {
+            'stale': CouponUsage.objects.create(guest_id='stale', coupon=coupon),
+            'stale_cart': CouponUsage.objects.create(guest_id='stale_cart', coupon=coupon),
+            'active': CouponUsage.objects.create(guest_id='active', coupon=coupon),
+            'recent': CouponUsage.objects.create(guest_id='recent', coupon=coupon),
+            'member': CouponUsage.objects.create(user=create_user(), coupon=coupon),
+        }
+        usages['stale_other'] = CouponUsage.objects.create(guest_id='stale', coupon=other)
+        self.age(CouponUsage.objects.exclude(guest_id='recent'), 40, field='used_at')
+        stale_cart = seed_cart(self.products, guest_id='stale_cart')
+        self.age(Cart.objects.filter(pk=stale_cart.pk), 40)
+        self.age(stale_cart.items.all(), 40)
+        # Still shopping, so the usage has to keep counting
+        active = seed_cart(self.products, guest_id='active')
+        self.age(Cart.objects.filter(pk=active.pk), 40)
+
+        self.purge('--dry-run')
+        self.assertEqual(CouponUsage.objects.count(), 6)
+
+        self.purge('--batch-size', '1')
+        self.assertEqual(
+            set(CouponUsage.objects.values_list('pk', flat=True)),
+            {usages['active'].pk, usages['recent'].pk, usages['member'].pk},
+        )
+
+    def test_deletes_legacy_guest_users_without_orders(self):
+        customer = User.objects.create_user('guest_customer', 'guest_customer@guest.local')
+        seed_orders(customer, self.products, orders=1, items_per_order=1)
+        User.objects.create_user('guest_idle', 'guest_idle@guest.local')
+        User.objects.create_user('guest_recent', 'guest_recent@guest.local')
+        member = User.objects.create_user('guest_member', 'member@example.com')
+        self.age(User.objects.exclude(username='guest_recent'), 40, field='date_joined')
 
-# Create your tests here.
+        self.purge()
+        self.assertEqual(
+            set(User.objects.values_list('username', flat=True)),
+            {customer.username, 'guest_recent', member.username},
+        )
@@ -6,10 +6,21 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.http import JsonResponse
+from Backend.custom_auth import CachedJWTAuthentication, CsrfExemptSessionAuthentication
+from Cart.merge import merge_guest_cart
+from Coupon.merge import merge_guest_coupons
+from .guests import guest_id_from_request, guest_tokens, new_guest_id
 from .models import UserProfile
 from .serializers import UserProfileSerializer, UserRegistrationSerializer, UserLoginSerializer
 import json
-import time
+
+def merge_guest_cart_from_request(request, user):
+    """Fold the cart and coupon usages of the guest session the request came from into the user's"""
+    guest_id = guest_id_from_request(request)
+    if guest_id:
+        merge_guest_cart(guest_id, user.id)
+        merge_guest_coupons(guest_id, user.id)
+
 
 class UserProfileViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
@@ -17,7 +28,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return UserProfile.objects.filter(user=self.request.user)
+        return UserProfile.objects.filter(user_id=self.request.user.id)
 
 class UserRegistrationView(APIView):
     """
@@ -46,6 +57,9 @@ class UserRegistrationView(APIView):
                 address=serializer.validated_data.get('address', '')
             )
             
+            # Keep whatever the visitor put in their cart as a guest
+            merge_guest_cart_from_request(request, user)
+
             # Generate tokens
             refresh = RefreshToken.for_user(user)
             access_token = refresh.access_token
@@ -92,6 +106,9 @@ class UserLoginView(APIView):
             user = authenticate(username=username, password=password)
             
             if user:
+                # Keep whatever the visitor put in their cart as a guest
+                merge_guest_cart_from_request(request, user)
+
                 # Generate tokens
                 refresh = RefreshToken.for_user(user)
                 access_token = refresh.access_token
@@ -190,6 +207,8 @@ class CheckAuthView(APIView):
     GET /user-auth/check-auth/
     """
     permission_classes = [AllowAny]
+    # The response includes profile fields of the full User model
+    authentication_classes = [CachedJWTAuthentication, CsrfExemptSessionAuthentication]
     
     def get(self, request):
         if request.user.is_authenticated:
@@ -225,44 +244,30 @@ class GuestTokenView(APIView):
     """
     Generate JWT tokens for guest users
     POST /user-auth/guest-tokens/
+
+    Guests are not stored as users: the tokens carry a signed guest id that
+    keys the guest's cart. A request already holding a guest token keeps
+    its id, so renewing tokens does not lose the cart.
     """
     permission_classes = [AllowAny]
+    throttle_scope = 'guest_tokens'
     
     def post(self, request):
         try:
-            # Create a temporary guest user or use a special guest user
-            # For simplicity, we'll create a guest user with a unique identifier
-            guest_id = f"guest_{request.data.get('guest_id', int(time.time() * 1000))}"
-            
-            # Create or get a guest user
-            guest_user, created = User.objects.get_or_create(
-                username=guest_id,
-                defaults={
-                    'email': f'{guest_id}@guest.local',
-                    'first_name': 'Guest',
-                    'last_name': 'User',
-                    'is_active': True
-                }
-            )
-            
-            # Generate JWT tokens for the guest user
-            refresh = RefreshToken.for_user(guest_user)
-            access_token = refresh.access_token
-            
-            # Add custom claims to identify this as a guest token
-            access_token['is_guest'] = True
-            access_token['guest_id'] = guest_id
+            # Client-supplied ids are ignored: a guessable id would expose another guest's cart
+            guest_id = guest_id_from_request(request) or new_guest_id()
+            refresh, access_token = guest_tokens(guest_id)
             
             return Response({
                 'success': True,
                 'message': 'Guest tokens generated successfully',
                 'data': {
                     'user': {
-                        'id': guest_user.id,
-                        'username': guest_user.username,
-                        'email': guest_user.email,
-                        'first_name': guest_user.first_name,
-                        'last_name': guest_user.last_name,
+                        'id': None,
+                        'username': f'guest_{guest_id}',
+                        'email': '',
+                        'first_name': 'Guest',
+                        'last_name': 'User',
                         'is_guest': True,
                         'guest_id': guest_id
                     },
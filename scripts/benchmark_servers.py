@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""
+Compare the concurrent throughput of the WSGI and ASGI deployments.
+
+    cd Backend && python manage.py generate_synthetic_data
+    python scripts/benchmark_servers.py --concurrency 32 --duration 30
+
+Starts gunicorn on a local port the way scripts/prod.sh does, once per mode:
+
+    wsgi  sync workers with threads, serving the DRF views
+    asgi  uvicorn workers, serving the async views (ASYNC_VIEWS=True)
+
+and drives each with the same mix of requests. Every client sends its
+next request as soon as the last one is answered, so the server sets the
+pace. The report has throughput and p50/p95/p99 latency per endpoint and
+mode. There are two mixes (--mix):
+
+    api    the endpoints that have async versions: product list, search
+           and filter, blog list and search, and the cart summary of a few
+           synthetic users
+    media  files under Backend/media as served by MediaFilesMiddleware:
+           whole files, the first 64 KiB (Range) and revalidations
+           (If-Modified-Since, answered with 304)
+
+Both servers use the project settings and database from the environment
+(DATABASE_URL, ...). The async views pay off when requests wait on the
+database, so compare against the PostgreSQL used in production: with a
+local SQLite file queries hardly wait and the modes mostly differ in
+per-request overhead. The clients run on the same machine as the server,
+so keep the worker count below the number of cores.
+
+Search is rate limited per client IP. The servers start with NUM_PROXIES=1
+and every request carries a random X-Forwarded-For, so the limit applies
+to many simulated clients instead of one.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from email.utils import formatdate
+
+from loadtest import SEARCH_TERMS, Client, Recorder, catalog_pages, summarize
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'Backend')
+MEDIA_DIR = os.path.join(BACKEND_DIR, 'media')
+
+MODES = {
+    'wsgi': {
+        'args': ['Backend.wsgi:application', '--threads', '{threads}'],
+        'env': {'ASYNC_VIEWS': 'False'},
+    },
+    'asgi': {
+        'args': ['Backend.asgi:application', '--worker-class', 'uvicorn_worker.UvicornWorker'],
+        'env': {'ASYNC_VIEWS': 'True', 'DB_CONN_MAX_AGE': '0'},
+    },
+}
+
+FILTER_TYPES = ['discounted', 'featured', 'new', 'best_selling']
+BLOG_TERMS = ['glow', 'routine', 'vitamin', 'serum', 'skin']
+
+
+class BenchmarkClient(Client):
+
+    def __init__(self, *args, rng, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rng = rng
+
+    def extra_headers(self):
+        return {'X-Forwarded-For': f'10.{self.rng.randrange(256)}.{self.rng.randrange(256)}.{self.rng.randrange(1, 255)}'}
+
+
+def api_mix(options):
+    """(weight, label, path builder, headers) per endpoint"""
+    pages = catalog_pages(options)
+    return [
+        (30, 'products', lambda rng: f'/product/products/?page={rng.randint(1, pages)}', {}),
+        (15, 'product search', lambda rng: f'/product/search/?q={urllib.parse.quote(rng.choice(SEARCH_TERMS))}', {}),
+        (15, 'product filter', lambda rng: f'/product/filter/?type={rng.choice(FILTER_TYPES)}', {}),
+        (15, 'blog posts', lambda rng: f'/blog/posts/?page={rng.randint(1, 5)}', {}),
+        (10, 'blog search', lambda rng: f'/blog/search/?q={rng.choice(BLOG_TERMS)}', {}),
+        (15, 'cart summary', lambda rng: '/cart/summary/', {}),
+    ]
+
+
+def media_mix(options):
+    names = [
+        os.path.relpath(os.path.join(directory, filename), MEDIA_DIR).replace(os.sep, '/')
+        for directory, _, filenames in os.walk(MEDIA_DIR) for filename in filenames
+    ]
+    if not names:
+        raise SystemExit(f'No files in {MEDIA_DIR}')
+
+    def path(rng):
+        return f'/media/{urllib.parse.quote(rng.choice(names))}'
+
+    return [
+        (50, 'media', path, {}),
+        (25, 'media range', path, {'Range': 'bytes=0-65535'}),
+        (25, 'media revalidate', path, {'If-Modified-Since': formatdate(usegmt=True)}),
+    ]
+
+
+MIXES = {'api': api_mix, 'media': media_mix}
+
+
+def start_server(mode, options, log):
+    config = MODES[mode]
+    args = [arg.format(threads=options.threads) for arg in config['args']]
+    env = {**os.environ, 'NUM_PROXIES': '1', **config['env']}
+    command = [
+        sys.executable, '-m', 'gunicorn', *args,
+        '--bind', f'127.0.0.1:{options.port}', '--workers', str(options.workers), '--timeout', '120',
+    ]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    probe = Client(options.base_url, Recorder(), timeout=2)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f'{mode} server exited with status {server.returncode}; see {log.name}')
+        if probe.request('GET', '/product/facets/')[0] == 200:
+            return server
+        time.sleep(0.5)
+    server.terminate()
+    raise SystemExit(f'{mode} server did not answer within 60s; see {log.name}')
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def log_in(options):
+    """Access tokens of the synthetic users whose carts are summarized; valid for every mode"""
+    tokens = []
+    for index in range(options.accounts):
+        client = BenchmarkClient(options.base_url, Recorder(), options.timeout, rng=random.Random(index))
+        username = f'{options.user_prefix}{index:05d}'
+        status = client.login(username, options.password)
+        if status != 200:
+            raise SystemExit(f'{username}: login failed with status {status}; is the synthetic data loaded?')
+        tokens.append(client.token)
+    return tokens
+
+
+def run_clients(options, mix, tokens, recorder, seconds, seed):
+    weights = [weight for weight, _, _, _ in mix]
+    deadline = time.monotonic() + seconds
+
+    def client_loop(index):
+        rng = random.Random(f'{seed}-{index}')
+        client = BenchmarkClient(options.base_url, recorder, options.timeout, rng=rng)
+        if tokens:
+            client.token = tokens[index % len(tokens)]
+        while time.monotonic() < deadline:
+            _, label, path, headers = rng.choices(mix, weights)[0]
+            client.request('GET', path(rng), label=label, headers=headers)
+
+    clients = [threading.Thread(target=client_loop, args=(index,), daemon=True) for index in range(options.concurrency)]
+    start = time.monotonic()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    return time.monotonic() - start
+
+
+def print_comparison(results):
+    modes = list(results)
+    labels = sorted({row['endpoint'] for result in results.values() for row in result['endpoints']})
+    columns = ''.join(f'{f"{mode} req/s":>13}{"p50":>8}{"p95":>8}{"p99":>8}{"errors":>8}' for mode in modes)
+    header = f'{"endpoint":<18}{columns}'
+    print(header)
+    print('-' * len(header))
+
+    def cells(row):
+        if row is None:
+            return f'{"-":>13}{"-":>8}{"-":>8}{"-":>8}{"-":>8}'
+        latencies = ''.join(f'{row[key]:>8.1f}' if key in row else f'{"-":>8}' for key in ('p50', 'p95', 'p99'))
+        return f'{row["rps"]:>13.1f}{latencies}{row["errors"] + row["throttled"]:>8}'
+
+    for label in labels:
+        rows = [next((row for row in results[mode]['endpoints'] if row['endpoint'] == label), None) for mode in modes]
+        print(f'{label:<18}' + ''.join(cells(row) for row in rows))
+    print('-' * len(header))
+    print(f'{"all":<18}' + ''.join(cells(results[mode]['total']) for mode in modes))
+
+
+def total_row(recorder, elapsed):
+    merged = Recorder()
+    for label, latencies in recorder.latencies.items():
+        merged.latencies['all'].extend(latencies)
+        merged.errors['all'] += recorder.errors[label]
+        merged.throttled['all'] += recorder.throttled[label]
+    rows = summarize(merged, elapsed)
+    return rows[0] if rows else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default='wsgi,asgi', help='Deployments to compare, in order (default: %(default)s)')
+    parser.add_argument('--mix', choices=MIXES, default='api', help='Requests to send (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=4, help='Gunicorn workers (default: %(default)s)')
+    parser.add_argument('--threads', type=int, default=2, help='Threads per sync worker (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8050, help='Local port for the servers (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds per mode (default: %(default)s)')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds per mode first (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the request mix (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds (default: %(default)s)')
+    parser.add_argument('--accounts', type=int, default=8, help='Synthetic users whose carts are summarized (default: %(default)s)')
+    parser.add_argument('--user-prefix', default='synthetic-', help='Username prefix of the synthetic users (default: %(default)s)')
+    parser.add_argument('--password', default='synthetic-password', help='Password of the synthetic users (default: %(default)s)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the numbers to this file')
+    options = parser.parse_args()
+    options.base_url = f'http://127.0.0.1:{options.port}'
+
+    modes = [mode.strip() for mode in options.modes.split(',')]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f'unknown modes: {", ".join(sorted(unknown))} (choose from {", ".join(MODES)})')
+
+    results = {}
+    tokens = None
+    for mode in modes:
+        log = tempfile.NamedTemporaryFile('w', prefix=f'benchmark-{mode}-', suffix='.log', delete=False)
+        print(f'{mode}: starting {options.workers} workers (log: {log.name})')
+        server = start_server(mode, options, log)
+        try:
+            if tokens is None:
+                tokens = log_in(options) if options.mix == 'api' else []
+            mix = MIXES[options.mix](options)
+            run_clients(options, mix, tokens, Recorder(), options.warmup, options.seed)
+            recorder = Recorder()
+            elapsed = run_clients(options, mix, tokens, recorder, options.duration, options.seed)
+        finally:
+            stop_server(server)
+            log.close()
+        results[mode] = {'elapsed': elapsed, 'endpoints': summarize(recorder, elapsed), 'total': total_row(recorder, elapsed)}
+        print(f'{mode}: {results[mode]["total"]["rps"]:.1f} req/s over {elapsed:.1f}s')
+
+    print()
+    print(f'{options.concurrency} concurrent clients, {options.workers} workers')
+    print_comparison(results)
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump({'options': {key: value for key, value in vars(options).items()}, 'modes': results}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
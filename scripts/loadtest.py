@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+"""
+Replay shopper journeys against a running server and report latency per endpoint.
+
+    cd Backend && python manage.py generate_synthetic_data
+    python scripts/loadtest.py --base-url http://127.0.0.1:8000 --users 20 --duration 60
+
+Each virtual user logs in as one of the synthetic users
+(synthetic-00000, synthetic-00001, ...) and repeats one journey until the
+duration is up:
+
+    browse    a random product list page, the facets, one product
+    search    a common search term
+    cart      add one of the products seen to the cart
+    coupon    apply one of the synthetic SYNTH coupons
+    checkout  the cart summary and the checkout page
+
+There is no order-placing API, so a journey ends at the checkout page and
+then undoes its coupon and cart line, leaving the account as it found it.
+
+The report has the request count, throughput and p50/p95/p99/max latency
+per endpoint. Errors and throttled (429) responses are counted in their
+own columns. The search and coupon endpoints are rate limited per IP and
+per user (REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']). Raise those limits on
+the server under test to measure capacity rather than the limiter.
+
+Only the standard library is used, so the script runs from any machine
+that can reach the server.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+SEARCH_TERMS = ['serum', 'vitamin c', 'cleanser', 'retinol', 'sunscreen', 'rose', 'face mask', 'toner', 'aloe', 'eye cream']
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint, shared by all virtual users"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.throttled = defaultdict(int)
+        self.journeys = 0
+
+    def record(self, label, ms, status):
+        with self.lock:
+            if status == 429:
+                self.throttled[label] += 1
+                return
+            self.latencies[label].append(ms)
+            if not 200 <= status < 400:
+                self.errors[label] += 1
+
+    def journey_done(self):
+        with self.lock:
+            self.journeys += 1
+
+
+class Client:
+    """One virtual user's HTTP session"""
+
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.token = None
+
+    def request(self, method, path, data=None, label=None, headers=None):
+        """(status, parsed JSON or None); status 0 when the server could not be reached"""
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        request.add_header('Accept', 'application/json')
+        if body is not None:
+            request.add_header('Content-Type', 'application/json')
+        if self.token:
+            request.add_header('Authorization', f'Bearer {self.token}')
+        for name, value in {**self.extra_headers(), **(headers or {})}.items():
+            request.add_header(name, value)
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as error:
+            status, payload = error.code, error.read()
+        except OSError:
+            status, payload = 0, b''
+        self.recorder.record(label or f'{method} {path}', (time.perf_counter() - start) * 1000, status)
+
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+    def extra_headers(self):
+        """Further headers for every request"""
+        return {}
+
+    def login(self, username, password):
+        self.token = None
+        status, body = self.request('POST', '/user-auth/api/auth/login/', {'username': username, 'password': password})
+        if status == 200:
+            self.token = body['data']['tokens']['access']
+        return status
+
+
+def product_ids(body):
+    return [product['id'] for product in (body or {}).get('results', [])]
+
+
+def journey(client, rng, options, pause):
+    # Browse
+    _, body = client.request('GET', f'/product/products/?page={rng.randint(1, options.pages)}', label='GET /product/products/?page=N')
+    products = product_ids(body)
+    pause()
+    client.request('GET', '/product/facets/')
+    if products:
+        pause()
+        client.request('GET', f'/product/products/{rng.choice(products)}/', label='GET /product/products/<id>/')
+
+    # Search
+    pause()
+    query = urllib.parse.quote(rng.choice(SEARCH_TERMS))
+    _, body = client.request('GET', f'/product/search/?q={query}', label='GET /product/search/?q=...')
+    products += product_ids(body)
+    if not products:
+        return
+
+    # Add to cart
+    pause()
+    product_id = rng.choice(products)
+    client.request('POST', '/cart/add_item/', {'product_id': product_id})
+
+    # Apply coupon
+    pause()
+    code = f'SYNTH{rng.randrange(options.coupons):04d}'
+    applied, _ = client.request('POST', '/coupon/apply/', {'code': code})
+
+    # Checkout
+    pause()
+    client.request('GET', '/cart/summary/')
+    client.request('GET', '/checkout/')
+
+    # Undo, so the next journey can apply a coupon to the same cart again
+    if applied == 200:
+        client.request('POST', '/coupon/remove/', {'code': code})
+    client.request('POST', '/cart/remove_item/', {'product_id': product_id})
+
+
+def virtual_user(index, options, recorder, deadline):
+    rng = random.Random(f'{options.seed}-{index}')
+    client = Client(options.base_url, recorder, options.timeout)
+
+    def pause():
+        if options.think_time:
+            time.sleep(rng.expovariate(1 / options.think_time))
+
+    username = f'{options.user_prefix}{index % options.accounts:05d}'
+    status = client.login(username, options.password)
+    if status != 200:
+        print(f'{username}: login failed with status {status}; is the synthetic data loaded?')
+        return
+
+    journeys = 0
+    while time.monotonic() < deadline and journeys != options.journeys:
+        journey(client, rng, options, pause)
+        recorder.journey_done()
+        journeys += 1
+
+
+def catalog_pages(options):
+    """Number of product list pages, so browsing spreads over the whole catalog"""
+    status, body = Client(options.base_url, Recorder(), options.timeout).request('GET', '/product/products/')
+    if status != 200:
+        raise SystemExit(f'GET /product/products/ returned {status}; is the server running at {options.base_url}?')
+    page_size = len(body['results']) or 1
+    return max(1, math.ceil(body['count'] / page_size))
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(recorder, elapsed):
+    rows = []
+    for label in sorted(set(recorder.latencies) | set(recorder.throttled)):
+        ordered = sorted(recorder.latencies[label])
+        row = {
+            'endpoint': label,
+            'requests': len(ordered) + recorder.throttled[label],
+            'errors': recorder.errors[label],
+            'throttled': recorder.throttled[label],
+            'rps': (len(ordered) + recorder.throttled[label]) / elapsed,
+        }
+        if ordered:
+            row.update({
+                'p50': percentile(ordered, 0.50), 'p95': percentile(ordered, 0.95),
+                'p99': percentile(ordered, 0.99), 'max': ordered[-1],
+            })
+        rows.append(row)
+    return rows
+
+
+def print_report(rows, journeys, elapsed):
+    header = f'{"endpoint":<34}{"requests":>9}{"errors":>8}{"429":>7}{"req/s":>8}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}'
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        latencies = ''.join(f'{row[key]:>9.1f}' if key in row else f'{"-":>9}' for key in ('p50', 'p95', 'p99', 'max'))
+        print(f'{row["endpoint"]:<34}{row["requests"]:>9}{row["errors"]:>8}{row["throttled"]:>7}{row["rps"]:>8.1f}{latencies}')
+    total = sum(row['requests'] for row in rows)
+    print('-' * len(header))
+    print(f'{total} requests and {journeys} journeys in {elapsed:.1f}s: {total / elapsed:.1f} req/s, {journeys / elapsed:.2f} journeys/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Server under test (default: %(default)s)')
+    parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run (default: %(default)s)')
+    parser.add_argument('--journeys', type=int, default=-1, help='Stop each user after this many journeys (default: no limit)')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which users start (default: %(default)s)')
+    parser.add_argument('--think-time', type=float, default=0, help='Mean seconds between steps, exponentially distributed (default: none)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the journeys (default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds (default: %(default)s)')
+    parser.add_argument('--accounts', type=int, default=500, help='Synthetic users to log in as (default: %(default)s)')
+    parser.add_argument('--coupons', type=int, default=50, help='Synthetic coupons to apply (default: %(default)s)')
+    parser.add_argument('--user-prefix', default='synthetic-', help='Username prefix of the synthetic users (default: %(default)s)')
+    parser.add_argument('--password', default='synthetic-password', help='Password of the synthetic users (default: %(default)s)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the per-endpoint numbers to this file')
+    options = parser.parse_args()
+
+    options.pages = catalog_pages(options)
+    recorder = Recorder()
+    start = time.monotonic()
+    deadline = start + options.duration
+    users = []
+    for index in range(options.users):
+        user = threading.Thread(target=virtual_user, args=(index, options, recorder, deadline), daemon=True)
+        user.start()
+        users.append(user)
+        time.sleep(options.ramp_up / options.users)
+    for user in users:
+        user.join()
+    elapsed = time.monotonic() - start
+
+    rows = summarize(recorder, elapsed)
+    print_report(rows, recorder.journeys, elapsed)
+    if options.json:
+        with open(options.json, 'w') as output:
+            json.dump({'elapsed': elapsed, 'journeys': recorder.journeys, 'endpoints': rows}, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
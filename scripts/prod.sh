@@ -2,6 +2,12 @@
 
 # Production script for Django project
 # This script runs migrations, collects static files, and starts Gunicorn
+#
+# SERVER_MODE=wsgi (default) runs sync workers with threads.
+# SERVER_MODE=asgi runs uvicorn workers with the async views
+# (ASYNC_VIEWS=True): each worker serves many requests while they wait on
+# the database. Connections are then opened per request, so use DB_POOL
+# with PostgreSQL.
 
 set -e
 
@@ -14,10 +20,34 @@ cd /app/Backend
 echo "Running database migrations..."
 python manage.py migrate --noinput
 
-# Collect static files
+# Collect static files: content-hashed names plus .gz/.br copies, served by
+# the app itself (StaticFilesMiddleware) with far-future caching
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+# Metrics from previous runs would be added to this run's counters
+export METRICS_DIR="${METRICS_DIR:-/tmp/sistomatic-metrics}"
+rm -rf "$METRICS_DIR"
+mkdir -p "$METRICS_DIR"
+
+SERVER_MODE="${SERVER_MODE:-wsgi}"
+
+if [ "$SERVER_MODE" = "asgi" ]; then
+    export ASYNC_VIEWS=True
+    # Sync code runs on a new thread per request, so connections cannot persist
+    export DB_CONN_MAX_AGE=0
+
+    echo "Starting Gunicorn server with uvicorn workers on 0.0.0.0:8000..."
+    exec gunicorn Backend.asgi:application \
+        --worker-class uvicorn_worker.UvicornWorker \
+        --bind 0.0.0.0:8000 \
+        --workers 4 \
+        --timeout 120 \
+        --access-logfile - \
+        --error-logfile - \
+        --log-level info
+fi
+
 # Start Gunicorn server
 echo "Starting Gunicorn server on 0.0.0.0:8000..."
 exec gunicorn Backend.wsgi:application \